@@ -1,14 +1,16 @@
 """
 Unit tests for the auth utilities module.
 """
+import time
 import unittest
 from unittest.mock import patch, MagicMock
-from flask import Flask, session, request, jsonify
+from flask import Flask, session, request, jsonify, g, render_template_string
 from werkzeug.test import Client
 from werkzeug.wrappers import Response
 from models import db, User
-from auth.auth_utils import login_required, admin_required, get_current_user
-from _test.conftest import create_test_app, create_test_user
+from auth import auth_utils
+from auth.auth_utils import login_required, admin_required, get_current_user, invalidate_current_user
+from _test.conftest import create_test_app, create_test_user, login_user, QueryCounter
 
 
 class TestAuthUtils(unittest.TestCase):
@@ -63,6 +65,61 @@ class TestAuthUtils(unittest.TestCase):
             user = get_current_user()
             self.assertIsNone(user)
     
+    def test_get_current_user_cached_per_request(self):
+        """Test that repeated calls in one request load the user once."""
+        user_id = self.user.id
+        db.session.expunge_all()
+        with self.app.test_request_context():
+            session['user_id'] = user_id
+            
+            with QueryCounter(db.engine) as counter:
+                first = get_current_user()
+                second = get_current_user()
+            self.assertIs(first, second)
+            self.assertEqual(counter.count, 1)
+    
+    def test_get_current_user_cache_follows_session(self):
+        """Test that the cached user is not reused after the session changes."""
+        with self.app.test_request_context():
+            session['user_id'] = self.user.id
+            self.assertEqual(get_current_user().id, self.user.id)
+            
+            session['user_id'] = self.admin.id
+            self.assertEqual(get_current_user().id, self.admin.id)
+            
+            session.clear()
+            self.assertIsNone(get_current_user())
+    
+    def test_invalidate_current_user(self):
+        """Test that invalidation drops the cached user."""
+        with self.app.test_request_context():
+            session['user_id'] = self.user.id
+            get_current_user()
+            self.assertIn('_current_user', g)
+            
+            invalidate_current_user()
+            self.assertNotIn('_current_user', g)
+    
+    def test_single_user_select_per_request(self):
+        """Test that decorator, view and context processor share one user SELECT."""
+        @self.app.route('/admin-page')
+        @admin_required
+        def admin_page():
+            user = get_current_user()
+            return render_template_string('{{ current_user.username }} {{ name }}', name=user.first_name)
+        
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = self.admin.id
+        # Start from an empty identity map, as a fresh request would in production
+        db.session.expunge_all()
+        
+        with QueryCounter(db.engine) as counter:
+            response = self.client.get('/admin-page')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'admin', response.data)
+        user_selects = [sql for sql in counter.statements if 'FROM users' in sql]
+        self.assertEqual(len(user_selects), 1)
+    
     def test_login_required_decorator_no_auth(self):
         """Test login_required decorator without authentication."""
         @self.app.route('/test-endpoint')
@@ -221,5 +278,128 @@ class TestAuthDecoratorsIntegration(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
 
 
+class TestIdentitySnapshot(unittest.TestCase):
+    """Test authorization from the signed session identity snapshot."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = create_test_app()
+        self.app.config['SESSION_IDENTITY_SNAPSHOT'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        auth_utils._stamp_cache.clear()
+        
+        self.user = create_test_user()
+        self.admin = create_test_user(
+            username="admin", 
+            email="admin@example.com",
+            is_admin=True
+        )
+        
+    def tearDown(self):
+        """Clean up after each test method."""
+        auth_utils._stamp_cache.clear()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def _user_selects(self, url):
+        with QueryCounter(db.engine) as counter:
+            response = self.client.get(url, headers={'Accept': 'application/json'})
+        # Ticket list ETags read max(users.updated_at); that is not an identity lookup
+        return response, [sql for sql in counter.statements
+                          if 'FROM users' in sql and 'max(users.updated_at)' not in sql]
+    
+    def test_login_stores_snapshot(self):
+        """Test that login saves a signed snapshot in the session."""
+        login_user(self.client)
+        with self.client.session_transaction() as sess:
+            self.assertIn('identity', sess)
+            data = auth_utils._identity_serializer().loads(sess['identity'])
+        self.assertEqual(data['id'], self.user.id)
+        self.assertFalse(data['admin'])
+        self.assertEqual(data['stamp'], self.user.security_stamp)
+    
+    def test_snapshot_skips_user_lookup(self):
+        """Test that requests within the stamp TTL do not query the users table."""
+        login_user(self.client)
+        
+        response, selects = self._user_selects('/api/tickets/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(selects), 1)  # First request re-checks the stamp
+        
+        response, selects = self._user_selects('/api/tickets/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(selects, [])
+    
+    def test_admin_required_uses_snapshot(self):
+        """Test that admin checks are answered from the snapshot."""
+        login_user(self.client, username="admin")
+        self.client.get('/api/tickets/admin/all')
+        
+        response, selects = self._user_selects('/api/tickets/admin/all')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(selects, [])
+        
+        login_user(self.client)
+        response, _ = self._user_selects('/api/tickets/admin/all')
+        self.assertEqual(response.status_code, 403)
+    
+    def test_password_change_revokes_snapshot(self):
+        """Test that a changed security stamp logs the session out."""
+        login_user(self.client)
+        self.assertEqual(self.client.get('/api/tickets/').status_code, 200)
+        
+        self.user.set_password('newpassword123')
+        db.session.commit()
+        auth_utils.forget_security_stamp(self.user.id)
+        
+        response = self.client.get('/api/tickets/')
+        self.assertEqual(response.status_code, 401)
+        with self.client.session_transaction() as sess:
+            self.assertNotIn('user_id', sess)
+    
+    def test_revocation_waits_for_ttl(self):
+        """Test that the stamp check is cached until the TTL expires."""
+        self.app.config['IDENTITY_STAMP_TTL'] = 60
+        login_user(self.client)
+        self.assertEqual(self.client.get('/api/tickets/').status_code, 200)
+        
+        self.user.is_active = False
+        db.session.commit()
+        self.assertEqual(self.client.get('/api/tickets/').status_code, 200)
+        
+        with patch('auth.auth_utils.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertEqual(self.client.get('/api/tickets/').status_code, 401)
+    
+    def test_tampered_snapshot_rejected(self):
+        """Test that a snapshot with a bad signature is rejected."""
+        login_user(self.client)
+        with self.client.session_transaction() as sess:
+            sess['identity'] = sess['identity'][:-2] + 'xx'
+        
+        response = self.client.get('/api/tickets/')
+        self.assertEqual(response.status_code, 401)
+    
+    def test_session_without_snapshot_falls_back(self):
+        """Test that sessions created before snapshot mode still work."""
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = self.user.id
+        
+        response = self.client.get('/api/tickets/')
+        self.assertEqual(response.status_code, 200)
+    
+    def test_profile_update_keeps_own_session(self):
+        """Test that changing your own password re-stamps the current session."""
+        login_user(self.client)
+        response = self.client.put(f'/api/users/{self.user.id}', json={'password': 'newpassword123'})
+        self.assertEqual(response.status_code, 200)
+        
+        response = self.client.get('/api/tickets/')
+        self.assertEqual(response.status_code, 200)
+
+
 if __name__ == '__main__':
     unittest.main()
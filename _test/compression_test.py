@@ -0,0 +1,127 @@
+"""
+Unit tests for the response compression module.
+"""
+import gzip
+import json
+import unittest
+import zlib
+from unittest.mock import patch
+from flask import Flask, Response, jsonify, stream_with_context
+import compression
+from compression import compress_response
+
+
+def create_compression_app(**config):
+    """Small app with the compression hook and a few fixed payloads."""
+    app = Flask(__name__)
+    app.config.update({'COMPRESS_ALGORITHMS': ('gzip',), **config})
+    app.after_request(compress_response)
+
+    @app.route('/large')
+    def large():
+        response = jsonify([{'id': i, 'description': 'printer out of toner ' * 5} for i in range(50)])
+        response.set_etag('abc')
+        return response
+
+    @app.route('/small')
+    def small():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/text')
+    def text():
+        return Response('x' * 5000, mimetype='text/plain')
+
+    @app.route('/stream')
+    def stream():
+        def rows():
+            for i in range(3):
+                yield f'{{"id": {i}}}\n' * 200
+        return Response(stream_with_context(rows()), mimetype='application/x-ndjson')
+
+    return app
+
+
+class TestCompressResponse(unittest.TestCase):
+    """Test cases for the compress_response after_request hook."""
+
+    def setUp(self):
+        """Set up a test client for each test."""
+        self.app = create_compression_app()
+        self.client = self.app.test_client()
+
+    def test_gzip_large_json(self):
+        """Test that large JSON bodies are gzipped for clients that accept it."""
+        response = self.client.get('/large', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+
+        body = json.loads(gzip.decompress(response.data))
+        self.assertEqual(len(body), 50)
+        self.assertLess(len(response.data), len(json.dumps(body)) / 5)
+
+    def test_etag_weakened(self):
+        """Test that a strong ETag becomes weak once the body is compressed."""
+        response = self.client.get('/large', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.get_etag(), ('abc', True))
+
+    def test_identity_when_not_accepted(self):
+        """Test that bodies are left alone without a matching Accept-Encoding."""
+        response = self.client.get('/large')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(response.get_etag(), ('abc', False))
+
+    def test_below_threshold(self):
+        """Test that bodies smaller than COMPRESS_MIN_SIZE are not compressed."""
+        response = self.client.get('/small', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_mimetype_allow_list(self):
+        """Test that content types outside the allow-list are not compressed."""
+        response = self.client.get('/text', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+        app = create_compression_app(COMPRESS_MIMETYPES=['text/plain'])
+        response = app.test_client().get('/text', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+
+    def test_disabled(self):
+        """Test that COMPRESS_ENABLED turns compression off."""
+        app = create_compression_app(COMPRESS_ENABLED=False)
+        response = app.test_client().get('/large', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_streamed_response(self):
+        """Test that streamed bodies are compressed chunk by chunk."""
+        response = self.client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+
+        chunks = list(response.response)
+        self.assertGreater(len(chunks), 1)
+        # Every flushed chunk is decodable on its own as it arrives
+        decoder = zlib.decompressobj(31)
+        first = decoder.decompress(chunks[0])
+        self.assertTrue(first.startswith(b'{"id": 0}'))
+        text = first + b''.join(decoder.decompress(chunk) for chunk in chunks[1:])
+        self.assertEqual(text.count(b'\n'), 600)
+
+    @unittest.skipIf(compression.brotli is None, 'brotli not installed')
+    def test_brotli_preferred(self):
+        """Test that brotli is chosen when installed and accepted."""
+        app = create_compression_app(COMPRESS_ALGORITHMS=('br', 'gzip'))
+        response = app.test_client().get('/large', headers={'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(len(json.loads(compression.brotli.decompress(response.data))), 50)
+
+    def test_gzip_fallback_without_brotli(self):
+        """Test that gzip is used when brotli is not installed."""
+        app = create_compression_app(COMPRESS_ALGORITHMS=('br', 'gzip'))
+        with patch.object(compression, 'brotli', None):
+            response = app.test_client().get('/large', headers={'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+
+
+if __name__ == '__main__':
+    unittest.main()
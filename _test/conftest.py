@@ -4,6 +4,7 @@ Test configuration and utilities for the ticketing system.
 import os
 import tempfile
 from flask import Flask
+from sqlalchemy import event
 from models import db, User, Ticket
 
 
@@ -14,6 +15,8 @@ class TestConfig:
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_ENABLED = False
+    # Cheap hashes keep user fixtures fast
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
 
 
 def create_test_app():
@@ -21,6 +24,9 @@ def create_test_app():
     app = Flask(__name__)
     app.config.from_object(TestConfig)
     
+    from json_provider import init_json
+    init_json(app)
+    
     # Initialize database
     db.init_app(app)
     
@@ -106,3 +112,25 @@ def logout_user(client):
     """Helper function to log out a user during tests."""
     return client.post('/api/auth/logout', 
                       headers={'Content-Type': 'application/json'})
+
+
+class QueryCounter:
+    """Context manager recording the SQL statements executed on an engine."""
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+    
+    @property
+    def count(self):
+        return len(self.statements)
@@ -0,0 +1,95 @@
+"""
+Unit tests for the health and readiness routes module.
+"""
+import unittest
+from unittest.mock import patch
+from sqlalchemy.exc import OperationalError
+from models import db
+from pool_metrics import instrument_engine
+from _test.conftest import create_test_app, QueryCounter
+
+
+class TestHealthRoutes(unittest.TestCase):
+    """Test cases for liveness and readiness probes."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_health_does_not_query_database(self):
+        """Test that the liveness probe runs no SQL."""
+        with QueryCounter(db.engine) as counter:
+            response = self.client.get('/health')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'healthy')
+        self.assertEqual(counter.count, 0)
+    
+    def test_ready(self):
+        """Test the readiness probe with a reachable database."""
+        response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 200)
+        
+        data = response.get_json()
+        self.assertEqual(data['status'], 'ready')
+        self.assertTrue(data['database']['ok'])
+        self.assertFalse(data['database']['cached'])
+        self.assertIn('latency_ms', data['database'])
+    
+    def test_ready_result_is_cached(self):
+        """Test that repeated probes reuse the last database check."""
+        self.client.get('/ready')
+        with QueryCounter(db.engine) as counter:
+            response = self.client.get('/ready')
+        self.assertTrue(response.get_json()['database']['cached'])
+        self.assertEqual(counter.count, 0)
+    
+    def test_ready_cache_expires(self):
+        """Test that the check runs again once the cache interval has passed."""
+        self.app.config['READINESS_CACHE_SECONDS'] = 0
+        self.client.get('/ready')
+        with QueryCounter(db.engine) as counter:
+            response = self.client.get('/ready')
+        self.assertFalse(response.get_json()['database']['cached'])
+        self.assertEqual(counter.count, 1)
+    
+    def test_ready_database_unavailable(self):
+        """Test that an unreachable database reports 503."""
+        error = OperationalError('SELECT 1', {}, Exception('connection refused'))
+        with patch.object(db.engine, 'connect', side_effect=error), \
+                self.assertLogs('routes.health', level='ERROR') as logs:
+            response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 503)
+        
+        data = response.get_json()
+        self.assertEqual(data['status'], 'unavailable')
+        self.assertFalse(data['database']['ok'])
+        self.assertEqual(data['database']['error'], 'database unavailable')
+        self.assertNotIn(b'connection refused', response.data)
+        self.assertIn('connection refused', logs.output[0])
+    
+    def test_ready_reports_pool(self):
+        """Test that pool usage is included when the engine is instrumented."""
+        instrument_engine(self.app, db.engine)
+        response = self.client.get('/ready')
+        
+        # The in-memory test database uses a StaticPool, which has no size counters
+        self.assertIsInstance(response.get_json()['pool'], dict)
+    
+    def test_ready_without_pool_metrics(self):
+        """Test that pool usage is omitted when the engine is not instrumented."""
+        response = self.client.get('/ready')
+        self.assertIsNone(response.get_json()['pool'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+Unit tests for the JSON provider module.
+"""
+import json
+import unittest
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+from flask import Flask
+import json_provider
+from json_provider import IsoJSONProvider, OrjsonProvider, init_json
+from models import db
+from _test.conftest import create_test_app, create_test_user, create_test_ticket
+
+
+def create_json_app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    return app
+
+
+PAYLOAD = {
+    'id': 7,
+    'title': 'Printer <jammed> & "stuck"',
+    'created_at': datetime(2024, 5, 1, 9, 30, 15, 123456),
+    'updated_at': datetime(2024, 5, 1, 9, 30),
+    'due': date(2024, 5, 3),
+    'assigned_to': None,
+    'tags': ['hardware', 'é'],
+}
+
+
+class TestJSONProviders(unittest.TestCase):
+    """Test cases shared by the orjson and stdlib providers."""
+
+    def _providers(self):
+        app = create_json_app()
+        providers = [IsoJSONProvider(app)]
+        if json_provider.orjson is not None:
+            providers.append(OrjsonProvider(app))
+        return app, providers
+
+    def test_datetimes_as_iso_8601(self):
+        """Test that datetimes and dates encode like isoformat()."""
+        _, providers = self._providers()
+        for provider in providers:
+            decoded = provider.loads(provider.dumps(PAYLOAD))
+            self.assertEqual(decoded['created_at'], '2024-05-01T09:30:15.123456', provider)
+            self.assertEqual(decoded['updated_at'], '2024-05-01T09:30:00', provider)
+            self.assertEqual(decoded['due'], '2024-05-03', provider)
+            self.assertEqual(decoded['title'], PAYLOAD['title'])
+
+    def test_providers_agree(self):
+        """Test that both providers produce the same document, in to_dict key order."""
+        _, providers = self._providers()
+        decoded = [json.loads(provider.dumps(PAYLOAD)) for provider in providers]
+        for document in decoded:
+            self.assertEqual(document, decoded[0])
+            self.assertEqual(list(document), list(PAYLOAD))
+
+    def test_other_types(self):
+        """Test Decimal, UUID and non-string keys."""
+        _, providers = self._providers()
+        value = uuid.uuid4()
+        for provider in providers:
+            decoded = provider.loads(provider.dumps({1: Decimal('1.50'), 'uuid': value}))
+            self.assertEqual(decoded, {'1': '1.50', 'uuid': str(value)})
+
+    def test_response(self):
+        """Test that response() returns a JSON body ending in a newline."""
+        app, providers = self._providers()
+        with app.app_context():
+            for provider in providers:
+                response = provider.response(PAYLOAD)
+                self.assertEqual(response.mimetype, 'application/json')
+                self.assertTrue(response.data.endswith(b'\n'))
+                self.assertEqual(json.loads(response.data)['id'], 7)
+
+    def test_dumps_with_formatting_arguments(self):
+        """Test that stdlib-only arguments such as indent still work."""
+        _, providers = self._providers()
+        for provider in providers:
+            self.assertIn('\n  "id": 7', provider.dumps(PAYLOAD, indent=2))
+
+
+class TestInitJSON(unittest.TestCase):
+    """Test cases for provider selection."""
+
+    @unittest.skipIf(json_provider.orjson is None, 'orjson not installed')
+    def test_auto_prefers_orjson(self):
+        """Test that orjson is used when installed."""
+        self.assertIsInstance(init_json(create_json_app()), OrjsonProvider)
+
+    def test_stdlib_fallback(self):
+        """Test that the stdlib provider is used without orjson."""
+        with patch.object(json_provider, 'orjson', None):
+            provider = init_json(create_json_app())
+        self.assertIs(type(provider), IsoJSONProvider)
+
+    def test_explicit_stdlib(self):
+        """Test that JSON_PROVIDER can force the stdlib provider."""
+        provider = init_json(create_json_app(JSON_PROVIDER='stdlib'))
+        self.assertIs(type(provider), IsoJSONProvider)
+
+    def test_orjson_required_but_missing(self):
+        """Test that asking for orjson without it installed fails loudly."""
+        with patch.object(json_provider, 'orjson', None):
+            with self.assertRaises(RuntimeError):
+                init_json(create_json_app(JSON_PROVIDER='orjson'))
+
+
+class TestAPIDates(unittest.TestCase):
+    """Test that API responses keep ISO 8601 timestamps."""
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        self.user = create_test_user()
+        self.ticket = create_test_ticket(user_id=self.user.id)
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_ticket_timestamps(self):
+        """Test that ticket timestamps serialize exactly as isoformat()."""
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = self.user.id
+        data = self.client.get(f'/api/tickets/{self.ticket.id}').get_json()
+        self.assertEqual(data['created_at'], self.ticket.created_at.isoformat())
+        self.assertEqual(data['updated_at'], self.ticket.updated_at.isoformat())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,14 @@
 Unit tests for the main application module.
 """
 import unittest
-from models import db
-from _test.conftest import create_test_app, create_test_user
+from unittest.mock import patch
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from datetime import datetime, timedelta
+from models import db, TicketCounter, TicketTombstone
+from main import create_app
+from compression import compress_response
+from _test.conftest import create_test_app, create_test_user, create_test_ticket, QueryCounter, TestConfig
 
 
 class TestMainApp(unittest.TestCase):
@@ -139,6 +145,143 @@ class TestMainApp(unittest.TestCase):
         self.assertFalse(self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'])
 
 
+class TestAppFactory(unittest.TestCase):
+    """Test cases for the application factory and db-init command."""
+    
+    def test_create_app_does_not_touch_database(self):
+        """Test that building the app runs no SQL and creates no tables."""
+        with QueryCounter(Engine) as counter:
+            app = create_app(TestConfig)
+        self.assertEqual(counter.count, 0)
+        
+        with app.app_context():
+            self.assertEqual(inspect(db.engine).get_table_names(), [])
+    
+    def test_create_app_registers_routes(self):
+        """Test that the factory registers page and API routes."""
+        app = create_app(TestConfig)
+        rules = {rule.rule for rule in app.url_map.iter_rules()}
+        for rule in ('/', '/dashboard', '/admin', '/health', '/api/tickets/'):
+            self.assertIn(rule, rules)
+    
+    def test_create_app_registers_compression(self):
+        """Test that responses pass through the compression hook."""
+        app = create_app(TestConfig)
+        self.assertIn(compress_response, app.after_request_funcs[None])
+    
+    def test_db_init_command(self):
+        """Test that flask db-init creates the tables."""
+        app = create_app(TestConfig)
+        result = app.test_cli_runner().invoke(args=['db-init'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Database initialized', result.output)
+        
+        with app.app_context():
+            tables = inspect(db.engine).get_table_names()
+            self.assertIn('users', tables)
+            self.assertIn('tickets', tables)
+            db.drop_all()
+
+    def test_db_init_prepares_ticket_event_partitions(self):
+        """Test that every db-init creates the coming ticket_events partitions."""
+        app = create_app(TestConfig)
+        app.config.update(TICKET_EVENTS_PARTITIONS_AHEAD=4, TICKET_EVENTS_RETENTION_DAYS=30)
+        with patch('main.prepare_ticket_event_partitions') as prepare:
+            result = app.test_cli_runner().invoke(args=['db-init'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        (cutoff,), kwargs = prepare.call_args
+        self.assertEqual(kwargs, {'months_ahead': 4})
+        self.assertAlmostEqual((datetime.utcnow() - cutoff).total_seconds(), 30 * 86400, delta=60)
+        with app.app_context():
+            db.drop_all()
+
+    def test_db_init_upgrades_existing_tables(self):
+        """Test that db-init upgrades users and tickets tables created by an older version."""
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.create_all()
+            user_id = create_test_user().id
+            ticket_id = create_test_ticket(title='VPN keeps dropping', user_id=user_id).id
+            # Roll back to tables without the search index or newer columns and indexes
+            db.session.execute(text('DROP TABLE tickets_fts'))
+            for trigger in ('insert', 'delete', 'update'):
+                db.session.execute(text(f'DROP TRIGGER tickets_fts_{trigger}'))
+            db.session.execute(text('DROP INDEX idx_tickets_updated_at'))
+            db.session.execute(text('DROP INDEX ix_users_updated_at'))
+            db.session.execute(text('ALTER TABLE users DROP COLUMN updated_at'))
+            # The old setup SQL's definitions, without the id tiebreak
+            for side in ('user_id', 'assigned_to'):
+                name = 'idx_tickets_user_created' if side == 'user_id' else 'idx_tickets_assigned_created'
+                db.session.execute(text(f'DROP INDEX {name}'))
+                db.session.execute(text(f'CREATE INDEX {name} ON tickets({side}, created_at DESC)'))
+            db.session.commit()
+            db.session.remove()
+
+        result = app.test_cli_runner().invoke(args=['db-init'])
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        with app.app_context():
+            inspector = inspect(db.engine)
+            self.assertIn('idx_tickets_updated_at', [index['name'] for index in inspector.get_indexes('tickets')])
+            self.assertIn('updated_at', [column['name'] for column in inspector.get_columns('users')])
+            self.assertIn('ix_users_updated_at', [index['name'] for index in inspector.get_indexes('users')])
+            indexes = {index['name']: index['column_names'] for index in inspector.get_indexes('tickets')}
+            self.assertEqual(indexes['idx_tickets_user_created'], ['user_id', 'created_at', 'id'])
+            self.assertEqual(indexes['idx_tickets_assigned_created'], ['assigned_to', 'created_at', 'id'])
+            search = text("SELECT rowid FROM tickets_fts WHERE tickets_fts MATCH 'vpn'")
+            self.assertEqual(db.session.execute(search).scalars().all(), [ticket_id])
+
+            # The triggers are back too, so new tickets are indexed
+            newer = create_test_ticket(title='VPN certificate expired', user_id=user_id)
+            self.assertEqual(sorted(db.session.execute(search).scalars()), [ticket_id, newer.id])
+
+            # Running it again is harmless
+            result = app.test_cli_runner().invoke(args=['db-init'])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertEqual(len(db.session.execute(search).scalars().all()), 2)
+            db.session.remove()
+            db.drop_all()
+
+    def test_counters_rebuild_command(self):
+        """Test that flask counters-rebuild recounts ticket_counters."""
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.create_all()
+            user = create_test_user()
+            create_test_ticket(user_id=user.id)
+            db.session.execute(TicketCounter.__table__.delete())
+            db.session.commit()
+            
+            result = app.test_cli_runner().invoke(args=['counters-rebuild'])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn('Ticket counters rebuilt', result.output)
+            self.assertEqual(
+                [(row.user_id, row.assigned_to, row.status, row.ticket_count) for row in TicketCounter.query],
+                [(user.id, 0, 'open', 1)]
+            )
+            db.session.remove()
+            db.drop_all()
+
+    def test_tombstones_purge_command(self):
+        """Test that flask tombstones-purge drops tombstones past the retention period."""
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.create_all()
+            user = create_test_user()
+            for ticket in (create_test_ticket(user_id=user.id), create_test_ticket(user_id=user.id)):
+                db.session.delete(ticket)
+            db.session.commit()
+            TicketTombstone.query.filter_by(ticket_id=1).update({'removed_at': datetime.utcnow() - timedelta(days=8)})
+            db.session.commit()
+            
+            result = app.test_cli_runner().invoke(args=['tombstones-purge'])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn('Purged 1 ticket tombstones', result.output)
+            self.assertEqual([row.ticket_id for row in TicketTombstone.query], [2])
+            db.session.remove()
+            db.drop_all()
+
+
 class TestAppErrorHandling(unittest.TestCase):
     """Test error handling in the main application."""
     
@@ -0,0 +1,166 @@
+"""
+Unit tests for the password hashing module.
+"""
+import threading
+import unittest
+from unittest.mock import patch
+from flask import Flask
+import passwords
+from passwords import PasswordHashingBusy, hash_password, check_password, needs_rehash, verify_password
+from models import db, User
+from _test.conftest import create_test_app, create_test_user
+
+
+def create_password_app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    return app
+
+
+class TestPasswordHashing(unittest.TestCase):
+    """Test cases for configurable hashing and rehash detection."""
+
+    def test_hash_uses_configured_method(self):
+        """Test that hashes carry the configured method and verify."""
+        for method in ('pbkdf2:sha256:1000', 'scrypt:1024:8:1'):
+            with create_password_app(PASSWORD_HASH_METHOD=method).app_context():
+                password_hash = hash_password('secret')
+                self.assertTrue(password_hash.startswith(method + '$'))
+                self.assertTrue(check_password(password_hash, 'secret'))
+                self.assertFalse(check_password(password_hash, 'wrong'))
+                self.assertFalse(needs_rehash(password_hash))
+
+    def test_needs_rehash_when_settings_change(self):
+        """Test that hashes made with another algorithm or cost need a rehash."""
+        with create_password_app(PASSWORD_HASH_METHOD='pbkdf2:sha256:1000').app_context():
+            old_hash = hash_password('secret')
+        with create_password_app(PASSWORD_HASH_METHOD='pbkdf2:sha256:2000').app_context():
+            self.assertTrue(needs_rehash(old_hash))
+            self.assertTrue(check_password(old_hash, 'secret'))
+        with create_password_app(PASSWORD_HASH_METHOD='scrypt:1024:8:1').app_context():
+            self.assertTrue(needs_rehash(old_hash))
+
+    def test_short_method_names_use_werkzeug_defaults(self):
+        """Test that 'scrypt' matches hashes made with werkzeug's default scrypt parameters."""
+        with create_password_app(PASSWORD_HASH_METHOD='scrypt').app_context():
+            self.assertFalse(needs_rehash('scrypt:32768:8:1$salt$hash'))
+            self.assertTrue(needs_rehash('scrypt:16384:8:1$salt$hash'))
+
+    def test_default_matches_existing_hashes(self):
+        """Test that hashes seeded with werkzeug's pbkdf2 default are not rehashed."""
+        self.assertFalse(needs_rehash('pbkdf2:sha256:600000$salt$hash'))
+
+    @unittest.skipIf(passwords.argon2 is None, "argon2-cffi not installed")
+    def test_argon2(self):
+        """Test argon2 hashing and cost changes."""
+        with create_password_app(PASSWORD_HASH_METHOD='argon2:1:8192:1').app_context():
+            password_hash = hash_password('secret')
+            self.assertTrue(password_hash.startswith('$argon2'))
+            self.assertTrue(check_password(password_hash, 'secret'))
+            self.assertFalse(check_password(password_hash, 'wrong'))
+            self.assertFalse(needs_rehash(password_hash))
+        with create_password_app(PASSWORD_HASH_METHOD='argon2:2:8192:1').app_context():
+            self.assertTrue(needs_rehash(password_hash))
+
+    @unittest.skipIf(passwords.argon2 is not None, "argon2-cffi installed")
+    def test_argon2_not_installed(self):
+        """Test that configuring argon2 without argon2-cffi fails loudly."""
+        with create_password_app(PASSWORD_HASH_METHOD='argon2').app_context():
+            with self.assertRaises(RuntimeError):
+                hash_password('secret')
+
+
+class TestVerificationPool(unittest.TestCase):
+    """Test cases for verification on the bounded thread pool."""
+
+    def setUp(self):
+        self.app = create_password_app(PASSWORD_HASH_METHOD='pbkdf2:sha256:1000',
+                                       PASSWORD_VERIFY_WORKERS=1, PASSWORD_VERIFY_TIMEOUT=0.05)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        # Each test builds its own pool from its config
+        patcher = patch.multiple(passwords, _executor=None, _slots=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.password_hash = hash_password('secret')
+
+    def tearDown(self):
+        if passwords._executor is not None:
+            passwords._executor.shutdown()
+        self.app_context.pop()
+
+    def test_verify_runs_on_pool(self):
+        """Test that verification happens on a pool thread, not the request thread."""
+        threads = []
+        original = passwords.check_password
+
+        def record(*args):
+            threads.append(threading.current_thread().name)
+            return original(*args)
+
+        with patch.object(passwords, 'check_password', record):
+            self.assertTrue(verify_password(self.password_hash, 'secret'))
+            self.assertFalse(verify_password(self.password_hash, 'wrong'))
+        self.assertTrue(all(name.startswith('password-verify') for name in threads))
+
+    def test_busy_when_slots_exhausted(self):
+        """Test that callers give up once every slot is taken for the timeout."""
+        _, slots = passwords._get_executor()
+        # One worker: one running and one queued verification fill the slots
+        slots.acquire()
+        slots.acquire()
+        try:
+            with self.assertRaises(PasswordHashingBusy):
+                verify_password(self.password_hash, 'secret')
+        finally:
+            slots.release()
+            slots.release()
+        self.assertTrue(verify_password(self.password_hash, 'secret'))
+
+
+class TestLoginRehash(unittest.TestCase):
+    """Test cases for upgrading stored hashes at login."""
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        self.user = create_test_user()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _login(self, password='testpass123'):
+        return self.client.post('/api/auth/login', json={'username': 'testuser', 'password': password})
+
+    def test_login_rehashes_after_settings_change(self):
+        """Test that a successful login stores a hash made with the new settings."""
+        old_hash = self.user.password_hash
+        self.app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+
+        self.assertEqual(self._login('wrongpassword').status_code, 401)
+        self.assertEqual(db.session.get(User, self.user.id).password_hash, old_hash)
+
+        self.assertEqual(self._login().status_code, 200)
+        db.session.expire_all()
+        new_hash = db.session.get(User, self.user.id).password_hash
+        self.assertTrue(new_hash.startswith('pbkdf2:sha256:2000$'))
+        self.assertEqual(self._login().status_code, 200)
+
+    def test_login_keeps_current_hash(self):
+        """Test that hashes made with the current settings are left alone."""
+        old_hash = self.user.password_hash
+        self.assertEqual(self._login().status_code, 200)
+        db.session.expire_all()
+        self.assertEqual(db.session.get(User, self.user.id).password_hash, old_hash)
+
+    def test_login_busy(self):
+        """Test that a saturated verification pool answers 503 with Retry-After."""
+        with patch('auth.auth_routes.verify_password', side_effect=PasswordHashingBusy()):
+            response = self._login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
@@ -0,0 +1,64 @@
+"""
+Query plan regression tests: route queries stay on indexes as tickets grow.
+
+Runs benchmarks/query_plans.py against a seeded SQLite database.
+"""
+import unittest
+from models import db
+from benchmarks.query_plans import (
+    ROUTES, build_app, run_routes, table_rows, declared_indexes, full_scans, unused_indexes, explain
+)
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Test cases for the plans of every route in the query plan harness."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = build_app('sqlite:///:memory:', users=100, tickets=5000)
+        cls.rows = table_rows(cls.app)
+        cls.indexes = declared_indexes(cls.app)
+        cls.planned = run_routes(cls.app)
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _statements(self, path, fragment):
+        return [statement for statement in self.planned
+                if statement.route.path == path and fragment in statement.statement]
+
+    def test_every_route_is_planned(self):
+        """Test that each route ran and had its statements explained."""
+        planned = [statement.route for statement in self.planned]
+        self.assertEqual([route for route in ROUTES if route not in planned], [])
+
+    def test_selective_routes_do_not_scan_tables(self):
+        """Test that no per-user, per-ticket or search query reads a whole large table."""
+        scans = full_scans(self.planned, self.rows, min_rows=1000, selective_only=True)
+        self.assertEqual([(statement.route.path, table, statement.plan) for statement, table in scans], [])
+
+    def test_personal_list_pages_each_side_on_its_index(self):
+        """Test that the user's list is a UNION of two index reads, not an OR over tickets."""
+        (page,) = self._statements('/api/tickets/', 'ORDER BY')
+        self.assertIn('UNION', page.statement)
+        self.assertEqual({scan.index for scan in page.scans if scan.table == 'tickets'} - {None},
+                         {'idx_tickets_user_created', 'idx_tickets_assigned_created'})
+
+    def test_ticket_indexes_are_used(self):
+        """Test that every index declared on tickets serves some route."""
+        self.assertEqual([index for table, index in unused_indexes(self.planned, self.indexes)
+                          if table == 'tickets'], [])
+
+    def test_full_scans_are_detected(self):
+        """Test that a filter on an unindexed column is reported as a full scan."""
+        with self.app.app_context(), db.engine.connect() as connection:
+            plan, scans = explain(connection, 'SELECT id FROM tickets WHERE title = ?', ('VPN',))
+        self.assertIn('SCAN tickets', plan)
+        self.assertEqual([(scan.table, scan.full) for scan in scans], [('tickets', True)])
+
+
+if __name__ == '__main__':
+    unittest.main()
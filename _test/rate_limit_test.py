@@ -0,0 +1,234 @@
+"""
+Unit tests for login rate limiting and the local key-value store.
+"""
+import unittest
+from unittest.mock import patch
+from models import db
+from kvstore import LocalKVStore
+from passwords import PasswordHashingBusy
+from auth.rate_limit import (
+    LoginRateLimiter, RateLimitBackend, MemoryRateLimitBackend, KVRateLimitBackend, init_rate_limit, client_ip
+)
+from _test.conftest import create_test_app, create_test_user
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestLocalKVStore(unittest.TestCase):
+    """Test cases for the in-process KVStore."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = LocalKVStore(clock=self.clock)
+
+    def test_compare_and_set(self):
+        """Test that writes only succeed against the version that was read."""
+        self.assertEqual(self.store.get('k'), (None, None))
+        self.assertTrue(self.store.compare_and_set('k', 'a', None, 10))
+        self.assertFalse(self.store.compare_and_set('k', 'b', None, 10))
+
+        value, version = self.store.get('k')
+        self.assertEqual(value, 'a')
+        self.store.set('k', 'c', 10)
+        self.assertFalse(self.store.compare_and_set('k', 'd', version, 10))
+        self.assertEqual(self.store.get('k')[0], 'c')
+
+    def test_expiry(self):
+        """Test that keys vanish after their TTL."""
+        self.store.set('k', 'a', 10)
+        self.store.set('other', 'b', 100)
+        self.clock.now += 10
+        self.assertEqual(self.store.get('k'), (None, None))
+        self.assertTrue(self.store.compare_and_set('k', 'again', None, 10))
+        self.clock.now += 10
+        self.assertEqual(self.store.purge_expired(), 1)
+        self.assertEqual(self.store.get('other')[0], 'b')
+
+
+class TestTokenBuckets(unittest.TestCase):
+    """Test cases shared by the memory and key-value backends."""
+
+    def _backends(self):
+        clock = FakeClock()
+        return clock, [MemoryRateLimitBackend(clock=clock), KVRateLimitBackend(LocalKVStore(clock=clock), clock=clock)]
+
+    def test_burst_then_refill(self):
+        """Test that a full bucket allows a burst, then refills continuously."""
+        clock, backends = self._backends()
+        for backend in backends:
+            with self.subTest(backend=type(backend).__name__):
+                for _ in range(5):
+                    self.assertEqual(backend.consume('k', 5, 50), 0)
+                # One token per 10 seconds
+                self.assertAlmostEqual(backend.consume('k', 5, 50), 10)
+                clock.now += 4
+                self.assertAlmostEqual(backend.consume('k', 5, 50), 6)
+                clock.now += 6
+                self.assertEqual(backend.consume('k', 5, 50), 0)
+                self.assertGreater(backend.consume('k', 5, 50), 0)
+                self.assertEqual(backend.consume('other', 5, 50), 0)
+
+                backend.reset('k')
+                self.assertEqual(backend.consume('k', 5, 50), 0)
+                clock.now += 1000
+
+    def test_memory_backend_is_bounded(self):
+        """Test that the least recently used buckets are dropped beyond max_keys."""
+        backend = MemoryRateLimitBackend(max_keys=2, clock=FakeClock())
+        for key in ('a', 'b', 'a', 'c'):
+            backend.consume(key, 5, 50)
+        self.assertEqual(list(backend._buckets), ['a', 'c'])
+
+    def test_kv_backend_retries_on_conflict(self):
+        """Test that a lost compare-and-set is retried on the fresh value."""
+        clock = FakeClock()
+        store = LocalKVStore(clock=clock)
+        backend = KVRateLimitBackend(store, clock=clock)
+        original = store.compare_and_set
+        calls = []
+
+        def interfere(key, value, version, ttl):
+            if not calls:
+                # Another worker takes a token between our read and write
+                store.set(key, (0.5, clock()), ttl)
+            calls.append(key)
+            return original(key, value, version, ttl)
+
+        with patch.object(store, 'compare_and_set', interfere):
+            self.assertAlmostEqual(backend.consume('k', 5, 50), 5)
+        self.assertEqual(len(calls), 2)
+
+    def test_limiter_checks_ip_before_username(self):
+        """Test that only failed logins spend username tokens."""
+        limiter = LoginRateLimiter(MemoryRateLimitBackend(clock=FakeClock()),
+                                   ip_limit=1, ip_period=60, username_limit=2, username_period=60)
+        for ip in ('1.1.1.1', '2.2.2.2', '3.3.3.3'):
+            self.assertEqual(limiter.check(ip, 'alice'), 0)
+        self.assertGreater(limiter.check('1.1.1.1', 'alice'), 0)
+        limiter.login_failed('Alice')
+        self.assertEqual(limiter.check('4.4.4.4', 'alice'), 0)
+        limiter.login_failed(' ALICE')
+        self.assertAlmostEqual(limiter.check('5.5.5.5', 'alice'), 30)
+        limiter.login_succeeded('alice')
+        self.assertEqual(limiter.check('6.6.6.6', 'alice'), 0)
+
+    def test_backend_is_abstract(self):
+        """Test that a backend missing an operation cannot be built."""
+        class ConsumeOnly(RateLimitBackend):
+            def consume(self, key, capacity, period):
+                return 0
+
+        with self.assertRaises(TypeError):
+            ConsumeOnly()
+
+
+class TestLoginRateLimit(unittest.TestCase):
+    """Test cases for rate limiting on the login route."""
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app.config.update(LOGIN_IP_LIMIT=4, LOGIN_IP_PERIOD=60,
+                               LOGIN_USERNAME_LIMIT=2, LOGIN_USERNAME_PERIOD=60)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        self.user = create_test_user()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _login(self, password='wrongpassword', username='testuser', ip='10.0.0.1'):
+        return self.client.post('/api/auth/login', json={'username': username, 'password': password},
+                                environ_base={'REMOTE_ADDR': ip})
+
+    def test_username_limit(self):
+        """Test that repeated failures for one username get 429 with Retry-After."""
+        self.assertEqual(self._login().status_code, 401)
+        self.assertEqual(self._login(ip='10.0.0.2').status_code, 401)
+        response = self._login(password='testpass123', ip='10.0.0.3')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '30')
+
+    def test_ip_limit(self):
+        """Test that one address spraying usernames is stopped."""
+        for i in range(4):
+            self.assertEqual(self._login(username=f'user{i}').status_code, 401)
+        response = self._login(username='someone-else')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '15')
+        self.assertEqual(self._login(ip='10.0.0.9').status_code, 401)
+
+    def test_rejected_before_database_and_hashing(self):
+        """Test that throttled attempts run no SQL and no password check."""
+        self._login()
+        self._login()
+        with patch('auth.auth_routes.verify_password') as verify, \
+                patch('auth.auth_routes.User') as user_model:
+            self.assertEqual(self._login().status_code, 429)
+        verify.assert_not_called()
+        user_model.query.filter_by.assert_not_called()
+
+    def test_success_refills_username_bucket(self):
+        """Test that a successful login forgives earlier typos."""
+        self.assertEqual(self._login().status_code, 401)
+        self.assertEqual(self._login(password='testpass123').status_code, 200)
+        self.assertEqual(self._login(ip='10.0.0.2').status_code, 401)
+        self.assertEqual(self._login(ip='10.0.0.3').status_code, 401)
+
+    def test_forwarded_for_with_trusted_proxy(self):
+        """Test that the client address is taken from X-Forwarded-For behind a proxy."""
+        self.app.config['RATELIMIT_PROXY_COUNT'] = 1
+        for i in range(4):
+            response = self.client.post('/api/auth/login', json={'username': f'user{i}', 'password': 'x'},
+                                        headers={'X-Forwarded-For': f'spoofed{i}, 203.0.113.7'})
+            self.assertEqual(response.status_code, 401)
+        response = self.client.post('/api/auth/login', json={'username': 'next', 'password': 'x'},
+                                    headers={'X-Forwarded-For': '203.0.113.7'})
+        self.assertEqual(response.status_code, 429)
+
+    def test_forwarded_for_port_is_stripped(self):
+        """Test that the port Azure appends to X-Forwarded-For is not part of the address."""
+        self.app.config['RATELIMIT_PROXY_COUNT'] = 1
+        for i, hop in enumerate(('203.0.113.7:5678', '203.0.113.7:5679', '203.0.113.7', '203.0.113.7:80')):
+            response = self.client.post('/api/auth/login', json={'username': f'user{i}', 'password': 'x'},
+                                        headers={'X-Forwarded-For': hop})
+            self.assertEqual(response.status_code, 401)
+        response = self.client.post('/api/auth/login', json={'username': 'next', 'password': 'x'},
+                                    headers={'X-Forwarded-For': '203.0.113.7:9999'})
+        self.assertEqual(response.status_code, 429)
+        with self.app.test_request_context(headers={'X-Forwarded-For': '1.2.3.4:5678'}):
+            self.assertEqual(client_ip(), '1.2.3.4')
+        for hop, address in (('[2001:db8::1]:443', '2001:db8::1'), ('[2001:db8::1]', '2001:db8::1'),
+                             ('2001:db8::1', '2001:db8::1')):
+            with self.app.test_request_context(headers={'X-Forwarded-For': f'spoofed, {hop}'}):
+                self.assertEqual(client_ip(), address)
+
+    def test_only_failed_logins_spend_username_tokens(self):
+        """Test that attempts that never fail a password check do not lock the account."""
+        with patch('auth.auth_routes.verify_password', side_effect=PasswordHashingBusy):
+            for i in range(3):
+                self.assertEqual(self._login(ip=f'10.0.1.{i}').status_code, 503)
+        self.assertEqual(self._login().status_code, 401)
+        self.assertEqual(self._login(password='testpass123').status_code, 200)
+
+    def test_shared_backend(self):
+        """Test the login route over the key-value backend."""
+        init_rate_limit(self.app, KVRateLimitBackend(LocalKVStore()))
+        self._login()
+        self._login()
+        self.assertEqual(self._login().status_code, 429)
+
+    def test_disabled(self):
+        """Test that RATELIMIT_ENABLED=False turns limiting off."""
+        self.app.config['RATELIMIT_ENABLED'] = False
+        for _ in range(5):
+            self.assertEqual(self._login().status_code, 401)
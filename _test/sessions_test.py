@@ -0,0 +1,195 @@
+"""
+Unit tests for server-side sessions.
+"""
+import hashlib
+import unittest
+from unittest.mock import patch
+from models import db, UserSession
+from kvstore import LocalKVStore
+from main import create_app
+from sessions import KVSessionBackend, SQLSessionBackend, init_sessions
+from _test.conftest import create_test_app, create_test_user, TestConfig
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class SessionStoreTests:
+    """Test cases run against each backend; subclasses provide make_backend()."""
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app.config.update(PERMANENT_SESSION_LIFETIME=3600, SESSION_TOUCH_INTERVAL=60)
+        self.clock = FakeClock()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.backend = self.make_backend()
+        self.interface = init_sessions(self.app, self.backend)
+        self.interface._clock = self.clock
+        self.user = create_test_user()
+        self.admin = create_test_user(username='admin', email='admin@example.com', is_admin=True)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _login(self, client, username='testuser', password='testpass123'):
+        response = client.post('/api/auth/login', json={'username': username, 'password': password})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def _sid(self, client):
+        cookie = client.get_cookie(self.app.config['SESSION_COOKIE_NAME'])
+        return cookie.value if cookie else None
+
+    def test_cookie_holds_only_the_id(self):
+        """Test that session data is stored server-side and the cookie carries an opaque id."""
+        self._login(self.client)
+        sid = self._sid(self.client)
+        self.assertLessEqual(len(sid), 64)
+        payload, user_id, _ = self.backend.load(sid)
+        self.assertEqual(user_id, self.user.id)
+        self.assertIn('testuser', payload)
+        self.assertEqual(self.client.get('/api/tickets/stats').status_code, 200)
+
+    def test_unmodified_requests_do_not_write(self):
+        """Test that reading the session writes nothing back until the touch interval passes."""
+        self._login(self.client)
+        with patch.object(self.backend, 'save', wraps=self.backend.save) as save, \
+                patch.object(self.backend, 'touch', wraps=self.backend.touch) as touch:
+            for _ in range(3):
+                response = self.client.get('/api/tickets/stats')
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('Set-Cookie', response.headers)
+            save.assert_not_called()
+            touch.assert_not_called()
+
+            self.clock.now += 61
+            self.assertEqual(self.client.get('/api/tickets/stats').status_code, 200)
+            save.assert_not_called()
+            touch.assert_called_once()
+
+    def test_sliding_expiry(self):
+        """Test that sessions expire a lifetime after their last use, not after login."""
+        self._login(self.client)
+        sid = self._sid(self.client)
+        for _ in range(3):
+            self.clock.now += 3000
+            self.assertEqual(self.client.get('/api/tickets/stats').status_code, 200)
+        self.clock.now += 3601
+        self.assertEqual(self.client.get('/api/tickets/stats').status_code, 401)
+
+    def test_login_issues_a_new_id(self):
+        """Test that an anonymous session id is replaced at login (no fixation)."""
+        with self.client.session_transaction() as sess:
+            sess['visited'] = True
+        anonymous = self._sid(self.client)
+        self.assertIsNotNone(self.backend.load(anonymous))
+        self._login(self.client)
+        self.assertNotEqual(self._sid(self.client), anonymous)
+        self.assertIsNone(self.backend.load(anonymous))
+
+    def test_logout_deletes_the_session(self):
+        """Test that logging out removes the stored session."""
+        self._login(self.client)
+        sid = self._sid(self.client)
+        self.client.post('/api/auth/logout', json={})
+        self.assertIsNone(self.backend.load(sid))
+        self.assertIsNone(self._sid(self.client))
+
+    def test_admin_revokes_all_sessions(self):
+        """Test that one admin call logs a user out everywhere."""
+        devices = [self.app.test_client() for _ in range(2)]
+        for device in devices:
+            self._login(device)
+        admin = self.app.test_client()
+        self._login(admin, 'admin')
+
+        response = admin.delete(f'/api/admin/users/{self.user.id}/sessions')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'user_id': self.user.id, 'revoked': 2})
+        for device in devices:
+            self.assertEqual(device.get('/api/tickets/stats').status_code, 401)
+        self.assertEqual(admin.get('/api/tickets/stats').status_code, 200)
+
+    def test_revoke_requires_admin(self):
+        """Test that users cannot revoke sessions."""
+        self._login(self.client)
+        response = self.client.delete(f'/api/admin/users/{self.admin.id}/sessions')
+        self.assertEqual(response.status_code, 403)
+
+
+class TestSQLSessions(SessionStoreTests, unittest.TestCase):
+    """Server-side sessions in the user_sessions table."""
+
+    def make_backend(self):
+        return SQLSessionBackend(clock=self.clock)
+
+    def test_purge_expired(self):
+        """Test that expired rows are purged."""
+        self._login(self.client)
+        self._login(self.app.test_client(), 'admin')
+        self.clock.now += 1800
+        self.assertEqual(self.backend.purge_expired(), 0)
+        self.clock.now += 1801
+        self.assertEqual(self.backend.purge_expired(), 2)
+        self.assertEqual(UserSession.query.count(), 0)
+
+    def test_table_stores_only_a_digest_of_the_id(self):
+        """Test that a row's key is the SHA-256 of the cookie's id, not the id itself."""
+        self._login(self.client)
+        sid = self._sid(self.client)
+        self.assertEqual([row.sid for row in UserSession.query],
+                         [hashlib.sha256(sid.encode()).hexdigest()])
+        # The stored key is not itself a usable session id
+        self.client.set_cookie(self.app.config['SESSION_COOKIE_NAME'], UserSession.query.one().sid)
+        self.assertEqual(self.client.get('/api/tickets/stats').status_code, 401)
+
+
+class TestKVSessions(SessionStoreTests, unittest.TestCase):
+    """Server-side sessions in the local KVStore stand-in."""
+
+    def make_backend(self):
+        return KVSessionBackend(LocalKVStore(clock=self.clock), clock=self.clock)
+
+
+class TestSessionConfig(unittest.TestCase):
+    """Test cases for selecting the session store."""
+
+    def test_cookie_sessions_by_default(self):
+        """Test that SESSION_STORE=cookie keeps Flask's cookie sessions."""
+        app = create_app(TestConfig)
+        self.assertNotIn('session_store', app.extensions)
+        with app.app_context():
+            db.create_all()
+            admin = create_test_user(username='admin', email='admin@example.com', is_admin=True)
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess['user_id'] = admin.id
+            response = client.delete(f'/api/admin/users/{admin.id}/sessions')
+            self.assertEqual(response.status_code, 404)
+            db.session.remove()
+            db.drop_all()
+
+    def test_sql_store_and_purge_command(self):
+        """Test that SESSION_STORE=sql installs the store and sessions-purge runs."""
+        class SQLSessionConfig(TestConfig):
+            SESSION_STORE = 'sql'
+
+        app = create_app(SQLSessionConfig)
+        self.assertIsInstance(app.extensions['session_store'].backend, SQLSessionBackend)
+        with app.app_context():
+            db.create_all()
+            result = app.test_cli_runner().invoke(args=['sessions-purge'])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn('Purged 0 expired sessions', result.output)
+            db.session.remove()
+            db.drop_all()
@@ -72,6 +72,16 @@ def print_test_info():
     print("  - tickets_routes_test.py : Test ticket management routes")
     print("  - users_routes_test.py   : Test user management routes")
     print("  - main_test.py           : Test main application functionality")
+    print("  - health_routes_test.py  : Test liveness and readiness probes")
+    print("  - pool_metrics_test.py   : Test connection pool settings and metrics")
+    print("  - compression_test.py    : Test response compression")
+    print("  - json_provider_test.py  : Test the JSON provider")
+    print("  - passwords_test.py      : Test password hashing")
+    print("  - rate_limit_test.py     : Test login rate limiting")
+    print("  - sessions_test.py       : Test server-side sessions")
+    print("  - ticket_stream_test.py  : Test the ticket change stream")
+    print("  - ticket_history_test.py : Test ticket history")
+    print("  - query_plans_test.py    : Test route query plans")
     print("  - integration_test.py    : Test end-to-end workflows")
     print()
     print("Usage examples:")
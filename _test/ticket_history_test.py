@@ -0,0 +1,174 @@
+"""
+Unit tests for the ticket_events history log and /api/tickets/<id>/history.
+"""
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+from models import db, Ticket, TicketAuditEvent, UserSession, ticket_event_partitions
+from main import create_app
+from ticket_history import maintain_ticket_events
+from _test.conftest import create_test_app, create_test_user, create_test_ticket, QueryCounter, TestConfig
+
+
+class TestTicketHistory(unittest.TestCase):
+    """Test cases for recording and reading ticket history."""
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        self.user = create_test_user()
+        self.other = create_test_user(username='other', email='other@example.com')
+        self.admin = create_test_user(username='admin', email='admin@example.com', is_admin=True)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _login(self, user):
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = user.id
+
+    def _events(self, ticket_id):
+        return [(event.action, event.actor_id, event.changes) for event in
+                TicketAuditEvent.query.filter_by(ticket_id=ticket_id).order_by(TicketAuditEvent.id)]
+
+    def test_mutations_record_who_changed_what(self):
+        """Test that create, update, assign and delete each record their changes."""
+        self._login(self.user)
+        ticket_id = self.client.post('/api/tickets/', json={'title': 'VPN', 'description': 'Down'}).get_json()['id']
+        self.client.put(f'/api/tickets/{ticket_id}', json={'priority': 'high'})
+        self.client.put(f'/api/tickets/{ticket_id}', json={'priority': 'high'})
+        self._login(self.admin)
+        self.client.put(f'/api/tickets/admin/assign/{ticket_id}', json={'assigned_to': self.admin.id})
+        self.client.put(f'/api/tickets/{ticket_id}', json={'status': 'closed'})
+        self.client.delete(f'/api/tickets/{ticket_id}')
+
+        self.assertEqual(self._events(ticket_id), [
+            ('created', self.user.id, {'title': [None, 'VPN'], 'description': [None, 'Down'],
+                                       'status': [None, 'open'], 'priority': [None, 'medium']}),
+            ('updated', self.user.id, {'priority': ['medium', 'high']}),
+            ('assigned', self.admin.id, {'assigned_to': [None, self.admin.id]}),
+            ('updated', self.admin.id, {'status': ['open', 'closed']}),
+            ('deleted', self.admin.id, {'title': ['VPN', None], 'description': ['Down', None],
+                                        'status': ['closed', None], 'priority': ['high', None],
+                                        'assigned_to': [self.admin.id, None]}),
+        ])
+
+    def test_bulk_changes_insert_events_in_one_statement(self):
+        """Test that a bulk change writes one event per changed ticket in a single INSERT."""
+        tickets = [create_test_ticket(title=f'T{i}', user_id=self.user.id, priority='low') for i in range(4)]
+        tickets[0].priority = 'urgent'
+        db.session.commit()
+        self._login(self.admin)
+        with QueryCounter(db.engine) as counter:
+            response = self.client.post('/api/tickets/admin/bulk', json={
+                'ticket_ids': [ticket.id for ticket in tickets], 'operation': 'priority', 'priority': 'urgent'
+            })
+        self.assertEqual(response.status_code, 200)
+        inserts = [s for s in counter.statements if s.startswith('INSERT INTO ticket_events')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(self._events(tickets[0].id), [])
+        for ticket in tickets[1:]:
+            self.assertEqual(self._events(ticket.id), [('updated', self.admin.id, {'priority': ['low', 'urgent']})])
+
+    def test_deleting_a_user_records_their_tickets(self):
+        """Test that tickets deleted or unassigned with their user are recorded."""
+        own = create_test_ticket(user_id=self.admin.id)
+        assigned = create_test_ticket(user_id=self.user.id, assigned_to=self.admin.id)
+        self._login(self.admin)
+        self.assertEqual(self.client.delete(f'/api/users/{self.admin.id}').status_code, 200)
+        self.assertEqual(self._events(own.id)[0][0], 'deleted')
+        self.assertEqual(self._events(assigned.id), [('assigned', self.admin.id, {'assigned_to': [self.admin.id, None]})])
+
+    def test_history_endpoint(self):
+        """Test that history is returned newest first with actor names, page by page."""
+        self._login(self.user)
+        ticket_id = self.client.post('/api/tickets/', json={'title': 'A', 'description': ''}).get_json()['id']
+        for priority in ('low', 'high', 'urgent'):
+            self.client.put(f'/api/tickets/{ticket_id}', json={'priority': priority})
+
+        response = self.client.get(f'/api/tickets/{ticket_id}/history?limit=3')
+        self.assertEqual(response.status_code, 200)
+        events = response.get_json()
+        self.assertEqual([event['changes'].get('priority') for event in events],
+                         [['high', 'urgent'], ['low', 'high'], ['medium', 'low']])
+        self.assertEqual(events[0]['actor_name'], 'Test User')
+        rest = self.client.get(f"/api/tickets/{ticket_id}/history?cursor={response.headers['X-Next-Cursor']}")
+        self.assertEqual([event['action'] for event in rest.get_json()], ['created'])
+
+    def test_history_access(self):
+        """Test that history follows ticket access, and deleted tickets are admin-only."""
+        ticket = create_test_ticket(user_id=self.user.id)
+        self.assertEqual(self.client.get(f'/api/tickets/{ticket.id}/history').status_code, 401)
+        self._login(self.other)
+        self.assertEqual(self.client.get(f'/api/tickets/{ticket.id}/history').status_code, 403)
+
+        self._login(self.admin)
+        self.client.delete(f'/api/tickets/{ticket.id}')
+        response = self.client.get(f'/api/tickets/{ticket.id}/history')
+        self.assertEqual([event['action'] for event in response.get_json()], ['deleted'])
+        self._login(self.user)
+        self.assertEqual(self.client.get(f'/api/tickets/{ticket.id}/history').status_code, 404)
+
+    def test_history_reads_the_ticket_index(self):
+        """Test that the history query is planned on ix_ticket_events_ticket_created."""
+        ticket = create_test_ticket(user_id=self.user.id)
+        self._login(self.user)
+        with QueryCounter(db.engine) as counter:
+            self.client.get(f'/api/tickets/{ticket.id}/history')
+        statement = next(s for s in counter.statements if 'FROM ticket_events' in s)
+        plan = db.session.execute(db.text('EXPLAIN QUERY PLAN ' + statement.replace('?', '1'))).all()
+        self.assertTrue(any('ix_ticket_events_ticket_created' in row[-1] for row in plan), plan)
+        self.assertFalse(any('TEMP B-TREE' in row[-1] for row in plan), plan)
+
+    def test_retention_deletes_in_batches(self):
+        """Test that expired events are deleted, a batch at a time, and recent ones kept."""
+        old = datetime.utcnow() - timedelta(days=400)
+        db.session.execute(TicketAuditEvent.__table__.insert(), [
+            {'ticket_id': i, 'action': 'updated', 'changes': {}, 'created_at': old} for i in range(5)
+        ] + [{'ticket_id': 9, 'action': 'updated', 'changes': {}, 'created_at': datetime.utcnow()}])
+        db.session.commit()
+        with QueryCounter(db.engine) as counter:
+            removed = maintain_ticket_events(datetime.utcnow() - timedelta(days=365), batch_size=2)
+        self.assertEqual(removed, 5)
+        self.assertEqual(len([s for s in counter.statements if s.startswith('DELETE')]), 3)
+        self.assertEqual([event.ticket_id for event in TicketAuditEvent.query], [9])
+
+
+class TestTicketEventStorage(unittest.TestCase):
+    """Test cases for the PostgreSQL layout and the maintenance command."""
+
+    def test_postgresql_table_is_partitioned_by_month(self):
+        """Test that the table is range-partitioned with the partition key in its primary key."""
+        ddl = str(CreateTable(TicketAuditEvent.__table__).compile(dialect=postgresql.dialect()))
+        self.assertIn('PARTITION BY RANGE (created_at)', ddl)
+        self.assertIn('PRIMARY KEY (id, created_at)', ddl)
+        # Only ticket_events gets the partition key added
+        self.assertIn('PRIMARY KEY (id)', str(CreateTable(TicketAuditEvent.__table__).compile(dialect=sqlite.dialect())))
+        for table in (Ticket.__table__, UserSession.__table__):
+            ddl = str(CreateTable(table).compile(dialect=postgresql.dialect()))
+            self.assertIn(f'PRIMARY KEY ({table.primary_key.columns.keys()[0]})', ddl)
+        self.assertEqual(ticket_event_partitions(datetime(2026, 11, 17), 3), [
+            ('ticket_events_202611', datetime(2026, 11, 1), datetime(2026, 12, 1)),
+            ('ticket_events_202612', datetime(2026, 12, 1), datetime(2027, 1, 1)),
+            ('ticket_events_202701', datetime(2027, 1, 1), datetime(2027, 2, 1)),
+        ])
+
+    def test_maintain_command(self):
+        """Test that flask ticket-events-maintain applies the retention period."""
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.create_all()
+            db.session.add(TicketAuditEvent(ticket_id=1, action='updated', changes={},
+                                            created_at=datetime.utcnow() - timedelta(days=366)))
+            db.session.commit()
+            result = app.test_cli_runner().invoke(args=['ticket-events-maintain'])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn('Removed 1 expired ticket events', result.output)
+            db.session.remove()
+            db.drop_all()
@@ -0,0 +1,228 @@
+"""
+Unit tests for the ticket event bus and /api/tickets/stream.
+"""
+import json
+import unittest
+from flask import session
+from models import db
+from ticket_bus import StreamCapacityError, TicketBus, TicketEvent, PostgresNotifyRelay, ticket_bus
+from _test.conftest import create_test_app, create_test_user, create_test_ticket
+
+
+def parse_frames(body):
+    """Split an SSE body into (event, id, data) tuples, skipping comments and retry hints."""
+    frames = []
+    for block in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if line and not line.startswith(':'))
+        if 'event' in fields:
+            frames.append((fields['event'], fields.get('id'), json.loads(fields['data'])))
+    return frames
+
+
+def make_event(bus, kind='updated', ticket_id=1, audience=(1,), previous=(1,)):
+    return TicketEvent(bus.next_id(), kind, ticket_id, json.dumps({'id': ticket_id}),
+                       frozenset(audience), frozenset(previous))
+
+
+class TestTicketBus(unittest.TestCase):
+    """Test cases for scoping, resume and overflow in the in-process bus."""
+
+    def test_events_are_scoped_to_the_user(self):
+        """Test that users get their own tickets, a removal notice, or nothing."""
+        bus = TicketBus()
+        admin, owner, former, stranger = (bus.subscribe(*args)[0] for args in
+                                          ((9, True), (1, False), (2, False), (3, False)))
+        bus.deliver(make_event(bus, 'assigned', audience=(1, 4), previous=(1, 2)))
+
+        self.assertEqual(admin.queue.get_nowait().kind, 'assigned')
+        self.assertEqual(owner.queue.get_nowait().kind, 'assigned')
+        removed = former.queue.get_nowait()
+        self.assertEqual((removed.kind, json.loads(removed.data)), ('removed', {'id': 1}))
+        self.assertTrue(stranger.queue.empty())
+
+    def test_resume_from_last_event_id(self):
+        """Test that a reconnect gets the events after its last id."""
+        bus = TicketBus()
+        events = [make_event(bus, ticket_id=i) for i in range(5)]
+        for event in events:
+            bus.deliver(event)
+
+        _, missed = bus.subscribe(1, False, events[1].id)
+        self.assertEqual([event.ticket_id for event in missed], [2, 3, 4])
+        _, missed = bus.subscribe(1, False, events[-1].id)
+        self.assertEqual(missed, [])
+        _, missed = bus.subscribe(2, False, events[1].id)
+        self.assertEqual(missed, [])
+
+    def test_resume_needs_reload_when_gap_not_buffered(self):
+        """Test that unknown or evicted ids ask the client to reload."""
+        bus = TicketBus(buffer_size=2)
+        self.assertIsNone(bus.subscribe(1, False, 'garbage')[1])
+        events = [make_event(bus) for _ in range(3)]
+        for event in events:
+            bus.deliver(event)
+        self.assertIsNone(bus.subscribe(1, False, events[0].id)[1])
+        self.assertEqual(len(bus.subscribe(1, False, events[1].id)[1]), 1)
+
+    def test_overflowing_subscription_is_reset(self):
+        """Test that a stream that falls behind is told to reload."""
+        bus = TicketBus(queue_size=1)
+        subscription, missed = bus.subscribe(1, True)
+        for _ in range(3):
+            bus.deliver(make_event(bus))
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual(subscription.queue.qsize(), 1)
+
+    def test_subscriptions_are_capped(self):
+        """Test that subscribing past the limit fails until a stream closes."""
+        bus = TicketBus(max_subscriptions=1)
+        subscription, _ = bus.subscribe(1, False)
+        with self.assertRaises(StreamCapacityError):
+            bus.subscribe(2, False)
+        bus.unsubscribe(subscription)
+        bus.subscribe(2, False)
+
+    def test_notify_payload_round_trip(self):
+        """Test the NOTIFY encoding, including events too big to carry the ticket."""
+        bus = TicketBus()
+        relay = PostgresNotifyRelay(None, None, bus)
+        event = make_event(bus, audience=(1, 2), previous=(3,))
+        self.assertEqual(relay.decode(relay.encode(event)), event)
+
+        big = event._replace(data=json.dumps({'id': 1, 'description': 'x' * 10000}))
+        self.assertIsNone(json.loads(relay.encode(big))['data'])
+
+
+class TestTicketStreamRoute(unittest.TestCase):
+    """Test cases for /api/tickets/stream fed by the ticket write paths."""
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app.config.update(TICKET_STREAM_MAX_DURATION=1, TICKET_STREAM_HEARTBEAT=0.05,
+                               TICKET_STREAM_MAX_CONNECTIONS=0)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.user = create_test_user()
+        self.other = create_test_user(username='other', email='other@example.com')
+        self.admin = create_test_user(username='admin', email='admin@example.com', is_admin=True)
+        self.admin_client = self._client(self.admin)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _client(self, user):
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = user.id
+        return client
+
+    def _open(self, user, **headers):
+        response = self._client(user).get('/api/tickets/stream', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        return response
+
+    def _frames(self, response):
+        return parse_frames(response.get_data(as_text=True))
+
+    def test_stream_requires_login(self):
+        """Test that anonymous clients cannot subscribe."""
+        self.assertEqual(self.app.test_client().get('/api/tickets/stream').status_code, 401)
+
+    def test_streams_over_the_limit_are_refused(self):
+        """Test that a worker at its stream limit answers 503 with Retry-After."""
+        ticket_bus(self.app)._max_subscriptions = 1
+        first = self._open(self.user)
+        refused = self._client(self.other).get('/api/tickets/stream')
+        self.assertEqual(refused.status_code, 503)
+        self.assertEqual(refused.headers['Retry-After'], '1')
+        first.get_data()
+        self.assertEqual(self._client(self.other).get('/api/tickets/stream').status_code, 200)
+
+    def test_unread_stream_frees_its_slot_on_close(self):
+        """Test that a stream closed before it is iterated releases its subscription."""
+        ticket_bus(self.app)._max_subscriptions = 1
+        with self.app.test_request_context('/api/tickets/stream'):
+            session['user_id'] = self.user.id
+            unread = self.app.view_functions['tickets.stream']()
+        self.assertEqual(self._client(self.other).get('/api/tickets/stream').status_code, 503)
+        unread.close()
+        self.assertEqual(self._client(self.other).get('/api/tickets/stream').status_code, 200)
+
+    def test_create_update_delete_are_streamed(self):
+        """Test that write paths publish deltas to admins and to the ticket's users."""
+        admin_stream = self._open(self.admin)
+        user_stream = self._open(self.user)
+        other_stream = self._open(self.other)
+
+        created = self._client(self.user).post('/api/tickets/', json={'title': 'VPN', 'description': 'Down'})
+        ticket_id = created.get_json()['id']
+        self.admin_client.put(f'/api/tickets/{ticket_id}', json={'status': 'in_progress'})
+        self.admin_client.delete(f'/api/tickets/{ticket_id}')
+
+        expected = [('created', 'open'), ('updated', 'in_progress'), ('deleted', None)]
+        for stream in (admin_stream, user_stream):
+            frames = self._frames(stream)
+            self.assertEqual([(kind, data.get('status')) for kind, _, data in frames], expected)
+            self.assertEqual({data['id'] for _, _, data in frames}, {ticket_id})
+            self.assertEqual(frames[0][2]['user_name'], 'Test User')
+        self.assertEqual(self._frames(other_stream), [])
+
+    def test_reassignment_is_streamed_to_the_requester(self):
+        """Test that reassignment reaches the requester and no unrelated user."""
+        second_admin = create_test_user(username='admin2', email='admin2@example.com', is_admin=True)
+        ticket = create_test_ticket(user_id=self.user.id, assigned_to=self.admin.id)
+        streams = {user.id: self._open(user) for user in (self.user, self.other)}
+
+        self.admin_client.put(f'/api/tickets/admin/assign/{ticket.id}', json={'assigned_to': second_admin.id})
+        self.assertEqual([kind for kind, _, _ in self._frames(streams[self.user.id])], ['assigned'])
+        self.assertEqual(self._frames(streams[self.other.id]), [])
+
+    def test_bulk_operations_publish_each_ticket(self):
+        """Test that bulk changes publish one event per affected ticket."""
+        tickets = [create_test_ticket(title=f'T{i}', user_id=self.user.id) for i in range(3)]
+        ids = [ticket.id for ticket in tickets]
+        stream = self._open(self.user)
+        self.admin_client.post('/api/tickets/admin/bulk', json={'ticket_ids': ids, 'operation': 'priority',
+                                                                'priority': 'urgent'})
+        self.admin_client.post('/api/tickets/admin/bulk', json={'ticket_ids': ids[:2] + [999],
+                                                                'operation': 'delete'})
+        frames = self._frames(stream)
+        self.assertEqual(sorted((kind, data['id']) for kind, _, data in frames),
+                         sorted([('updated', i) for i in ids] + [('deleted', i) for i in ids[:2]]))
+        self.assertTrue(all(data['priority'] == 'urgent' for kind, _, data in frames if kind == 'updated'))
+
+    def test_deleting_a_user_publishes_their_tickets(self):
+        """Test that cascaded ticket deletes and unassignments reach the stream."""
+        own = create_test_ticket(user_id=self.other.id)
+        assigned = create_test_ticket(user_id=self.user.id, assigned_to=self.other.id)
+        stream = self._open(self.admin)
+        self._client(self.other).delete(f'/api/users/{self.other.id}')
+        frames = {(kind, data['id']): data for kind, _, data in self._frames(stream)}
+        self.assertEqual(set(frames), {('deleted', own.id), ('assigned', assigned.id)})
+        self.assertIsNone(frames[('assigned', assigned.id)]['assigned_to'])
+
+    def test_resume_with_last_event_id(self):
+        """Test that a reconnecting client receives only what it missed."""
+        stream = self._open(self.admin)
+        for title in ('one', 'two'):
+            self._client(self.user).post('/api/tickets/', json={'title': title, 'description': ''})
+        frames = self._frames(stream)
+        self.assertEqual(len(frames), 2)
+
+        self._client(self.user).post('/api/tickets/', json={'title': 'three', 'description': ''})
+        resumed = self._frames(self._open(self.admin, **{'Last-Event-ID': frames[0][1]}))
+        self.assertEqual([data['title'] for _, _, data in resumed], ['two', 'three'])
+
+        reset = self._frames(self._open(self.admin, **{'Last-Event-ID': 'stale'}))
+        self.assertEqual([kind for kind, _, _ in reset], ['reset'])
+
+    def test_stream_sends_heartbeats_and_ends(self):
+        """Test that idle streams send keep-alives and close after the maximum duration."""
+        body = self._open(self.user).get_data(as_text=True)
+        self.assertTrue(body.startswith('retry: 3000'))
+        self.assertIn(': keep-alive', body)
+        self.assertEqual(ticket_bus(self.app)._subscriptions, set())
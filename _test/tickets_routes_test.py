@@ -3,8 +3,11 @@ Unit tests for the tickets routes module.
 """
 import unittest
 import json
-from models import db, User, Ticket
-from _test.conftest import create_test_app, create_test_user, create_test_ticket, login_user
+import random
+from datetime import datetime, timedelta
+from models import db, User, Ticket, TicketCounter, TicketTombstone, rebuild_ticket_counters
+from routes.changes import encode_token
+from _test.conftest import create_test_app, create_test_user, create_test_ticket, login_user, QueryCounter
 
 
 class TestTicketsRoutes(unittest.TestCase):
@@ -450,6 +453,192 @@ class TestTicketsRoutes(unittest.TestCase):
         self.assertIsInstance(data, list)
         self.assertTrue(any(user['username'] == 'admin' for user in data))
         self.assertFalse(any(user['username'] == 'testuser' for user in data))
+        self.assertEqual(data[0], {'id': self.admin.id, 'username': 'admin', 'full_name': 'Test User'})
+
+    
+    def test_get_ticket_stats(self):
+        """Test personal ticket counts for created and assigned tickets."""
+        create_test_ticket(title="Closed Ticket", user_id=self.user.id, status="closed")
+        create_test_ticket(title="Other Closed", user_id=self.other_user.id, status="closed")
+        
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = self.user.id
+        
+        response = self.client.get('/api/tickets/stats')
+        self.assertEqual(response.status_code, 200)
+        
+        data = response.get_json()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['open'], 2)
+        self.assertEqual(data['closed'], 1)
+        self.assertEqual(data['in_progress'], 0)
+        self.assertEqual(data['unassigned'], 2)
+    
+    def test_get_ticket_stats_unauthenticated(self):
+        """Test personal ticket counts without authentication."""
+        response = self.client.get('/api/tickets/stats')
+        self.assertEqual(response.status_code, 401)
+    
+    def test_get_admin_ticket_stats(self):
+        """Test admin counts across all tickets in a single query."""
+        create_test_ticket(title="In Progress", user_id=self.other_user.id,
+                           status="in_progress", assigned_to=self.admin.id)
+        
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = self.admin.id
+        
+        with QueryCounter(db.engine) as counter:
+            response = self.client.get('/api/tickets/admin/stats')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum('GROUP BY' in sql for sql in counter.statements), 1)
+        
+        data = response.get_json()
+        self.assertEqual(data['total'], 4)
+        self.assertEqual(data['open'], 3)
+        self.assertEqual(data['in_progress'], 1)
+        self.assertEqual(data['unassigned'], 2)
+    
+    def test_get_admin_ticket_stats_non_admin(self):
+        """Test admin counts access by non-admin user."""
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = self.user.id
+        
+        response = self.client.get('/api/tickets/admin/stats',
+                                 headers={'Accept': 'application/json'})
+        self.assertEqual(response.status_code, 403)
+
+
+class TestBulkTicketOperations(unittest.TestCase):
+    """Test cases for the admin bulk ticket endpoint."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        
+        self.user = create_test_user()
+        self.admin = create_test_user(username="admin", email="admin@example.com", is_admin=True)
+        self.tickets = [
+            create_test_ticket(title=f"Ticket {i}", user_id=self.user.id) for i in range(4)
+        ]
+        self.ticket_ids = [ticket.id for ticket in self.tickets]
+        
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = self.admin.id
+        
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def _bulk(self, **payload):
+        return self.client.post('/api/tickets/admin/bulk', json=payload)
+    
+    def test_bulk_status(self):
+        """Test changing the status of several tickets at once."""
+        response = self._bulk(ticket_ids=self.ticket_ids[:3], operation='status', status='closed')
+        self.assertEqual(response.status_code, 200)
+        
+        data = response.get_json()
+        self.assertEqual(data['affected'], 3)
+        self.assertTrue(all(result['result'] == 'updated' for result in data['results']))
+        
+        statuses = {ticket.id: ticket.status for ticket in Ticket.query.all()}
+        self.assertEqual([statuses[i] for i in self.ticket_ids], ['closed', 'closed', 'closed', 'open'])
+    
+    def test_bulk_priority(self):
+        """Test changing the priority of several tickets at once."""
+        response = self._bulk(ticket_ids=self.ticket_ids, operation='priority', priority='urgent')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(ticket.priority == 'urgent' for ticket in Ticket.query.all()))
+    
+    def test_bulk_assign_and_unassign(self):
+        """Test assigning and unassigning several tickets at once."""
+        response = self._bulk(ticket_ids=self.ticket_ids, operation='assign', assigned_to=self.admin.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(ticket.assigned_to == self.admin.id for ticket in Ticket.query.all()))
+        
+        response = self._bulk(ticket_ids=self.ticket_ids[:2], operation='assign', assigned_to=None)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Ticket.query.filter(Ticket.assigned_to.is_(None)).count(), 2)
+    
+    def _bulk_statements(self, **payload):
+        # Start from an empty identity map so every user lookup reaches the database
+        db.session.expunge_all()
+        with QueryCounter(db.engine) as counter:
+            response = self._bulk(**payload)
+        self.assertEqual(response.status_code, 200)
+        return counter.statements
+    
+    def test_bulk_assign_validates_assignee_once(self):
+        """Test that the assignee is checked once, not per ticket."""
+        assignee_id = create_test_user(username="admin2", email="admin2@example.com", is_admin=True).id
+        baseline = self._bulk_statements(ticket_ids=self.ticket_ids, operation='status', status='open')
+        statements = self._bulk_statements(ticket_ids=self.ticket_ids, operation='assign', assigned_to=assignee_id)
+        
+        user_selects = [sql for sql in statements if 'FROM users' in sql]
+        self.assertEqual(len(user_selects), len([sql for sql in baseline if 'FROM users' in sql]) + 1)
+        updates = [sql for sql in statements if sql.startswith('UPDATE tickets')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual({ticket.assigned_to for ticket in Ticket.query}, {assignee_id})
+    
+    def test_bulk_assign_non_admin_rejected(self):
+        """Test that tickets cannot be bulk-assigned to a regular user."""
+        response = self._bulk(ticket_ids=self.ticket_ids, operation='assign', assigned_to=self.user.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['error'], 'Can only assign tickets to admin users')
+        self.assertTrue(all(ticket.assigned_to is None for ticket in Ticket.query.all()))
+    
+    def test_bulk_delete_reports_missing_ids(self):
+        """Test deleting tickets with per-id results for unknown ids."""
+        response = self._bulk(ticket_ids=[self.ticket_ids[0], 999, self.ticket_ids[1]], operation='delete')
+        self.assertEqual(response.status_code, 200)
+        
+        data = response.get_json()
+        self.assertEqual(data['affected'], 2)
+        self.assertEqual(data['results'], [
+            {'id': self.ticket_ids[0], 'result': 'deleted'},
+            {'id': 999, 'result': 'not_found'},
+            {'id': self.ticket_ids[1], 'result': 'deleted'},
+        ])
+        self.assertEqual(Ticket.query.count(), 2)
+    
+    def test_bulk_invalid_requests(self):
+        """Test validation of the bulk payload."""
+        cases = [
+            {'operation': 'delete'},
+            {'ticket_ids': [], 'operation': 'delete'},
+            {'ticket_ids': ['1'], 'operation': 'delete'},
+            {'ticket_ids': self.ticket_ids, 'operation': 'archive'},
+            {'ticket_ids': self.ticket_ids, 'operation': 'status', 'status': 'done'},
+            {'ticket_ids': self.ticket_ids, 'operation': 'priority'},
+            {'ticket_ids': self.ticket_ids, 'operation': 'assign', 'assigned_to': str(self.admin.id)},
+            {'ticket_ids': self.ticket_ids, 'operation': 'assign', 'assigned_to': True},
+            {'ticket_ids': self.ticket_ids, 'operation': 'assign', 'assigned_to': [self.admin.id]},
+        ]
+        for payload in cases:
+            response = self._bulk(**payload)
+            self.assertEqual(response.status_code, 400, payload)
+        
+        # Bodies that are not a JSON object
+        for body in ([self.ticket_ids], 'delete', None):
+            response = self.client.post('/api/tickets/admin/bulk', json=body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertEqual(response.get_json()['error'], 'Request body must be a JSON object')
+        self.assertEqual(Ticket.query.count(), 4)
+    
+    def test_bulk_non_admin(self):
+        """Test bulk endpoint access by non-admin user."""
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = self.user.id
+        
+        response = self._bulk(ticket_ids=self.ticket_ids, operation='delete')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Ticket.query.count(), 4)
 
 
 class TestTicketsRoutesEdgeCases(unittest.TestCase):
@@ -501,5 +690,872 @@ class TestTicketsRoutesEdgeCases(unittest.TestCase):
         self.assertEqual(response.status_code, 404)
 
 
+class TestTicketListQueryCount(unittest.TestCase):
+    """Test that list endpoints load tickets without per-ticket lookups."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        
+        # Keep plain ids: the identity map is cleared between requests below
+        self.user_id = create_test_user().id
+        self.admin_ids = [
+            create_test_user(username=f"admin{i}", email=f"admin{i}@example.com", is_admin=True).id
+            for i in range(3)
+        ]
+        
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def _create_tickets(self, count):
+        for i in range(count):
+            create_test_ticket(
+                title=f"Ticket {i}",
+                user_id=self.user_id if i % 2 else self.admin_ids[i % 3],
+                assigned_to=self.admin_ids[(i + 1) % 3] if i % 3 else self.user_id
+            )
+    
+    def _count_queries(self, url, user_id):
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = user_id
+        # Start from an empty identity map so lazy loads would hit the database
+        db.session.expunge_all()
+        with QueryCounter(db.engine) as counter:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return counter.count, response.get_json()
+    
+    def test_list_endpoints_use_constant_query_count(self):
+        """Test that query count does not grow with the number of tickets."""
+        endpoints = [
+            ('/api/tickets/', self.user_id),
+            ('/api/tickets/admin/all', self.admin_ids[0]),
+            (f'/api/users/{self.user_id}/tickets', self.user_id),
+        ]
+        
+        self._create_tickets(3)
+        small = {url: self._count_queries(url, user_id)[0] for url, user_id in endpoints}
+        
+        self._create_tickets(30)
+        for url, user_id in endpoints:
+            count, data = self._count_queries(url, user_id)
+            self.assertEqual(count, small[url], url)
+            self.assertTrue(all(ticket['user_name'] for ticket in data))
+    
+    def test_list_endpoints_skip_orm_instances(self):
+        """Test that list endpoints build rows without loading Ticket instances."""
+        self._create_tickets(5)
+        for url, user_id in [('/api/tickets/', self.user_id), ('/api/tickets/admin/all', self.admin_ids[0])]:
+            _, data = self._count_queries(url, user_id)
+            self.assertTrue(data)
+            loaded = [obj for obj in db.session.identity_map.values() if isinstance(obj, Ticket)]
+            self.assertEqual(loaded, [], url)
+    
+    def test_serialized_names_match_to_dict(self):
+        """Test that bulk serialization produces the same payload as to_dict."""
+        self._create_tickets(6)
+        
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = self.admin_ids[0]
+        response = self.client.get('/api/tickets/admin/all')
+        
+        expected = {ticket.id: self.app.json.loads(self.app.json.dumps(ticket.to_dict()))
+                    for ticket in Ticket.query.all()}
+        for ticket in response.get_json():
+            self.assertEqual(ticket, expected[ticket['id']])
+
+
+class TestTicketPagination(unittest.TestCase):
+    """Test cursor pagination on ticket list endpoints."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = create_test_app()
+        self.app.config['TICKETS_MAX_PAGE_SIZE'] = 5
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        
+        self.user = create_test_user()
+        self.admin = create_test_user(username="admin", email="admin@example.com", is_admin=True)
+        self.tickets = [
+            create_test_ticket(title=f"Ticket {i}", user_id=self.user.id,
+                               assigned_to=self.admin.id if i % 2 else None)
+            for i in range(7)
+        ]
+        
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def _login(self, user):
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = user.id
+    
+    def _collect_pages(self, url):
+        ids, cursor, pages = [], None, 0
+        while True:
+            separator = '&' if '?' in url else '?'
+            page_url = f"{url}{separator}cursor={cursor}" if cursor else url
+            response = self.client.get(page_url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(ticket['id'] for ticket in response.get_json())
+            pages += 1
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                return ids, pages
+    
+    def _cursor_after(self, count):
+        response = self.client.get(f'/api/tickets/?limit={count}')
+        return response.headers['X-Next-Cursor']
+    
+    def test_pages_cover_all_tickets_newest_first(self):
+        """Test that walking the cursor returns every ticket exactly once."""
+        self._login(self.user)
+        ids, pages = self._collect_pages('/api/tickets/?limit=3')
+        
+        expected = [ticket.id for ticket in sorted(
+            self.tickets, key=lambda t: (t.created_at, t.id), reverse=True)]
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+    
+    def test_last_page_has_no_cursor(self):
+        """Test that no cursor is returned when all rows fit on one page."""
+        self._login(self.user)
+        response = self.client.get('/api/tickets/?limit=5&cursor=' + self._cursor_after(2))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 5)
+        self.assertNotIn('X-Next-Cursor', response.headers)
+    
+    def test_limit_is_capped(self):
+        """Test that the limit parameter cannot exceed the configured maximum."""
+        self._login(self.admin)
+        response = self.client.get('/api/tickets/admin/all?limit=1000')
+        self.assertEqual(len(response.get_json()), 5)
+        self.assertIn('X-Next-Cursor', response.headers)
+    
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected."""
+        self._login(self.admin)
+        response = self.client.get('/api/tickets/admin/all?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['error'], 'Invalid cursor')
+    
+    def test_invalid_limit(self):
+        """Test that a non-numeric limit is rejected."""
+        self._login(self.user)
+        response = self.client.get('/api/tickets/?limit=abc')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_admin_filters_apply_across_pages(self):
+        """Test that admin filters are honoured while paging."""
+        self._login(self.admin)
+        ids, _ = self._collect_pages('/api/tickets/admin/all?limit=2&assigned_to=unassigned')
+        expected = {ticket.id for ticket in self.tickets if ticket.assigned_to is None}
+        self.assertEqual(len(ids), len(expected))
+        self.assertEqual(set(ids), expected)
+    
+    def test_personal_list_merges_created_and_assigned(self):
+        """Test that pages interleave created and assigned tickets, each exactly once."""
+        own = [create_test_ticket(title=f"Own {i}", user_id=self.admin.id,
+                                  assigned_to=self.admin.id if i == 0 else None) for i in range(3)]
+        # Same timestamps as assigned tickets: ties are broken by id across both sides
+        for i, ticket in enumerate(own):
+            ticket.created_at = self.tickets[2 * i + 1].created_at
+        db.session.commit()
+
+        self._login(self.admin)
+        ids, _ = self._collect_pages('/api/tickets/?limit=2')
+        mine = [ticket for ticket in self.tickets if ticket.assigned_to == self.admin.id] + own
+        self.assertEqual(ids, [ticket.id for ticket in sorted(
+            mine, key=lambda t: (t.created_at, t.id), reverse=True)])
+
+    def test_user_tickets_paginated(self):
+        """Test cursor pagination on the user tickets endpoint."""
+        self._login(self.user)
+        ids, pages = self._collect_pages(f'/api/users/{self.user.id}/tickets?limit=4')
+        self.assertEqual(sorted(ids), sorted(ticket.id for ticket in self.tickets))
+        self.assertEqual(pages, 2)
+
+
 if __name__ == '__main__':
     unittest.main()
+
+
+class TestTicketSearch(unittest.TestCase):
+    """Test full-text ticket search (SQLite FTS5 backend)."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        
+        self.user = create_test_user()
+        self.admin = create_test_user(username="admin", email="admin@example.com", is_admin=True)
+        self.other_user = create_test_user(username="otheruser", email="other@example.com")
+        
+        self.printer_title = create_test_ticket(
+            title="Printer jammed", description="Paper stuck in tray two", user_id=self.user.id)
+        self.printer_description = create_test_ticket(
+            title="Office supplies", description="The printer is out of toner", user_id=self.user.id)
+        self.vpn = create_test_ticket(
+            title="VPN disconnects", description="Connection drops every hour", user_id=self.user.id)
+        self.other_printer = create_test_ticket(
+            title="Printer offline", description="Second floor <b>printer</b>", user_id=self.other_user.id)
+        
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def _login(self, user):
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = user.id
+    
+    def _search(self, query):
+        response = self.client.get('/api/tickets/search', query_string={'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+    
+    def test_search_requires_login(self):
+        """Test that search is not available anonymously."""
+        response = self.client.get('/api/tickets/search?q=printer')
+        self.assertEqual(response.status_code, 401)
+    
+    def test_search_requires_query(self):
+        """Test that an empty query is rejected."""
+        self._login(self.user)
+        response = self.client.get('/api/tickets/search?q=%20')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_title_matches_rank_first(self):
+        """Test that title matches outrank description matches."""
+        self._login(self.user)
+        results = self._search('printer')
+        self.assertEqual([r['id'] for r in results],
+                         [self.printer_title.id, self.printer_description.id])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+    
+    def test_highlight_markers_rejected_on_write(self):
+        """Test that ticket text cannot smuggle the characters that become <mark> tags."""
+        self._login(self.user)
+        response = self.client.post('/api/tickets/', json={'title': 'Printer \u0002x', 'description': 'ok'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.put(f'/api/tickets/{self.vpn.id}', json={'description': 'drops\u0003 again'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(db.session.get(Ticket, self.vpn.id).description, 'Connection drops every hour')
+        
+        results = self._search('printer')
+        self.assertNotIn('\x02', str(results))
+        self.assertEqual(Ticket.query.filter(Ticket.title.like('%\x02%')).count(), 0)
+    
+    def test_search_is_scoped_to_user(self):
+        """Test that users only find their own tickets while admins find all."""
+        self._login(self.user)
+        self.assertNotIn(self.other_printer.id, [r['id'] for r in self._search('printer')])
+        
+        self._login(self.admin)
+        self.assertIn(self.other_printer.id, [r['id'] for r in self._search('printer')])
+        response = self.client.get('/api/tickets/search?q=printer&scope=mine')
+        self.assertEqual(response.get_json(), [])
+    
+    def test_highlights_are_escaped(self):
+        """Test that matched terms are marked and ticket text is HTML-escaped."""
+        self._login(self.admin)
+        result = next(r for r in self._search('printer') if r['id'] == self.other_printer.id)
+        self.assertEqual(result['highlights']['title'], '<mark>Printer</mark> offline')
+        self.assertIn('&lt;b&gt;<mark>printer</mark>&lt;/b&gt;', result['highlights']['description'])
+        self.assertEqual(result['title'], 'Printer offline')
+    
+    def test_stemming_and_query_syntax(self):
+        """Test stemmed matching and that FTS query syntax in input is harmless."""
+        self._login(self.user)
+        self.assertEqual([r['id'] for r in self._search('disconnected')], [self.vpn.id])
+        self.assertEqual([r['id'] for r in self._search('vpn*" (')], [self.vpn.id])
+    
+    def test_index_follows_updates_and_deletes(self):
+        """Test that edits and deletes are reflected in search results."""
+        self._login(self.admin)
+        self.client.put(f'/api/tickets/{self.vpn.id}', json={'title': 'Keyboard broken'})
+        self.assertEqual(self._search('vpn'), [])
+        self.assertEqual([r['id'] for r in self._search('keyboard')], [self.vpn.id])
+        
+        self.client.delete(f'/api/tickets/{self.vpn.id}')
+        self.assertEqual(self._search('keyboard'), [])
+    
+    def test_search_pagination(self):
+        """Test that search results page with the cursor header."""
+        self._login(self.admin)
+        first = self.client.get('/api/tickets/search?q=printer&limit=2')
+        self.assertEqual(len(first.get_json()), 2)
+        cursor = first.headers['X-Next-Cursor']
+        
+        second = self.client.get(f'/api/tickets/search?q=printer&limit=2&cursor={cursor}')
+        self.assertEqual(len(second.get_json()), 1)
+        self.assertNotIn('X-Next-Cursor', second.headers)
+        ids = [r['id'] for r in first.get_json() + second.get_json()]
+        self.assertEqual(len(set(ids)), 3)
+
+
+class TestTicketExport(unittest.TestCase):
+    """Test the streaming admin ticket export."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        
+        self.user = create_test_user()
+        self.admin = create_test_user(username="admin", email="admin@example.com", is_admin=True)
+        self.tickets = [
+            create_test_ticket(title=f"Ticket {i}", description=f"Line one, \"quoted\"\nline {i}",
+                               user_id=self.user.id, status='closed' if i % 3 == 0 else 'open',
+                               assigned_to=self.admin.id if i % 2 else None)
+            for i in range(7)
+        ]
+        
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def _login(self, user):
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = user.id
+    
+    def test_export_requires_admin(self):
+        """Test that regular users cannot export tickets."""
+        self._login(self.user)
+        response = self.client.get('/api/tickets/admin/export')
+        self.assertEqual(response.status_code, 403)
+    
+    def test_invalid_format(self):
+        """Test that unknown export formats are rejected."""
+        self._login(self.admin)
+        response = self.client.get('/api/tickets/admin/export?format=xml')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_csv_export(self):
+        """Test that the CSV export streams a header and every ticket newest first."""
+        import csv
+        import io
+        self._login(self.admin)
+        response = self.client.get('/api/tickets/admin/export?format=csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertIn('attachment;', response.headers['Content-Disposition'])
+        
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        expected = sorted(self.tickets, key=lambda t: (t.created_at, t.id), reverse=True)
+        self.assertEqual([int(row['id']) for row in rows], [t.id for t in expected])
+        
+        first = next(row for row in rows if int(row['id']) == self.tickets[1].id)
+        self.assertEqual(first['description'], 'Line one, "quoted"\nline 1')
+        self.assertEqual(first['user_name'], 'Test User')
+        self.assertEqual(first['assignee_name'], 'Test User')
+        self.assertEqual(first['created_at'], self.tickets[1].created_at.isoformat())
+    
+    def test_ndjson_export_honours_filters(self):
+        """Test that the NDJSON export applies the admin list filters."""
+        self._login(self.admin)
+        response = self.client.get('/api/tickets/admin/export?format=ndjson&status=open&assigned_to=unassigned')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        
+        records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        expected = {t.id for t in self.tickets if t.status == 'open' and t.assigned_to is None}
+        self.assertEqual({record['id'] for record in records}, expected)
+        self.assertTrue(all(record['assignee_name'] is None for record in records))
+    
+    def test_export_streams_in_batches(self):
+        """Test that rows are read in yield_per batches rather than all at once."""
+        import routes.export
+        original = routes.export.EXPORT_BATCH_SIZE
+        routes.export.EXPORT_BATCH_SIZE = 2
+        try:
+            self._login(self.admin)
+            response = self.client.get('/api/tickets/admin/export?format=ndjson')
+            chunks = list(response.response)
+        finally:
+            routes.export.EXPORT_BATCH_SIZE = original
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(sum(chunk.count(b'\n') for chunk in chunks), 7)
+
+
+class TestConditionalGet(unittest.TestCase):
+    """Test ETags and If-None-Match handling on ticket read endpoints."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        
+        self.user = create_test_user()
+        self.admin = create_test_user(username="admin", email="admin@example.com", is_admin=True)
+        self.tickets = [create_test_ticket(title=f"Ticket {i}", user_id=self.user.id) for i in range(3)]
+        
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def _login(self, user):
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = user.id
+    
+    def _revalidate(self, url, etag):
+        return self.client.get(url, headers={'If-None-Match': f'"{etag}"'})
+    
+    def test_list_not_modified(self):
+        """Test that an unchanged list is answered with an empty 304."""
+        self._login(self.user)
+        first = self.client.get('/api/tickets/')
+        etag, _ = first.get_etag()
+        self.assertTrue(etag)
+        self.assertEqual(first.headers['Cache-Control'], 'private, no-cache')
+        
+        with QueryCounter(db.engine) as counter:
+            second = self._revalidate('/api/tickets/', etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+        self.assertEqual(second.get_etag()[0], etag)
+        # Only the aggregate ran; no ticket rows were loaded
+        ticket_selects = [s for s in counter.statements if 'tickets.title' in s]
+        self.assertEqual(ticket_selects, [])
+        self.assertEqual(len([s for s in counter.statements if 'count(' in s]), 1)
+    
+    def test_list_etag_changes_on_write(self):
+        """Test that updates, inserts and deletes all invalidate the list ETag."""
+        self._login(self.admin)
+        etag = self.client.get('/api/tickets/admin/all').get_etag()[0]
+        
+        self.client.put(f'/api/tickets/{self.tickets[0].id}', json={'title': 'Renamed'})
+        response = self._revalidate('/api/tickets/admin/all', etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response.get_etag()[0]
+        
+        self.client.delete(f'/api/tickets/{self.tickets[1].id}')
+        response = self._revalidate('/api/tickets/admin/all', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 2)
+    
+    def test_etags_change_when_a_user_is_renamed(self):
+        """Test that list and ticket ETags cover the requester names in the body."""
+        self._login(self.user)
+        list_etag = self.client.get('/api/tickets/').get_etag()[0]
+        url = f'/api/tickets/{self.tickets[0].id}'
+        ticket_etag = self.client.get(url).get_etag()[0]
+
+        self.client.put(f'/api/users/{self.user.id}', json={'first_name': 'Renamed'})
+        response = self._revalidate('/api/tickets/', list_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()[0]['user_name'].startswith('Renamed '))
+        response = self._revalidate(url, ticket_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['user_name'].startswith('Renamed '))
+
+    def test_list_etag_depends_on_query_and_user(self):
+        """Test that filters, paging and the user are part of the list ETag."""
+        self._login(self.admin)
+        etags = {
+            self.client.get('/api/tickets/admin/all').get_etag()[0],
+            self.client.get('/api/tickets/admin/all?limit=1').get_etag()[0],
+            self.client.get('/api/tickets/admin/all?status=closed').get_etag()[0],
+        }
+        self.assertEqual(len(etags), 3)
+        
+        admin_etag = self.client.get(f'/api/tickets/{self.tickets[0].id}').get_etag()[0]
+        self._login(self.user)
+        self.assertEqual(self._revalidate(f'/api/tickets/{self.tickets[0].id}', admin_etag).status_code, 304)
+        user_list = self.client.get(f'/api/users/{self.user.id}/tickets')
+        self.assertEqual(self._revalidate(f'/api/users/{self.user.id}/tickets',
+                                          user_list.get_etag()[0]).status_code, 304)
+    
+    def test_single_ticket_etag(self):
+        """Test conditional GET on a single ticket."""
+        self._login(self.user)
+        url = f'/api/tickets/{self.tickets[0].id}'
+        etag = self.client.get(url).get_etag()[0]
+        self.assertEqual(self._revalidate(url, etag).status_code, 304)
+        
+        self.client.put(url, json={'priority': 'high'})
+        response = self._revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['priority'], 'high')
+        self.assertNotEqual(response.get_etag()[0], etag)
+    
+    def test_access_checked_before_etag(self):
+        """Test that a matching ETag does not bypass the access check."""
+        other = create_test_user(username="other", email="other@example.com")
+        self._login(self.user)
+        url = f'/api/tickets/{self.tickets[0].id}'
+        etag = self.client.get(url).get_etag()[0]
+        
+        self._login(other)
+        self.assertEqual(self._revalidate(url, etag).status_code, 403)
+
+
+class TestSparseFieldsets(unittest.TestCase):
+    """Test the fields and view parameters on ticket list endpoints."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        
+        self.user = create_test_user()
+        self.admin = create_test_user(username="admin", email="admin@example.com",
+                                      first_name="Ada", last_name="Admin", is_admin=True)
+        self.long_ticket = create_test_ticket(title="Long", description="x" * 120,
+                                              user_id=self.user.id, assigned_to=self.admin.id)
+        self.short_ticket = create_test_ticket(title="Short", description="y" * 50, user_id=self.user.id)
+        self.empty_ticket = create_test_ticket(title="Empty", description=None, user_id=self.user.id)
+        
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = self.admin.id
+        
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def _get(self, url):
+        with QueryCounter(db.engine) as counter:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        ticket_selects = [s for s in counter.statements if 'FROM tickets' in s and 'count(' not in s]
+        self.assertEqual(len(ticket_selects), 1)
+        return response.get_json(), ticket_selects[0]
+    
+    def test_fields_select_only_requested_columns(self):
+        """Test that fields limits both the payload and the SELECT."""
+        data, statement = self._get('/api/tickets/admin/all?fields=title,status')
+        self.assertEqual(len(data), 3)
+        for ticket in data:
+            self.assertEqual(set(ticket), {'id', 'created_at', 'title', 'status'})
+        self.assertNotIn('description', statement)
+        self.assertNotIn('JOIN', statement)
+    
+    def test_name_fields_join_only_what_is_needed(self):
+        """Test that requesting one name field joins only that user."""
+        data, statement = self._get('/api/tickets/admin/all?fields=assignee_name')
+        self.assertEqual(statement.count('JOIN'), 1)
+        names = {ticket['id']: ticket['assignee_name'] for ticket in data}
+        self.assertEqual(names[self.long_ticket.id], 'Ada Admin')
+        self.assertIsNone(names[self.short_ticket.id])
+    
+    def test_summary_view_truncates_description(self):
+        """Test that the summary view cuts descriptions in SQL and flags them."""
+        data, statement = self._get('/api/tickets/admin/all?view=summary')
+        self.assertIn('substr(', statement)
+        tickets = {ticket['id']: ticket for ticket in data}
+        
+        long_ticket = tickets[self.long_ticket.id]
+        self.assertEqual(long_ticket['description'], 'x' * 50)
+        self.assertTrue(long_ticket['description_truncated'])
+        self.assertEqual(tickets[self.short_ticket.id]['description'], 'y' * 50)
+        self.assertFalse(tickets[self.short_ticket.id]['description_truncated'])
+        self.assertIsNone(tickets[self.empty_ticket.id]['description'])
+        self.assertFalse(tickets[self.empty_ticket.id]['description_truncated'])
+    
+    def test_summary_matches_full_serialization(self):
+        """Test that the summary view agrees with to_dict apart from the description."""
+        data, _ = self._get('/api/tickets/admin/all?view=summary')
+        expected = {ticket.id: self.app.json.loads(self.app.json.dumps(ticket.to_dict()))
+                    for ticket in Ticket.query.all()}
+        for ticket in data:
+            full = expected[ticket['id']]
+            self.assertEqual(set(ticket), set(full) | {'description_truncated'})
+            for key, value in full.items():
+                if key == 'description':
+                    value = value[:50] if value else value
+                self.assertEqual(ticket[key], value, key)
+    
+    def test_fields_with_pagination(self):
+        """Test that sparse lists still page with the cursor header."""
+        first = self.client.get('/api/tickets/admin/all?fields=title&limit=2')
+        self.assertEqual(len(first.get_json()), 2)
+        cursor = first.headers['X-Next-Cursor']
+        second = self.client.get(f'/api/tickets/admin/all?fields=title&limit=2&cursor={cursor}')
+        self.assertNotIn('X-Next-Cursor', second.headers)
+        
+        ids = [ticket['id'] for ticket in first.get_json() + second.get_json()]
+        self.assertEqual(sorted(ids), sorted([self.long_ticket.id, self.short_ticket.id, self.empty_ticket.id]))
+    
+    def test_invalid_fields_and_view(self):
+        """Test that unknown fields and views are rejected."""
+        response = self.client.get('/api/tickets/admin/all?fields=title,password_hash')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password_hash', response.get_json()['error'])
+        response = self.client.get('/api/tickets/?view=compact')
+        self.assertEqual(response.status_code, 400)
+
+
+class RandomTicketMutations:
+    """Random API writes for tests that check derived state; needs self.client, self.users and self.admins."""
+    
+    def _login(self, user):
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = user.id
+    
+    def _mutate(self, rng):
+        """Apply one random create, update, assign, delete or bulk operation through the API."""
+        ticket_ids = [ticket_id for ticket_id, in db.session.query(Ticket.id)]
+        admin_ids = [admin.id for admin in self.admins]
+        operation = rng.choice(('create', 'create', 'update', 'assign', 'delete', 'bulk'))
+        if operation == 'create' or not ticket_ids:
+            self._login(rng.choice(self.users + self.admins))
+            response = self.client.post('/api/tickets/', json={
+                'title': 'Ticket', 'description': 'Description',
+                'priority': rng.choice(('low', 'medium', 'high', 'urgent')),
+            })
+        elif operation == 'update':
+            self._login(rng.choice(self.admins))
+            response = self.client.put(f'/api/tickets/{rng.choice(ticket_ids)}', json={
+                'status': rng.choice(('open', 'in_progress', 'closed')),
+                'priority': rng.choice(('low', 'medium', 'high', 'urgent')),
+            })
+        elif operation == 'assign':
+            self._login(rng.choice(self.admins))
+            response = self.client.put(f'/api/tickets/admin/assign/{rng.choice(ticket_ids)}',
+                                       json={'assigned_to': rng.choice(admin_ids + [None])})
+        elif operation == 'delete':
+            self._login(rng.choice(self.admins))
+            response = self.client.delete(f'/api/tickets/{rng.choice(ticket_ids)}')
+        else:
+            self._login(rng.choice(self.admins))
+            payload = rng.choice((
+                {'operation': 'status', 'status': rng.choice(('open', 'in_progress', 'closed'))},
+                {'operation': 'priority', 'priority': rng.choice(('low', 'urgent'))},
+                {'operation': 'assign', 'assigned_to': rng.choice(admin_ids + [None])},
+                {'operation': 'delete'},
+            ))
+            sample = rng.sample(ticket_ids, rng.randint(1, min(5, len(ticket_ids))))
+            response = self.client.post('/api/tickets/admin/bulk', json=dict(payload, ticket_ids=sample))
+        self.assertLess(response.status_code, 300, (operation, response.get_json()))
+
+
+class TestTicketCounters(RandomTicketMutations, unittest.TestCase):
+    """Test cases for the trigger-maintained ticket_counters table."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        
+        self.users = [create_test_user(username=f"user{i}", email=f"user{i}@example.com") for i in range(3)]
+        self.admins = [
+            create_test_user(username=f"admin{i}", email=f"admin{i}@example.com", is_admin=True) for i in range(2)
+        ]
+        
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def _counters(self):
+        return {
+            (row.user_id, row.assigned_to, row.status, row.priority): row.ticket_count
+            for row in TicketCounter.query.filter(TicketCounter.ticket_count != 0)
+        }
+    
+    def _recount(self):
+        rows = db.session.query(
+            Ticket.user_id, Ticket.assigned_to, Ticket.status, Ticket.priority, db.func.count()
+        ).group_by(Ticket.user_id, Ticket.assigned_to, Ticket.status, Ticket.priority)
+        return {
+            (user_id, assigned_to or 0, status, priority): count
+            for user_id, assigned_to, status, priority, count in rows
+        }
+    
+    def test_random_mutations_keep_counters_exact(self):
+        """Test that counters match a recount after every random mutation."""
+        for seed in range(3):
+            rng = random.Random(seed)
+            for step in range(60):
+                self._mutate(rng)
+                db.session.expire_all()
+                self.assertEqual(self._counters(), self._recount(), f"seed {seed}, step {step}")
+    
+    def test_deleting_user_updates_counters(self):
+        """Test that cascaded deletes and unassignments are counted."""
+        create_test_ticket(user_id=self.users[0].id, assigned_to=self.admins[0].id)
+        create_test_ticket(user_id=self.users[1].id, assigned_to=self.admins[0].id)
+        db.session.delete(self.users[0])
+        db.session.delete(self.admins[0])
+        db.session.commit()
+        self.assertEqual(self._counters(), {(self.users[1].id, 0, 'open', 'medium'): 1})
+    
+    def test_stats_read_counters(self):
+        """Test that the stats endpoints sum counters instead of scanning tickets."""
+        create_test_ticket(user_id=self.users[0].id, assigned_to=self.admins[0].id)
+        create_test_ticket(user_id=self.users[1].id, status='closed')
+        self._login(self.admins[0])
+        with QueryCounter(db.engine) as counter:
+            data = self.client.get('/api/tickets/admin/stats').get_json()
+        self.assertEqual(data, {'total': 2, 'unassigned': 1, 'open': 1, 'in_progress': 0, 'closed': 1, 'cancelled': 0})
+        self.assertTrue(any('ticket_counters' in statement for statement in counter.statements))
+        self.assertFalse(any('FROM tickets' in statement for statement in counter.statements))
+        
+        data = self.client.get('/api/tickets/stats').get_json()
+        self.assertEqual(data['total'], 1)
+    
+    def test_rebuild_repairs_drift(self):
+        """Test that rebuilding recounts from the tickets table."""
+        create_test_ticket(user_id=self.users[0].id)
+        create_test_ticket(user_id=self.users[0].id, priority='high')
+        db.session.execute(TicketCounter.__table__.update().values(ticket_count=42))
+        db.session.execute(TicketCounter.__table__.insert().values(
+            user_id=99, assigned_to=0, status='open', priority='low', ticket_count=7
+        ))
+        rebuild_ticket_counters()
+        db.session.commit()
+        self.assertEqual(self._counters(), self._recount())
+
+
+class TestTicketChanges(RandomTicketMutations, unittest.TestCase):
+    """Test cases for delta sync through /api/tickets/changes."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        
+        self.users = [create_test_user(username=f"user{i}", email=f"user{i}@example.com") for i in range(2)]
+        self.admins = [
+            create_test_user(username=f"admin{i}", email=f"admin{i}@example.com", is_admin=True) for i in range(2)
+        ]
+        
+    def tearDown(self):
+        """Clean up after each test method."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def _changes(self, user, since=None, scope=None):
+        self._login(user)
+        params = {key: value for key, value in (('since', since), ('scope', scope)) if value}
+        response = self.client.get('/api/tickets/changes', query_string=params)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+    
+    def _visible(self, user_id=None):
+        query = Ticket.query
+        if user_id is not None:
+            query = query.filter((Ticket.user_id == user_id) | (Ticket.assigned_to == user_id))
+        return {ticket.id: (ticket.status, ticket.priority, ticket.assigned_to) for ticket in query}
+    
+    def test_changes_require_login(self):
+        """Test that anonymous clients cannot sync."""
+        self.assertEqual(self.client.get('/api/tickets/changes').status_code, 401)
+    
+    def test_first_call_returns_only_a_token(self):
+        """Test that a call without since returns nothing but the next token."""
+        create_test_ticket(user_id=self.users[0].id)
+        data = self._changes(self.users[0])
+        self.assertEqual((data['tickets'], data['removed']), ([], []))
+        self.assertTrue(data['next'])
+        
+        self._login(self.users[0])
+        response = self.client.get('/api/tickets/changes?since=not-a-token')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_random_mutations_sync_exactly(self):
+        """Test that lists kept up to date by deltas match a full reload."""
+        views = [(admin, None, None) for admin in self.admins[:1]]
+        views += [(user, 'mine', user.id) for user in self.users + self.admins]
+        state = {}
+        for user, scope, user_id in views:
+            state[user.id, scope] = [self._changes(user, scope=scope)['next'], {}]
+        
+        rng = random.Random(7)
+        for step in range(80):
+            self._mutate(rng)
+            if step % 4:
+                continue
+            for user, scope, user_id in views:
+                token, tickets = state[user.id, scope]
+                data = self._changes(user, token, scope)
+                for ticket_id in data['removed']:
+                    tickets.pop(ticket_id, None)
+                for ticket in data['tickets']:
+                    tickets[ticket['id']] = (ticket['status'], ticket['priority'], ticket['assigned_to'])
+                state[user.id, scope][0] = data['next']
+                db.session.expire_all()
+                self.assertEqual(tickets, self._visible(user_id), f"step {step}, user {user.id}, scope {scope}")
+    
+    def test_unassigned_ticket_is_removed_for_former_assignee(self):
+        """Test that an assignee losing a ticket gets a removal, and the requester an update."""
+        ticket = create_test_ticket(user_id=self.users[0].id, assigned_to=self.admins[0].id)
+        tokens = {user.id: self._changes(user, scope='mine')['next'] for user in (self.users[0], self.admins[0])}
+        self._login(self.admins[1])
+        self.client.put(f'/api/tickets/admin/assign/{ticket.id}', json={'assigned_to': self.admins[1].id})
+        
+        former = self._changes(self.admins[0], tokens[self.admins[0].id], 'mine')
+        self.assertEqual((former['tickets'], former['removed']), ([], [ticket.id]))
+        requester = self._changes(self.users[0], tokens[self.users[0].id], 'mine')
+        self.assertEqual([t['assigned_to'] for t in requester['tickets']], [self.admins[1].id])
+        self.assertEqual(requester['removed'], [])
+        # Admins syncing every ticket only drop deleted ones
+        self.assertEqual(TicketTombstone.query.count(), 1)
+        everything = self._changes(self.admins[0], tokens[self.admins[0].id])
+        self.assertEqual(([t['id'] for t in everything['tickets']], everything['removed']), ([ticket.id], []))
+    
+    def test_reset_when_token_expired_or_too_many_changes(self):
+        """Test that old tokens and oversized deltas ask the client to reload."""
+        stale = encode_token(datetime.utcnow() - timedelta(days=8))
+        data = self._changes(self.users[0], stale)
+        self.assertTrue(data['reset'])
+        self.assertNotIn('tickets', data)
+        
+        token = self._changes(self.users[0])['next']
+        for i in range(3):
+            create_test_ticket(title=f'T{i}', user_id=self.users[0].id)
+        self.app.config['TICKET_CHANGES_LIMIT'] = 2
+        self.assertTrue(self._changes(self.users[0], token)['reset'])
+        self.app.config['TICKET_CHANGES_LIMIT'] = 3
+        self.assertEqual(len(self._changes(self.users[0], token)['tickets']), 3)
+    
+    def test_changes_read_the_updated_at_index(self):
+        """Test that the delta query is planned on idx_tickets_updated_at."""
+        token = self._changes(self.admins[0])['next']
+        with QueryCounter(db.engine) as counter:
+            self._changes(self.admins[0], token)
+        statement = next(s for s in counter.statements if 'FROM tickets' in s and 'updated_at >' in s)
+        plan = db.session.execute(
+            db.text('EXPLAIN QUERY PLAN ' + statement.replace('?', '1'))
+        ).all()
+        self.assertTrue(any('idx_tickets_updated_at' in row[-1] for row in plan), plan)
@@ -47,6 +47,9 @@ class TestUsersRoutes(unittest.TestCase):
         usernames = [user['username'] for user in data]
         self.assertIn('testuser', usernames)
         self.assertIn('otheruser', usernames)
+        
+        expected = self.app.json.loads(self.app.json.dumps(self.user.to_dict()))
+        self.assertEqual(next(user for user in data if user['id'] == self.user.id), expected)
     
     def test_get_users_unauthenticated(self):
         """Test getting users without authentication."""
@@ -1,10 +1,14 @@
 from flask import Blueprint, request, jsonify, session, render_template, redirect, url_for, flash
-from werkzeug.security import check_password_hash, generate_password_hash
 from models import db, User
-from .auth_utils import login_required
+from passwords import PasswordHashingBusy, needs_rehash, verify_password
+from .rate_limit import client_ip, login_rate_limiter, retry_after_header
+from .auth_utils import login_required, invalidate_current_user, store_identity
 
 auth_bp = Blueprint('auth', __name__)
 
+# The current user is cached on g; start every request without a cached user
+auth_bp.before_app_request(invalidate_current_user)
+
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
@@ -18,11 +22,36 @@ def login():
             username = request.form.get('username')
             password = request.form.get('password')
         
+        # Throttle before any database or hashing work
+        limiter = login_rate_limiter()
+        retry_after = limiter.check(client_ip(), username) if limiter else 0
+        if retry_after:
+            headers = retry_after_header(retry_after)
+            if request.is_json:
+                return jsonify({'error': 'Too many login attempts, try again later'}), 429, headers
+            flash('Too many login attempts, please try again later', 'error')
+            return render_template('auth/login.html'), 429, headers
+        
         user = User.query.filter_by(username=username).first()
         
-        if user and user.check_password(password):
+        try:
+            valid = bool(user and password) and verify_password(user.password_hash, password)
+        except PasswordHashingBusy:
+            if request.is_json:
+                return jsonify({'error': 'Too many login attempts in progress, try again shortly'}), 503, {'Retry-After': '1'}
+            flash('The server is busy, please try again shortly', 'error')
+            return render_template('auth/login.html'), 503, {'Retry-After': '1'}
+        
+        if valid:
+            if needs_rehash(user.password_hash):
+                # Hashing settings changed since this hash was made: upgrade it now we know the password
+                user.set_password(password)
+                db.session.commit()
+            if limiter:
+                limiter.login_succeeded(username)
             session['user_id'] = user.id
             session['username'] = user.username
+            store_identity(user)
             
             if request.is_json:
                 return jsonify({
@@ -33,6 +62,8 @@ def login():
                 flash('Login successful!', 'success')
                 return redirect(url_for('home'))
         else:
+            if limiter:
+                limiter.login_failed(username)
             if request.is_json:
                 return jsonify({'error': 'Invalid username or password'}), 401
             else:
@@ -1,10 +1,22 @@
+from collections import namedtuple
 from functools import wraps
-from flask import session, jsonify, request, redirect, url_for, flash
-from models import User
+from flask import current_app, g, session, jsonify, request, redirect, url_for, flash
+from itsdangerous import BadSignature, URLSafeSerializer
+from models import db, User, security_stamp
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Identity snapshot stored in the session when SESSION_IDENTITY_SNAPSHOT is on
+IDENTITY_VERSION = 1
+Identity = namedtuple('Identity', ['id', 'is_admin', 'is_active'])
+
+# user_id -> (current security stamp or None, expires_at); shared by the worker's threads
+_stamp_cache = {}
+_stamp_cache_lock = threading.Lock()
+
 def _is_api_request():
     # Treat as API if path starts with /api/ OR Accept header prefers JSON OR explicit JSON body
     if request.path.startswith('/api/'):
@@ -23,7 +35,7 @@ def _is_api_request():
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        if 'user_id' not in session or (_snapshot_enabled() and not get_current_identity()):
             if _is_api_request():
                 return jsonify({'error': 'Authentication required'}), 401
             flash('Please log in to access this page.', 'warning')
@@ -40,7 +52,7 @@ def admin_required(f):
             flash('Please log in to access this page.', 'warning')
             return redirect(url_for('auth.login'))
 
-        user = get_current_user()
+        user = get_current_identity()
         if not user or not user.is_admin:
             if _is_api_request():
                 return jsonify({'error': 'Admin privileges required'}), 403
@@ -50,12 +62,109 @@ def admin_required(f):
     return decorated_function
 
 def get_current_user():
+    """Return the logged-in user, loading it at most once per request.
+
+    The user is memoized on ``flask.g`` together with the session user id it
+    was loaded for, so a login or logout within the same request is honoured.
+    """
     try:
         if 'user_id' in session:
             user_id = session['user_id']
+            cached = g.get('_current_user')
+            if cached is not None and cached[0] == user_id:
+                return cached[1]
             user = User.query.get(user_id)
+            g._current_user = (user_id, user)
             return user
         return None
     except Exception as e:
         logger.error(f"Error in get_current_user: {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+def invalidate_current_user():
+    """Drop the memoized user so the next get_current_user() reloads it."""
+    g.pop('_current_user', None)
+    g.pop('_current_identity', None)
+
+def _snapshot_enabled():
+    return current_app.config.get('SESSION_IDENTITY_SNAPSHOT', False)
+
+def _identity_serializer():
+    return URLSafeSerializer(current_app.secret_key, salt='identity-snapshot')
+
+def store_identity(user):
+    """Save a signed identity snapshot for ``user`` in the session (snapshot mode only)."""
+    if not _snapshot_enabled():
+        return
+    session['identity'] = _identity_serializer().dumps({
+        'v': IDENTITY_VERSION,
+        'id': user.id,
+        'admin': bool(user.is_admin),
+        'active': bool(user.is_active),
+        'stamp': user.security_stamp
+    })
+    forget_security_stamp(user.id)
+
+def forget_security_stamp(user_id):
+    """Drop the cached stamp so the next request re-checks it against the database."""
+    with _stamp_cache_lock:
+        _stamp_cache.pop(user_id, None)
+
+def _current_security_stamp(user_id):
+    now = time.monotonic()
+    with _stamp_cache_lock:
+        cached = _stamp_cache.get(user_id)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    row = db.session.query(User.password_hash, User.is_active, User.is_admin).filter_by(id=user_id).first()
+    stamp = security_stamp(*row) if row else None
+    ttl = current_app.config.get('IDENTITY_STAMP_TTL', 30)
+    with _stamp_cache_lock:
+        _stamp_cache[user_id] = (stamp, now + ttl)
+    return stamp
+
+def _load_identity_snapshot():
+    """Return the session snapshot as an Identity, None if revoked, or False if absent."""
+    token = session.get('identity')
+    if not token:
+        return False
+    try:
+        data = _identity_serializer().loads(token)
+    except BadSignature:
+        logger.warning("Rejected identity snapshot with a bad signature")
+        return None
+    if data.get('v') != IDENTITY_VERSION:
+        return False
+    if data['id'] != session.get('user_id') or not data['active']:
+        return None
+    if _current_security_stamp(data['id']) != data['stamp']:
+        return None
+    return Identity(data['id'], data['admin'], data['active'])
+
+def get_current_identity():
+    """Return an object with ``id``, ``is_admin`` and ``is_active`` for the logged-in user.
+
+    In snapshot mode this is answered from the signed session snapshot and a
+    stamp check cached for IDENTITY_STAMP_TTL seconds, so hot read paths skip
+    the user lookup. A revoked snapshot logs the session out. Otherwise, and
+    for sessions created before snapshot mode was enabled, it is the User.
+    """
+    user_id = session.get('user_id')
+    cached = g.get('_current_identity')
+    if cached is not None and cached[0] == user_id:
+        return cached[1]
+
+    identity = False
+    if _snapshot_enabled() and user_id is not None:
+        try:
+            identity = _load_identity_snapshot()
+        except Exception as e:
+            # Fall back to the user lookup rather than logging everyone out
+            logger.error(f"Error in get_current_identity: {str(e)}")
+        if identity is None:
+            session.clear()
+    if identity is False:
+        identity = get_current_user()
+    g._current_identity = (session.get('user_id'), identity)
+    return identity
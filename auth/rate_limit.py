@@ -0,0 +1,204 @@
+"""Login rate limiting: token buckets per client IP and per username.
+
+Every login attempt takes a token from its IP's bucket, and is refused
+while its username's bucket is empty, before any database or password
+hashing work; an empty bucket means 429 with ``Retry-After``. Only failed
+password checks take from the username's bucket: refused attempts do not
+keep an account locked, and a successful login refills it.
+Buckets refill continuously (``limit`` tokens per ``period`` seconds), so the
+allowance slides with time instead of resetting on window boundaries.
+
+Buckets live in a ``RateLimitBackend``: in-process memory by default, or a
+``KVRateLimitBackend`` over a shared ``kvstore.KVStore`` so every worker
+sees the same counts. Install another backend with ``init_rate_limit``.
+"""
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from flask import current_app, request
+from kvstore import LocalKVStore
+
+EXTENSION_KEY = 'login_rate_limiter'
+
+
+def _refill(state, now, capacity, period):
+    """Tokens in a bucket ``(tokens, updated_at)`` at ``now``."""
+    tokens, updated_at = state if state else (capacity, now)
+    return min(capacity, tokens + max(0.0, now - updated_at) * capacity / period)
+
+
+def _wait(tokens, capacity, period):
+    """Seconds until a bucket holding ``tokens`` has a whole one."""
+    return 0.0 if tokens >= 1 else (1 - tokens) * period / capacity
+
+
+def _take(state, now, capacity, period):
+    """Apply one attempt to a bucket ``(tokens, updated_at)``; return (new state, retry_after)."""
+    tokens = _refill(state, now, capacity, period)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), _wait(tokens, capacity, period)
+
+
+class RateLimitBackend(ABC):
+    """Where buckets are kept. Implementations must apply ``consume`` atomically."""
+
+    @abstractmethod
+    def consume(self, key, capacity, period):
+        """Take a token from ``key``'s bucket; return 0 if allowed, else seconds until one is available."""
+
+    @abstractmethod
+    def peek(self, key, capacity, period):
+        """Like ``consume``, but leave the bucket as it is."""
+
+    @abstractmethod
+    def reset(self, key):
+        """Refill ``key``'s bucket."""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Buckets in a per-process dict, least recently used dropped beyond ``max_keys``."""
+
+    def __init__(self, max_keys=100000, clock=time.monotonic):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+        self._clock = clock
+
+    def consume(self, key, capacity, period):
+        with self._lock:
+            state, retry_after = _take(self._buckets.get(key), self._clock(), capacity, period)
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def peek(self, key, capacity, period):
+        with self._lock:
+            return _wait(_refill(self._buckets.get(key), self._clock(), capacity, period), capacity, period)
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+class KVRateLimitBackend(RateLimitBackend):
+    """Buckets in a shared KVStore, updated with compare-and-set.
+
+    Keys expire once a bucket would be full again, so idle clients cost nothing.
+    """
+
+    def __init__(self, store, prefix='ratelimit:', clock=time.time, max_retries=10):
+        self._store = store
+        self._prefix = prefix
+        # Wall-clock time: bucket timestamps are compared across hosts
+        self._clock = clock
+        self._max_retries = max_retries
+
+    def consume(self, key, capacity, period):
+        key = self._prefix + key
+        for _ in range(self._max_retries):
+            state, version = self._store.get(key)
+            state, retry_after = _take(state, self._clock(), capacity, period)
+            if self._store.compare_and_set(key, state, version, period):
+                return retry_after
+        # Heavy contention on one key is itself a sign of a burst
+        return period / capacity
+
+    def peek(self, key, capacity, period):
+        state, _ = self._store.get(self._prefix + key)
+        return _wait(_refill(state, self._clock(), capacity, period), capacity, period)
+
+    def reset(self, key):
+        self._store.delete(self._prefix + key)
+
+
+class LoginRateLimiter:
+    """Per-IP and per-username login limits over one backend."""
+
+    def __init__(self, backend, ip_limit=20, ip_period=60, username_limit=5, username_period=300):
+        self.backend = backend
+        self.ip_limit, self.ip_period = ip_limit, ip_period
+        self.username_limit, self.username_period = username_limit, username_period
+
+    def check(self, ip, username):
+        """Count an attempt against its IP; return 0 if it may proceed, else the seconds to wait."""
+        retry_after = self.backend.consume(f'ip:{ip}', self.ip_limit, self.ip_period)
+        if retry_after or not username:
+            return retry_after
+        return self.backend.peek(self._username_key(username), self.username_limit, self.username_period)
+
+    def login_failed(self, username):
+        if username:
+            self.backend.consume(self._username_key(username), self.username_limit, self.username_period)
+
+    def login_succeeded(self, username):
+        self.backend.reset(self._username_key(username))
+
+    @staticmethod
+    def _username_key(username):
+        return f'user:{str(username).strip().lower()}'
+
+
+def _backend_from_config(config):
+    storage = config.get('RATELIMIT_STORAGE', 'memory')
+    if storage == 'memory':
+        return MemoryRateLimitBackend()
+    if storage == 'local-kv':
+        return KVRateLimitBackend(LocalKVStore())
+    raise ValueError(f"Unknown RATELIMIT_STORAGE: {storage}")
+
+
+def _build_limiter(config, backend=None):
+    return LoginRateLimiter(
+        backend or _backend_from_config(config),
+        ip_limit=config.get('LOGIN_IP_LIMIT', 20),
+        ip_period=config.get('LOGIN_IP_PERIOD', 60),
+        username_limit=config.get('LOGIN_USERNAME_LIMIT', 5),
+        username_period=config.get('LOGIN_USERNAME_PERIOD', 300),
+    )
+
+
+def init_rate_limit(app, backend=None):
+    """Install the login rate limiter, on ``backend`` or the one RATELIMIT_STORAGE names."""
+    limiter = app.extensions[EXTENSION_KEY] = _build_limiter(app.config, backend)
+    return limiter
+
+
+def login_rate_limiter():
+    """The app's limiter, or None when RATELIMIT_ENABLED is off."""
+    app = current_app._get_current_object()
+    if not app.config.get('RATELIMIT_ENABLED', True):
+        return None
+    limiter = app.extensions.get(EXTENSION_KEY)
+    if limiter is None:
+        # First login on this app; setdefault keeps one limiter if threads race here
+        limiter = app.extensions.setdefault(EXTENSION_KEY, _build_limiter(app.config))
+    return limiter
+
+
+def _strip_port(address):
+    """``1.2.3.4:5678`` -> ``1.2.3.4``, ``[2001:db8::1]:443`` -> ``2001:db8::1``; bare IPv6 is left alone."""
+    if address.startswith('['):
+        return address[1:].split(']', 1)[0]
+    if address.count(':') == 1:
+        return address.split(':', 1)[0]
+    return address
+
+
+def client_ip():
+    """The client address, skipping RATELIMIT_PROXY_COUNT trusted proxies in X-Forwarded-For."""
+    proxies = current_app.config.get('RATELIMIT_PROXY_COUNT', 0)
+    if proxies:
+        forwarded = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+        if len(forwarded) >= proxies:
+            # Azure App Service appends the client's port
+            return _strip_port(forwarded[-proxies])
+    return request.remote_addr or 'unknown'
+
+
+def retry_after_header(seconds):
+    return {'Retry-After': str(max(1, math.ceil(seconds)))}
@@ -0,0 +1,85 @@
+"""
+Payload size and CPU cost of response compression.
+
+Builds an /api/tickets/admin/all page through the real app (SQLite in
+memory, seeded tickets with realistic descriptions) and compresses its JSON
+body at each gzip level and, when installed, brotli quality.
+
+Usage:
+    python benchmarks/compression_bench.py --tickets 200 --iterations 200
+"""
+import argparse
+import gzip
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+WORDS = (
+    'printer toner vpn laptop password reset email outlook calendar invite '
+    'screen monitor docking station wifi network drive share permission access '
+    'error crash slow update install license teams meeting audio camera'
+).split()
+
+
+def build_payload(tickets):
+    """Seed tickets and return the raw JSON body of one admin list page."""
+    from _test.conftest import create_test_app, create_test_user, create_test_ticket
+    from models import db
+
+    random.seed(1)
+    app = create_test_app()
+    app.config['TICKETS_MAX_PAGE_SIZE'] = tickets
+    with app.app_context():
+        db.create_all()
+        user = create_test_user()
+        admin = create_test_user(username='admin', email='admin@example.com', is_admin=True)
+        for i in range(tickets):
+            description = ' '.join(random.choice(WORDS) for _ in range(random.randint(20, 80)))
+            create_test_ticket(title=f"{random.choice(WORDS).title()} issue {i}", description=description,
+                               user_id=user.id, assigned_to=admin.id if i % 2 else None)
+
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin.id
+        return client.get(f'/api/tickets/admin/all?limit={tickets}').get_data()
+
+
+def measure(name, compress, data, iterations):
+    started = time.process_time()
+    for _ in range(iterations):
+        compressed = compress(data)
+    cpu_ms = (time.process_time() - started) * 1000 / iterations
+    print(f"| {name} | {len(compressed):,} | {len(data) / len(compressed):.1f}x | {cpu_ms:.2f} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    data = build_payload(args.tickets)
+    print(f"{args.tickets} tickets, {len(data):,} bytes of JSON\n")
+    print("| Encoding | Bytes | Ratio | CPU ms/response |")
+    print("|----------|------:|------:|----------------:|")
+    print(f"| identity | {len(data):,} | 1.0x | 0.00 |")
+    for level in (1, 6, 9):
+        measure(f"gzip {level}", lambda d: gzip.compress(d, compresslevel=level, mtime=0), data, args.iterations)
+    if brotli is None:
+        print("\nbrotli not installed; skipping (pip install brotli)")
+        return
+    for quality in (1, 4, 5, 6, 11):
+        iterations = max(1, args.iterations // 20) if quality == 11 else args.iterations
+        measure(f"brotli {quality}", lambda d: brotli.compress(d, quality=quality), data, iterations)
+
+
+if __name__ == '__main__':
+    main()
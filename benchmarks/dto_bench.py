@@ -0,0 +1,116 @@
+"""
+Memory and throughput of ticket list serialization on 100k rows.
+
+Seeds an in-memory SQLite database and loads every ticket three ways:
+ORM instances with joined names and to_dict() (the previous list path),
+projected Row tuples turned into dicts, and Row tuples turned into
+TicketDTOs (the current list path). Reports rows/s for loading and for
+loading plus encoding, then, in a second traced run, the peak memory while
+loading and what the result list keeps alive.
+
+Usage:
+    python benchmarks/dto_bench.py --tickets 100000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import joinedload
+
+
+def seed(db, User, Ticket, count):
+    random.seed(1)
+    users = [{
+        'username': f"user{i}", 'email': f"user{i}@example.com", 'password_hash': 'x',
+        'first_name': f"First{i}", 'last_name': f"Last{i}", 'is_active': True, 'is_admin': i < 5,
+        'created_at': datetime(2024, 1, 1),
+    } for i in range(50)]
+    db.session.execute(User.__table__.insert(), users)
+    start = datetime(2024, 1, 1)
+    tickets = []
+    for i in range(count):
+        created_at = start + timedelta(seconds=i)
+        tickets.append({
+            'title': f"Ticket {i}: printer out of toner",
+            'description': 'The printer on the second floor is out of toner again. ' * random.randint(1, 4),
+            'status': random.choice(('open', 'in_progress', 'closed')),
+            'priority': random.choice(('low', 'medium', 'high', 'urgent')),
+            'user_id': random.randint(1, 50),
+            'assigned_to': random.choice((None, 1, 2, 3)),
+            'created_at': created_at,
+            'updated_at': created_at,
+        })
+    db.session.execute(Ticket.__table__.insert(), tickets)
+    db.session.commit()
+
+
+def measure(name, load, encode, count):
+    from models import db
+    db.session.expunge_all()
+    gc.collect()
+    started = time.perf_counter()
+    items = load()
+    loaded = time.perf_counter() - started
+    started = time.perf_counter()
+    encode(items)
+    encoded = time.perf_counter() - started
+    assert len(items) == count
+    del items
+
+    # Memory in a separate run: tracing slows allocation down
+    db.session.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    items = load()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"| {name} | {count / loaded:,.0f} | {count / (loaded + encoded):,.0f} "
+          f"| {peak / 2 ** 20:.0f} | {current / 2 ** 20:.0f} | {current / count:.0f} |")
+    del items
+    db.session.expunge_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=100000)
+    args = parser.parse_args()
+
+    from _test.conftest import create_test_app
+    from models import db, User, Ticket, ticket_projection, ticket_dtos
+
+    app = create_test_app()
+    with app.app_context():
+        db.create_all()
+        seed(db, User, Ticket, args.tickets)
+        encode = app.json.dumps
+        print(f"{args.tickets:,} tickets, SQLite, {type(app.json).__name__}\n")
+        print("| Path | rows/s (load) | rows/s (load + encode) | peak MiB | retained MiB | bytes/row |")
+        print("|------|--------------:|-----------------------:|---------:|-------------:|----------:|")
+
+        def orm_to_dict():
+            query = Ticket.query.options(
+                joinedload(Ticket.user).load_only(User.first_name, User.last_name),
+                joinedload(Ticket.assignee).load_only(User.first_name, User.last_name),
+            )
+            return [ticket.to_dict() for ticket in query]
+
+        def rows_to_dicts():
+            return [dict(row._mapping) for row in ticket_projection(Ticket.query)]
+
+        def rows_to_dtos():
+            return ticket_dtos(ticket_projection(Ticket.query))
+
+        measure('ORM + to_dict()', orm_to_dict, encode, args.tickets)
+        measure('Row -> dict', rows_to_dicts, encode, args.tickets)
+        measure('Row -> TicketDTO', rows_to_dtos, encode, args.tickets)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+JSON encode throughput for ticket lists.
+
+Serializes 10k ticket dicts (the shape of Ticket.to_dict) with Flask's
+default provider, as before (to_dict formatting each timestamp with
+isoformat(), keys sorted), and with the providers in json_provider.py, which
+take the datetimes as they are.
+
+Usage:
+    python benchmarks/json_bench.py --tickets 10000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+import json_provider
+from json_provider import IsoJSONProvider, OrjsonProvider
+
+
+def make_tickets(count):
+    random.seed(1)
+    start = datetime(2024, 1, 1)
+    tickets = []
+    for i in range(count):
+        created_at = start + timedelta(seconds=random.randint(0, 10 ** 7), microseconds=random.randint(0, 999999))
+        tickets.append({
+            'id': i + 1,
+            'title': f"Ticket {i}: printer out of toner",
+            'description': 'The printer on the second floor is out of toner again. ' * random.randint(1, 4),
+            'status': random.choice(('open', 'in_progress', 'closed')),
+            'priority': random.choice(('low', 'medium', 'high', 'urgent')),
+            'user_id': random.randint(1, 50),
+            'assigned_to': random.choice((None, 1, 2, 3)),
+            'assignee_name': random.choice((None, 'Ada Admin', 'Grace Hopper')),
+            'user_name': 'Test User',
+            'created_at': created_at,
+            'updated_at': created_at + timedelta(hours=1),
+        })
+    return tickets
+
+
+def with_isoformat(tickets):
+    """What to_dict used to do for every ticket."""
+    return [
+        dict(ticket, created_at=ticket['created_at'].isoformat(), updated_at=ticket['updated_at'].isoformat())
+        for ticket in tickets
+    ]
+
+
+def measure(name, encode, tickets, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = encode(tickets)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"| {name} | {best * 1000:.1f} | {len(tickets) / best:,.0f} | {len(body):,} |")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    tickets = make_tickets(args.tickets)
+    print(f"{args.tickets:,} tickets, best of {args.repeat}\n")
+    print("| Provider | ms | tickets/s | bytes |")
+    print("|----------|---:|----------:|------:|")
+
+    flask_default = DefaultJSONProvider(app)
+    baseline = measure('Flask default + isoformat()', lambda t: flask_default.dumps(with_isoformat(t)),
+                       tickets, args.repeat)
+    stdlib = IsoJSONProvider(app)
+    measure('IsoJSONProvider (stdlib)', stdlib.dumps, tickets, args.repeat)
+    if json_provider.orjson is None:
+        print("\norjson not installed; skipping (pip install orjson)")
+        return
+    fast = OrjsonProvider(app)
+    best = measure('OrjsonProvider', fast.dumps, tickets, args.repeat)
+    print(f"\norjson speedup over the previous path: {baseline / best:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+"""
+main:app with a fixed delay added to every request.
+
+Local SQLite answers in microseconds, so the blocking time a worker spends
+waiting on a remote Postgres server never shows up in local load tests.
+Serving this module instead of main:app simulates that wait:
+
+    BENCH_LATENCY_MS=20 gunicorn --config gunicorn.conf.py benchmarks.latency_app:app
+"""
+import os
+import time
+from main import app as flask_app
+
+LATENCY = int(os.environ.get('BENCH_LATENCY_MS', 20)) / 1000
+
+
+def app(environ, start_response):
+    time.sleep(LATENCY)
+    return flask_app(environ, start_response)
@@ -0,0 +1,98 @@
+"""
+Load test for the ticket list endpoint.
+
+Registers a throwaway user against a running server, seeds tickets, then
+issues concurrent GET requests and reports throughput and latency.
+
+Usage:
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --requests 2000 --concurrency 16
+"""
+import argparse
+import http.cookiejar
+import json
+import statistics
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+def make_opener():
+    jar = http.cookiejar.CookieJar()
+    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+
+
+def post_json(opener, url, payload):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={'Content-Type': 'application/json', 'Accept': 'application/json'},
+        method='POST'
+    )
+    with opener.open(request) as response:
+        return json.loads(response.read())
+
+
+def setup_user(base_url, tickets):
+    opener = make_opener()
+    name = f"load_{uuid.uuid4().hex[:8]}"
+    password = 'loadtest-password'
+    post_json(opener, f"{base_url}/api/auth/register", {
+        'username': name,
+        'email': f"{name}@example.com",
+        'password': password,
+        'first_name': 'Load',
+        'last_name': 'Test'
+    })
+    post_json(opener, f"{base_url}/api/auth/login", {'username': name, 'password': password})
+    for i in range(tickets):
+        post_json(opener, f"{base_url}/api/tickets/", {
+            'title': f"Load test ticket {i}",
+            'description': 'Seeded by benchmarks/load_test.py ' * 4
+        })
+    return opener
+
+
+def run(base_url, path, total, concurrency, opener):
+    url = f"{base_url}{path}"
+
+    def fetch(_):
+        start = time.perf_counter()
+        with opener.open(url) as response:
+            response.read()
+            status = response.status
+        return time.perf_counter() - start, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(fetch, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status != 200)
+    return {
+        'requests': total,
+        'concurrency': concurrency,
+        'errors': errors,
+        'seconds': round(elapsed, 2),
+        'requests_per_second': round(total / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the ticket list endpoint')
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running app')
+    parser.add_argument('--path', default='/api/tickets/', help='Endpoint to request')
+    parser.add_argument('--requests', type=int, default=2000, help='Total number of requests')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--tickets', type=int, default=50, help='Tickets to seed for the test user')
+    args = parser.parse_args()
+
+    opener = setup_user(args.url, args.tickets)
+    print(json.dumps(run(args.url, args.path, args.requests, args.concurrency, opener), indent=2))
+
+
+if __name__ == '__main__':
+    main()
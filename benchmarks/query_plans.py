@@ -0,0 +1,396 @@
+"""
+Query plans of the route handlers: sequential scans and unused indexes.
+
+Seeds a database with users and tickets, calls every route in ROUTES
+through the app while recording the SQL it runs, and explains each
+statement straight after its request: EXPLAIN (ANALYZE, FORMAT JSON) on
+PostgreSQL, inside a transaction that is rolled back so writes are not
+applied, and EXPLAIN QUERY PLAN on SQLite. Reports each statement's scans,
+flags full scans of tables with at least --min-rows rows and lists the
+indexes that no plan used.
+
+Routes marked ``selective`` read a bounded slice of tickets (one user's
+list, one ticket, a search) and must stay on indexes as tickets grow; with
+--check, a full scan in one of them exits with status 1. Admin-wide routes
+(every ticket, exports, all users) are reported but not failed.
+
+SQLite in memory is used by default, with the schema from the models;
+--setup-indexes adds the indexes from setup/complete_database_setup.sql.
+--database-url drops and recreates every table: only point it at a
+scratch database.
+
+Usage:
+    python benchmarks/query_plans.py --tickets 50000
+    python benchmarks/query_plans.py --tickets 50000 --setup-indexes
+    python benchmarks/query_plans.py --database-url postgresql://localhost/ticketing_bench --tickets 200000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, inspect, text
+
+SETUP_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'setup', 'complete_database_setup.sql')
+
+Route = namedtuple('Route', 'role method path body selective')
+Scan = namedtuple('Scan', 'table index full')
+PlannedStatement = namedtuple('PlannedStatement', 'route statement ms plan scans')
+
+
+def route(role, method, path, body=None, selective=True):
+    return Route(role, method, path, body, selective)
+
+
+# Placeholders: {user} and {ticket} are the regular user and one of their
+# tickets, {since} a recent sync token and {cursor} a page cursor. Writes
+# come last, as they change what the reads would see.
+ROUTES = [
+    route('user', 'GET', '/api/tickets/'),
+    route('user', 'GET', '/api/tickets/?cursor={cursor}'),
+    route('user', 'GET', '/api/tickets/?view=summary'),
+    route('user', 'GET', '/api/tickets/stats'),
+    route('user', 'GET', '/api/tickets/changes?since={since}'),
+    route('user', 'GET', '/api/tickets/search?q=printer'),
+    route('user', 'GET', '/api/tickets/{ticket}'),
+    route('user', 'GET', '/api/tickets/{ticket}/history'),
+    route('user', 'GET', '/api/users/{user}'),
+    route('user', 'GET', '/api/users/{user}/tickets'),
+    route('admin', 'GET', '/api/tickets/admin/all', selective=False),
+    route('admin', 'GET', '/api/tickets/admin/all?cursor={cursor}', selective=False),
+    route('admin', 'GET', '/api/tickets/admin/all?status=open&priority=urgent', selective=False),
+    route('admin', 'GET', '/api/tickets/admin/all?assigned_to=unassigned', selective=False),
+    route('admin', 'GET', '/api/tickets/admin/stats', selective=False),
+    route('admin', 'GET', '/api/tickets/admin/users', selective=False),
+    route('admin', 'GET', '/api/tickets/admin/export?format=csv', selective=False),
+    route('admin', 'GET', '/api/tickets/changes?since={since}'),
+    route('admin', 'GET', '/api/tickets/search?q=printer'),
+    route('admin', 'GET', '/api/users/', selective=False),
+    route('user', 'PUT', '/api/tickets/{ticket}', {'priority': 'urgent'}),
+    route('admin', 'PUT', '/api/tickets/admin/assign/{ticket}', {'assigned_to': 1}),
+    route('admin', 'POST', '/api/tickets/admin/bulk', {'ticket_ids': '{tickets}', 'operation': 'status',
+                                                       'status': 'closed'}),
+    route('user', 'POST', '/api/tickets/', {'title': 'Printer jam', 'description': 'Tray 2'}),
+    route('admin', 'DELETE', '/api/tickets/{ticket}'),
+    route('user', 'DELETE', '/api/users/{user}'),
+]
+
+ADMINS = 5
+
+WORDS = (
+    'printer toner vpn laptop password reset email outlook calendar invite '
+    'screen monitor docking station wifi network drive share permission access'
+).split()
+
+
+def seed(db, users, tickets):
+    """Insert ``users`` users (the first ADMINS are admins), ``tickets`` tickets and their created events."""
+    from models import User, Ticket, TicketAuditEvent
+
+    random.seed(1)
+    db.session.execute(User.__table__.insert(), [{
+        'username': f"user{i}", 'email': f"user{i}@example.com", 'password_hash': 'x',
+        'first_name': f"First{i}", 'last_name': f"Last{i}", 'is_active': True, 'is_admin': i < ADMINS,
+        'created_at': datetime(2024, 1, 1),
+    } for i in range(users)])
+    start = datetime(2024, 1, 1)
+    rows = []
+    for i in range(tickets):
+        created_at = start + timedelta(minutes=i)
+        rows.append({
+            'title': ' '.join(random.sample(WORDS, 4)),
+            'description': ' '.join(random.choices(WORDS, k=random.randint(10, 40))),
+            'status': random.choice(('open', 'in_progress', 'closed', 'cancelled')),
+            'priority': random.choice(('low', 'medium', 'high', 'urgent')),
+            'user_id': random.randint(ADMINS + 1, users),
+            # Most tickets are picked up by one of the admins
+            'assigned_to': random.choice((None,) + tuple(range(1, ADMINS + 1))),
+            'created_at': created_at,
+            'updated_at': created_at,
+        })
+    for batch in range(0, tickets, 10000):
+        db.session.execute(Ticket.__table__.insert(), rows[batch:batch + 10000])
+    db.session.execute(TicketAuditEvent.__table__.insert(), [{
+        'ticket_id': i + 1, 'actor_id': row['user_id'], 'action': 'created', 'changes': {},
+        'created_at': row['created_at'],
+    } for i, row in enumerate(rows)])
+    db.session.commit()
+
+
+def create_setup_indexes(connection):
+    """Create the indexes declared in the setup SQL that the schema does not have yet."""
+    statements = re.findall(r'^CREATE INDEX (\w+) ON (\w+)\s*(USING \w+ )?\((.+)\);$',
+                            open(SETUP_SQL).read(), re.MULTILINE)
+    tables = set(inspect(connection).get_table_names())
+    for name, table, using, columns in statements:
+        if table not in tables or (using and connection.dialect.name != 'postgresql'):
+            continue
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} {using or ''}({columns})"))
+
+
+def build_app(database_url, users=200, tickets=20000, setup_indexes=False):
+    """Create the app on ``database_url`` and (re)build and seed its schema."""
+    from _test.conftest import TestConfig
+    from main import create_app
+    from models import db
+
+    class PlanConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = database_url
+
+    app = create_app(PlanConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        if setup_indexes:
+            with db.engine.begin() as connection:
+                create_setup_indexes(connection)
+        seed(db, users, tickets)
+        with db.engine.begin() as connection:
+            connection.execute(text('ANALYZE'))
+    return app
+
+
+def _sqlite_scans(rows):
+    scans = []
+    for _, _, _, detail in rows:
+        match = re.match(r'(SCAN|SEARCH) (\w+)', detail)
+        if not match or 'VIRTUAL TABLE' in detail:
+            continue
+        # SQLAlchemy aliases (users_1) name the table they stand for
+        table = re.sub(r'_\d+$', '', match.group(2))
+        index = re.search(r'INDEX (\w+)', detail)
+        scans.append(Scan(table, index and index.group(1), match.group(1) == 'SCAN' and 'USING' not in detail))
+    return scans
+
+
+def _postgresql_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _postgresql_nodes(child)
+
+
+def _postgresql_scans(plan, partitions):
+    scans = []
+    for node in _postgresql_nodes(plan['Plan']):
+        # Bitmap index scans name only the index; their heap scan names the table
+        table, index = node.get('Relation Name'), node.get('Index Name')
+        if table or index:
+            scans.append(Scan(partitions.get(table, table), partitions.get(index, index),
+                              node['Node Type'] == 'Seq Scan'))
+    return scans
+
+
+def explain(connection, statement, parameters, partitions=None):
+    """Return (plan text, scans) for one captured statement.
+
+    On PostgreSQL the statement runs under EXPLAIN ANALYZE, and the caller
+    rolls ``connection`` back. ``partitions`` maps partition tables and
+    indexes to their parents.
+    """
+    if connection.dialect.name == 'postgresql':
+        (result,) = connection.exec_driver_sql(
+            'EXPLAIN (ANALYZE, FORMAT JSON) ' + statement, parameters
+        ).one()
+        plan = (json.loads(result) if isinstance(result, str) else result)[0]
+        nodes = [
+            f"{node['Node Type']} {node.get('Index Name') or node.get('Relation Name') or ''}".strip()
+            + f" (rows={node['Actual Rows']})"
+            for node in _postgresql_nodes(plan['Plan']) if 'Scan' in node['Node Type']
+        ]
+        return '; '.join(nodes), _postgresql_scans(plan, partitions or {})
+    rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+    return '; '.join(row[-1] for row in rows), _sqlite_scans(rows)
+
+
+def partition_parents(connection):
+    """Map each partition (and partition index) on PostgreSQL to its parent."""
+    if connection.dialect.name != 'postgresql':
+        return {}
+    return dict(connection.execute(text(
+        "SELECT child.relname, parent.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent"
+    )).all())
+
+
+def _placeholders():
+    from models import User, Ticket
+    from routes.changes import encode_token
+    from routes.pagination import encode_cursor
+
+    user = User.query.filter_by(is_admin=False).order_by(User.id).first()
+    tickets = Ticket.query.filter_by(user_id=user.id).order_by(Ticket.id).limit(5).all()
+    middle = Ticket.query.order_by(Ticket.id).offset(Ticket.query.count() // 2).first()
+    return {
+        'user': user.id, 'ticket': tickets[0].id, 'tickets': [ticket.id for ticket in tickets],
+        'since': encode_token(datetime.utcnow() - timedelta(minutes=1)),
+        'cursor': encode_cursor(middle.created_at, middle.id),
+    }, {'user': user.id, 'admin': 1}
+
+
+def _fill(value, values):
+    if isinstance(value, dict):
+        return {key: _fill(item, values) for key, item in value.items()}
+    if isinstance(value, str) and value.startswith('{') and value.endswith('}') and value[1:-1] in values:
+        return values[value[1:-1]]
+    return value
+
+
+def run_routes(app, routes=ROUTES):
+    """Call each route and explain the statements it ran; return PlannedStatements."""
+    from models import db
+
+    with app.app_context():
+        values, logins = _placeholders()
+        engine = db.engine
+        with engine.connect() as connection:
+            partitions = partition_parents(connection)
+
+    captured = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info['query_plans_started'] = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = (time.perf_counter() - conn.info.pop('query_plans_started')) * 1000
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ('SELECT', 'WITH', 'UPDATE', 'DELETE'):
+            captured.append((statement, parameters, elapsed))
+
+    planned = []
+    event.listen(engine, 'before_cursor_execute', before)
+    event.listen(engine, 'after_cursor_execute', after)
+    try:
+        for entry in routes:
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess['user_id'] = logins[entry.role]
+            path = entry.path.format(**values)
+            del captured[:]
+            response = client.open(path, method=entry.method, json=_fill(entry.body, values))
+            response.get_data()
+            if response.status_code >= 400:
+                raise RuntimeError(f"{entry.method} {path}: {response.status_code} {response.get_data(as_text=True)}")
+            # Copied first: the EXPLAINs below are recorded too
+            statements = list(captured)
+            with app.app_context(), engine.connect() as connection:
+                for statement, parameters, ms in statements:
+                    plan, scans = explain(connection, statement, parameters, partitions)
+                    connection.rollback()
+                    planned.append(PlannedStatement(entry, statement, ms, plan, scans))
+    finally:
+        event.remove(engine, 'before_cursor_execute', before)
+        event.remove(engine, 'after_cursor_execute', after)
+    return planned
+
+
+def table_rows(app):
+    """Row count of every table in the schema."""
+    from models import db
+
+    with app.app_context(), db.engine.connect() as connection:
+        return {table: connection.execute(text(f'SELECT count(*) FROM {table}')).scalar()
+                for table in inspect(connection).get_table_names()}
+
+
+def full_scans(planned, rows, min_rows=1000, selective_only=False):
+    """(PlannedStatement, table) for each full scan of a table with ``min_rows`` or more rows."""
+    return [
+        (statement, scan.table) for statement in planned for scan in statement.scans
+        if scan.full and rows.get(scan.table, 0) >= min_rows
+        and (statement.route.selective or not selective_only)
+    ]
+
+
+def declared_indexes(app):
+    """{table: [index names]} for the secondary indexes in the database."""
+    from models import db
+
+    with app.app_context(), db.engine.connect() as connection:
+        inspector = inspect(connection)
+        return {
+            table: [index['name'] for index in inspector.get_indexes(table)
+                    if not index.get('duplicates_constraint') and not index['name'].startswith('sqlite_')]
+            for table in inspector.get_table_names()
+        }
+
+
+def unused_indexes(planned, indexes):
+    """(table, index) for each declared index no plan used."""
+    used = {scan.index for statement in planned for scan in statement.scans}
+    return [(table, name) for table, names in sorted(indexes.items()) for name in sorted(names) if name not in used]
+
+
+def _cell(value, width=None):
+    value = ' '.join(str(value).split()).replace('|', '\\|')
+    return value if width is None or len(value) <= width else value[:width - 3] + '...'
+
+
+def print_report(planned, rows, indexes, min_rows):
+    print("| Route | Statement | Plan | ms |")
+    print("|-------|-----------|------|---:|")
+    for statement in planned:
+        entry = statement.route
+        print(f"| {entry.method} {entry.path} ({entry.role}) | {_cell(statement.statement, 80)} "
+              f"| {_cell(statement.plan)} | {statement.ms:.2f} |")
+
+    print("\n### Full scans\n")
+    scans = full_scans(planned, rows, min_rows)
+    if scans:
+        print("| Route | Table | Rows | Selective route |")
+        print("|-------|-------|-----:|-----------------|")
+        for statement, table in scans:
+            entry = statement.route
+            print(f"| {entry.method} {entry.path} | {table} | {rows[table]:,} | {'yes' if entry.selective else 'no'} |")
+    else:
+        print(f"None on tables with {min_rows:,} rows or more.")
+
+    print("\n### Unused indexes\n")
+    unused = unused_indexes(planned, indexes)
+    if unused:
+        print("| Table | Index |")
+        print("|-------|-------|")
+        for table, name in unused:
+            print(f"| {table} | {name} |")
+    else:
+        print("None.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--database-url', default='sqlite:///:memory:',
+                        help='scratch database; every table is dropped and recreated')
+    parser.add_argument('--setup-indexes', action='store_true',
+                        help='also create the indexes from setup/complete_database_setup.sql')
+    parser.add_argument('--min-rows', type=int, default=1000,
+                        help='flag full scans of tables with at least this many rows')
+    parser.add_argument('--check', action='store_true',
+                        help='exit with status 1 on a full scan in a selective route')
+    args = parser.parse_args()
+
+    app = build_app(args.database_url, args.users, args.tickets, args.setup_indexes)
+    # Counted before the writes in ROUTES run
+    rows = table_rows(app)
+    indexes = declared_indexes(app)
+    planned = run_routes(app)
+    with app.app_context():
+        from models import db
+        dialect = db.engine.dialect.name
+    print(f"{args.tickets:,} tickets, {args.users:,} users, {dialect}"
+          f"{', setup SQL indexes' if args.setup_indexes else ''}\n")
+    print_report(planned, rows, indexes, args.min_rows)
+    if args.check and full_scans(planned, rows, args.min_rows, selective_only=True):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Response compression for API and page payloads.
+
+Brotli is used when the ``brotli`` package is installed and the client
+accepts it, gzip otherwise. Streamed responses (exports) are compressed
+chunk by chunk, so they keep streaming.
+"""
+import gzip
+import zlib
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+)
+
+
+def _choose_encoding():
+    """Pick the first configured encoding the client accepts, or None."""
+    for encoding in current_app.config.get('COMPRESS_ALGORITHMS', ('br', 'gzip')):
+        if encoding == 'br' and brotli is None:
+            continue
+        if request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=current_app.config.get('COMPRESS_BROTLI_QUALITY', 6))
+    return gzip.compress(data, compresslevel=current_app.config.get('COMPRESS_LEVEL', 6), mtime=0)
+
+
+def _compress_stream(response, encoding):
+    # Settings are read now: the body is generated after the app context is gone
+    original = response.response
+    chunks = response.iter_encoded()
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=current_app.config.get('COMPRESS_BROTLI_QUALITY', 6))
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        # wbits 31: zlib stream wrapped in a gzip header
+        compressor = zlib.compressobj(current_app.config.get('COMPRESS_LEVEL', 6), zlib.DEFLATED, 31)
+        process = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+
+    def generate():
+        try:
+            for chunk in chunks:
+                # Flush per chunk so each batch reaches the client as it is produced
+                data = process(chunk) + flush()
+                if data:
+                    yield data
+            yield finish()
+        finally:
+            if hasattr(original, 'close'):
+                original.close()
+    return generate()
+
+
+def compress_response(response):
+    """after_request hook compressing eligible responses for clients that accept it."""
+    config = current_app.config
+    if not config.get('COMPRESS_ENABLED', True):
+        return response
+    if (response.direct_passthrough
+            or not 200 <= response.status_code < 300 or response.status_code in (204, 206)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)):
+        return response
+
+    # The body now depends on Accept-Encoding, compressed or not
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config.get('COMPRESS_MIN_SIZE', 1024):
+            return response
+        response.set_data(_compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+
+    # The compressed bytes differ from the identity body, so the tag can no
+    # longer be strong; If-None-Match uses weak comparison and still matches
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -3,11 +3,98 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() == 'true'
+
+def engine_options(database_uri):
+    """SQLAlchemy engine/pool settings for a database URI, driven by environment variables."""
+    if database_uri.startswith('sqlite'):
+        return {}
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        # Azure Postgres drops idle connections; recycle before that and ping on checkout
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+    }
+    statement_timeout = os.environ.get('DB_STATEMENT_TIMEOUT_MS')
+    if statement_timeout and database_uri.startswith('postgresql'):
+        options['connect_args'] = {'options': f"-c statement_timeout={int(statement_timeout)}"}
+    return options
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
-        f"postgresql://{os.environ.get('DB_USER')}:{os.environ.get('DB_PASSWORD')}@{os.environ.get('DB_HOST')}:{os.environ.get('DB_PORT', '5432')}/{os.environ.get('DB_NAME')}"
+        f"postgresql+psycopg2://{os.environ.get('DB_USER')}:{os.environ.get('DB_PASSWORD')}@{os.environ.get('DB_HOST')}:{os.environ.get('DB_PORT', '5432')}/{os.environ.get('DB_NAME')}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    
+    # How long /ready reuses its last database check
+    READINESS_CACHE_SECONDS = int(os.environ.get('READINESS_CACHE_SECONDS', 10))
+    
+    # Ticket list pagination (keyset cursors, see routes/pagination.py)
+    TICKETS_PAGE_SIZE = int(os.environ.get('TICKETS_PAGE_SIZE', 50))
+    TICKETS_MAX_PAGE_SIZE = int(os.environ.get('TICKETS_MAX_PAGE_SIZE', 200))
+    
+    # Live ticket changes (/api/tickets/stream, see ticket_bus.py). Each open stream
+    # holds a worker thread, so run gunicorn with threaded or async workers.
+    # MAX_CONNECTIONS streams per worker (0: no limit, for gevent) must stay below
+    # GUNICORN_THREADS; further clients get a 503 and poll /api/tickets/changes
+    # FANOUT 'auto' relays events between workers with Postgres NOTIFY when on Postgres
+    TICKET_STREAM_FANOUT = os.environ.get('TICKET_STREAM_FANOUT', 'auto')
+    TICKET_STREAM_BUFFER_SIZE = int(os.environ.get('TICKET_STREAM_BUFFER_SIZE', 1000))
+    TICKET_STREAM_QUEUE_SIZE = int(os.environ.get('TICKET_STREAM_QUEUE_SIZE', 256))
+    TICKET_STREAM_HEARTBEAT = int(os.environ.get('TICKET_STREAM_HEARTBEAT', 15))
+    TICKET_STREAM_MAX_DURATION = int(os.environ.get('TICKET_STREAM_MAX_DURATION', 300))
+    TICKET_STREAM_MAX_CONNECTIONS = int(os.environ.get('TICKET_STREAM_MAX_CONNECTIONS', 2))
+    
+    # Delta sync (/api/tickets/changes, see routes/changes.py). Tokens older than the
+    # retention, or deltas over the limit, tell the client to reload instead
+    TICKET_CHANGES_LIMIT = int(os.environ.get('TICKET_CHANGES_LIMIT', 500))
+    TICKET_CHANGES_OVERLAP = int(os.environ.get('TICKET_CHANGES_OVERLAP', 5))
+    TICKET_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TICKET_TOMBSTONE_RETENTION_DAYS', 7))
+    
+    # Ticket history (ticket_events, see ticket_history.py); run `ticket-events-maintain`
+    # at least monthly: it drops expired months on Postgres. It and db-init (every deploy)
+    # create the next PARTITIONS_AHEAD monthly partitions; changes fail in a month without one
+    TICKET_EVENTS_RETENTION_DAYS = int(os.environ.get('TICKET_EVENTS_RETENTION_DAYS', 365))
+    TICKET_EVENTS_PARTITIONS_AHEAD = int(os.environ.get('TICKET_EVENTS_PARTITIONS_AHEAD', 2))
+    TICKET_EVENTS_PURGE_BATCH = int(os.environ.get('TICKET_EVENTS_PURGE_BATCH', 5000))
+    
+    # JSON encoder: 'auto' uses orjson when installed, else the standard library
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+    
+    # Response compression (see compression.py); brotli is used when installed
+    COMPRESS_ENABLED = _env_bool('COMPRESS_ENABLED', True)
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 6))
+    COMPRESS_MIMETYPES = os.environ.get(
+        'COMPRESS_MIMETYPES', 'application/json,application/x-ndjson,text/csv,text/html'
+    ).split(',')
+    
+    # Password hashing (see passwords.py): werkzeug method strings such as
+    # 'pbkdf2:sha256:600000' or 'scrypt:32768:8:1', or 'argon2' with argon2-cffi
+    # installed. Logins rehash stored passwords made with other settings.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    # Threads per process computing password hashes, and how long a login waits for one
+    PASSWORD_VERIFY_WORKERS = int(os.environ.get('PASSWORD_VERIFY_WORKERS', 2))
+    PASSWORD_VERIFY_TIMEOUT = float(os.environ.get('PASSWORD_VERIFY_TIMEOUT', 5))
+    
+    # Login rate limiting (see auth/rate_limit.py): token buckets of LIMIT attempts
+    # refilled over PERIOD seconds, per client IP and per username.
+    # RATELIMIT_STORAGE is 'memory' (per process) or 'local-kv' (the KVStore stand-in)
+    RATELIMIT_ENABLED = _env_bool('RATELIMIT_ENABLED', True)
+    RATELIMIT_STORAGE = os.environ.get('RATELIMIT_STORAGE', 'memory')
+    LOGIN_IP_LIMIT = int(os.environ.get('LOGIN_IP_LIMIT', 20))
+    LOGIN_IP_PERIOD = int(os.environ.get('LOGIN_IP_PERIOD', 60))
+    LOGIN_USERNAME_LIMIT = int(os.environ.get('LOGIN_USERNAME_LIMIT', 5))
+    LOGIN_USERNAME_PERIOD = int(os.environ.get('LOGIN_USERNAME_PERIOD', 300))
+    # Proxies in front of the app that append to X-Forwarded-For (Azure App Service: 1)
+    RATELIMIT_PROXY_COUNT = int(os.environ.get(
+        'RATELIMIT_PROXY_COUNT', 1 if os.environ.get('WEBSITE_SITE_NAME') else 0
+    ))
     
     # Session configuration for Azure
     SESSION_COOKIE_SECURE = os.environ.get('FLASK_ENV') == 'production'
@@ -15,6 +102,19 @@ class Config:
     SESSION_COOKIE_SAMESITE = 'Lax'
     PERMANENT_SESSION_LIFETIME = 3600  # 1 hour
     
+    # Server-side sessions (see sessions.py): 'cookie' keeps Flask's signed cookies,
+    # 'sql' stores them in user_sessions, 'local-kv' in the in-process KVStore.
+    # Sessions then expire PERMANENT_SESSION_LIFETIME after their last use.
+    SESSION_STORE = os.environ.get('SESSION_STORE', 'cookie')
+    SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', 10000))
+    SESSION_CACHE_TTL = int(os.environ.get('SESSION_CACHE_TTL', 5))
+    SESSION_TOUCH_INTERVAL = int(os.environ.get('SESSION_TOUCH_INTERVAL', 60))
+    
+    # Authorize from a signed identity snapshot in the session instead of a
+    # user lookup per request; revocation is re-checked every IDENTITY_STAMP_TTL seconds
+    SESSION_IDENTITY_SNAPSHOT = os.environ.get('SESSION_IDENTITY_SNAPSHOT', 'false').lower() == 'true'
+    IDENTITY_STAMP_TTL = int(os.environ.get('IDENTITY_STAMP_TTL', 30))
+    
     # Force HTTPS in production
     is_azure = os.environ.get('WEBSITE_SITE_NAME') is not None
     is_production = os.environ.get('FLASK_ENV') == 'production' or is_azure
@@ -0,0 +1,60 @@
+"""Read-only data transfer objects for list endpoints.
+
+Each DTO is a slotted dataclass built straight from a ``Row`` tuple (the
+columns are selected in field order), so list endpoints skip ORM instances,
+the identity map and a per-row dict. The JSON provider encodes them directly.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass(slots=True, frozen=True)
+class TicketDTO:
+    id: int
+    title: str
+    description: Optional[str]
+    status: str
+    priority: str
+    user_id: int
+    assigned_to: Optional[int]
+    assignee_name: Optional[str]
+    user_name: str
+    created_at: datetime
+    updated_at: datetime
+
+
+@dataclass(slots=True, frozen=True)
+class TicketSearchResultDTO(TicketDTO):
+    rank: float
+    highlights: dict
+
+
+@dataclass(slots=True, frozen=True)
+class UserDTO:
+    id: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    is_active: bool
+    is_admin: bool
+    created_at: datetime
+
+
+@dataclass(slots=True, frozen=True)
+class AdminUserDTO:
+    id: int
+    username: str
+    full_name: str
+
+
+@dataclass(slots=True, frozen=True)
+class TicketEventDTO:
+    id: int
+    ticket_id: int
+    actor_id: Optional[int]
+    actor_name: Optional[str]
+    action: str
+    changes: dict
+    created_at: datetime
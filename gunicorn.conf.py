@@ -0,0 +1,59 @@
+"""Gunicorn settings for the App Service deployment (see startup.txt).
+
+Worker counts scale with the CPU count; every setting can be overridden with
+the environment variables named below.
+"""
+import multiprocessing
+import os
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 600))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# gthread (default), gevent or sync
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Patch before the app (and psycopg2) is imported by preload_app, so
+    # database waits yield to other greenlets instead of blocking the worker
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        pass
+
+    workers = int(os.environ.get('GUNICORN_WORKERS', cpu_count + 1))
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+elif worker_class == 'gthread':
+    workers = int(os.environ.get('GUNICORN_WORKERS', os.environ.get('WEB_CONCURRENCY', cpu_count * 2 + 1)))
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+else:
+    workers = int(os.environ.get('GUNICORN_WORKERS', os.environ.get('WEB_CONCURRENCY', cpu_count * 2 + 1)))
+
+# Each worker holds its own connection pool: keep
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) under the server's connection limit,
+# and DB_POOL_SIZE close to the threads/greenlets that hit the database at once.
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # With preload_app the engine (and any pooled connection) was created in
+    # the master; drop the inherited pool so workers never share a socket.
+    # close=False leaves the parent's connections alone.
+    if not server.cfg.preload_app:
+        return
+    from main import app
+    from models import db
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,73 @@
+"""JSON provider for the Flask app.
+
+Uses orjson when it is installed and the standard library otherwise. Both
+write datetimes as ISO 8601 strings, so models hand datetime objects
+straight to jsonify instead of formatting every field themselves.
+"""
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """Standard library encoder writing dates as ISO 8601 (Flask's default uses HTTP dates)."""
+
+    # Keep the key order of to_dict instead of sorting every object
+    sort_keys = False
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+
+class OrjsonProvider(IsoJSONProvider):
+    """orjson encoder and decoder; datetimes, dates and UUIDs are encoded natively."""
+
+    def _options(self, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Formatting options orjson does not share (indent, separators...)
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        # Build the body as bytes; no str round trip
+        body = orjson.dumps(obj, default=self.default, option=self._options(pretty)) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+JSON_PROVIDERS = {
+    'orjson': OrjsonProvider,
+    'stdlib': IsoJSONProvider,
+}
+
+
+def init_json(app):
+    """Install the JSON provider named by JSON_PROVIDER ('auto', 'orjson' or 'stdlib')."""
+    name = app.config.get('JSON_PROVIDER', 'auto')
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    if name == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+    app.json = JSON_PROVIDERS[name](app)
+    return app.json
@@ -0,0 +1,85 @@
+"""Key-value store interface for state shared between workers.
+
+Shared backends (rate limits, sessions) only need versioned reads and
+compare-and-set writes with a TTL, which Redis (WATCH/MULTI), memcached
+(gets/cas) and a SQL table with a version column all provide. ``LocalKVStore``
+implements the interface in-process: it is what tests and single-worker
+runs use, and the reference for a networked implementation.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class KVStore(ABC):
+    """Interface for a shared key-value store. Values are opaque to the store."""
+
+    @abstractmethod
+    def get(self, key):
+        """Return ``(value, version)``, or ``(None, None)`` when missing or expired."""
+
+    @abstractmethod
+    def compare_and_set(self, key, value, version, ttl):
+        """Store ``value`` for ``ttl`` seconds if ``key`` is still at ``version``.
+
+        ``version`` None means the key must not exist. Returns whether the write happened.
+        """
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        """Store ``value`` for ``ttl`` seconds unconditionally."""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove ``key`` if present."""
+
+
+class LocalKVStore(KVStore):
+    """In-process KVStore: a dict guarded by a lock, with lazy expiry."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._data = {}  # key -> (value, version, expires_at)
+        self._lock = threading.Lock()
+        self._versions = 0
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[2] <= self._clock():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return (None, None) if entry is None else entry[:2]
+
+    def compare_and_set(self, key, value, version, ttl):
+        with self._lock:
+            entry = self._live(key)
+            if (entry[1] if entry else None) != version:
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def _store(self, key, value, ttl):
+        self._versions += 1
+        self._data[key] = (value, self._versions, self._clock() + ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def purge_expired(self):
+        """Drop expired keys; returns how many were removed."""
+        with self._lock:
+            now = self._clock()
+            expired = [key for key, entry in self._data.items() if entry[2] <= now]
+            for key in expired:
+                del self._data[key]
+            return len(expired)
@@ -1,110 +1,273 @@
-from flask import Flask, render_template, session, redirect, url_for, jsonify, request
+from flask import Flask, current_app, render_template, session, redirect, url_for, jsonify, request
+from flask.cli import with_appcontext
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.sql import operators
 from config import Config
-from models import db
+from datetime import datetime, timedelta
+from models import db, User, Ticket, rebuild_ticket_counters, purge_ticket_tombstones, create_ticket_search
 from routes import register_routes
+from pool_metrics import instrument_engine
+from compression import compress_response
+from json_provider import init_json
+from sessions import init_sessions
+from ticket_history import maintain_ticket_events, prepare_ticket_event_partitions
 from auth.auth_utils import get_current_user, admin_required
+import click
 import logging
 import sys
 import os
 
-app = Flask(__name__)
-app.config.from_object(Config)
-
 # Configure logging for Azure
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Force HTTPS in production
-is_production = (app.config.get('FLASK_ENV') == 'production' or 
-                os.environ.get('WEBSITE_SITE_NAME') or  # Azure App Service
-                app.config.get('FORCE_HTTPS'))
-
-if is_production:
-    @app.before_request
-    def force_https():
-        # Redirect GET requests to HTTPS unless already secure or health check path
-        if (request.method == 'GET'
-            and request.path != '/health'
-            and not request.is_secure
-            and request.headers.get('X-Forwarded-Proto', '').lower() != 'https'):
-            return redirect(request.url.replace('http://', 'https://'), code=301)
-
-        # Normalize scheme for url_for when behind a proxy sending X-Forwarded-Proto
-        if request.headers.get('X-Forwarded-Proto', '').lower() == 'https':
-            request.environ['wsgi.url_scheme'] = 'https'
-
-# Initialize database
-db.init_app(app)
-
-# Register API routes
-register_routes(app)
-
-# Create tables with error handling
-with app.app_context():
+def init_db():
+    """Check the database connection and create any missing tables and indexes.
+
+    Runs once per deployment (``flask --app main db-init``) rather than on
+    every worker boot.
+    """
+    logger.info("Testing database connection...")
+    db.session.execute(text('SELECT 1'))
+    logger.info("Database connection successful")
+
+    db.create_all()
+    logger.info("Database tables created successfully")
+
+    # create_all skips tables that already exist: add what the user and
+    # ticket models have gained since (columns, indexes, search) to older tables
+    for table in (User.__table__, Ticket.__table__):
+        _add_missing_columns(table)
+        _sync_indexes(table)
+    create_ticket_search()
+    db.session.commit()
+    logger.info("Indexes and search index ready")
+
+    # Every ticket change writes ticket_events: its month needs a partition
+    prepare_ticket_event_partitions(
+        _ticket_events_cutoff(current_app.config),
+        months_ahead=current_app.config.get('TICKET_EVENTS_PARTITIONS_AHEAD', 2),
+    )
+    logger.info("Ticket event partitions ready")
+
+def _ticket_events_cutoff(config):
+    return datetime.utcnow() - timedelta(days=config.get('TICKET_EVENTS_RETENTION_DAYS', 365))
+
+def _add_missing_columns(table):
+    """Add the nullable columns of ``table`` that the database table lacks."""
+    existing = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in existing and column.nullable:
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as connection:
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            logger.info(f"Added column {table.name}.{column.name}")
+
+def _index_definition(index):
+    """(column names, {column: ('desc',)}) of a model index, in the shape the inspector reports."""
+    columns, sorting = [], {}
+    for expression in index.expressions:
+        if getattr(expression, 'modifier', None) is operators.desc_op:
+            sorting[expression.element.name] = ('desc',)
+            expression = expression.element
+        columns.append(expression.name)
+    return columns, sorting
+
+def _sync_indexes(table):
+    """Create the model's missing indexes on ``table`` and rebuild those whose definition changed.
+
+    Older setup SQL made indexes under the same names with other columns
+    (e.g. idx_tickets_user_created without the trailing id DESC). On
+    PostgreSQL the replacement is built concurrently under a temporary
+    name before the old index is dropped, so the table stays writable and
+    indexed throughout.
+    """
+    reflected = {index['name']: index for index in inspect(db.engine).get_indexes(table.name)}
+    for index in table.indexes:
+        existing = reflected.get(index.name)
+        if existing is None:
+            index.create(db.engine)
+            logger.info(f"Created index {index.name}")
+            continue
+        columns, sorting = _index_definition(index)
+        # PostgreSQL reports DESC columns (and omits column_sorting when there
+        # are none); SQLite does not report order at all
+        postgresql = db.engine.dialect.name == 'postgresql'
+        if existing['column_names'] == columns and existing.get('column_sorting', {} if postgresql else sorting) == sorting:
+            continue
+        if postgresql:
+            _rebuild_index_concurrently(index)
+        else:
+            with db.engine.begin() as connection:
+                connection.execute(text(f'DROP INDEX {index.name}'))
+                index.create(connection)
+        logger.info(f"Rebuilt index {index.name} as {columns}")
+
+def _rebuild_index_concurrently(index):
+    temporary = f'{index.name}_rebuild'
+    create = str(CreateIndex(index).compile(dialect=db.engine.dialect))
+    create = create.replace(f'CREATE INDEX {index.name} ', f'CREATE INDEX CONCURRENTLY {temporary} ', 1)
+    # CONCURRENTLY cannot run inside a transaction block
+    with db.engine.connect() as connection:
+        connection.execution_options(isolation_level='AUTOCOMMIT')
+        # An interrupted earlier run leaves an invalid index behind
+        connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {temporary}'))
+        connection.execute(text(create))
+        connection.execute(text(f'DROP INDEX CONCURRENTLY {index.name}'))
+        connection.execute(text(f'ALTER INDEX {temporary} RENAME TO {index.name}'))
+
+@click.command('db-init')
+@with_appcontext
+def db_init_command():
+    """Check the database connection and create any missing tables."""
     try:
-        # Test database connection first
-        logger.info(f"Testing database connection...")
-        logger.info(f"Database URI: {app.config.get('SQLALCHEMY_DATABASE_URI', 'Not set')}")
-        
-        # Simple connection test
-        from sqlalchemy import text
-        result = db.session.execute(text('SELECT 1'))
-        logger.info("Database connection successful")
-        
-        # Create tables
-        db.create_all()
-        logger.info("Database tables created successfully")
+        init_db()
     except Exception as e:
         logger.error(f"Database setup failed: {str(e)}")
-        # Don't fail the app startup - let it run without DB for debugging
-        logger.error("App will continue without database connection")
+        raise click.ClickException(str(e))
+    click.echo('Database initialized.')
 
-@app.context_processor
-def inject_user():
-    return dict(current_user=get_current_user())
+@click.command('counters-rebuild')
+@with_appcontext
+def counters_rebuild_command():
+    """Recount ticket_counters from the tickets table."""
+    try:
+        rebuild_ticket_counters()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Counter rebuild failed: {str(e)}")
+        raise click.ClickException(str(e))
+    click.echo('Ticket counters rebuilt.')
 
-@app.after_request
-def add_security_headers(response):
-    # Add HSTS only when using HTTPS / production conditions
-    if is_production:
-        response.headers.setdefault('Strict-Transport-Security', 'max-age=63072000; includeSubDomains; preload')
-        # Content Security Policy to enforce HTTPS for subresources and requests
-        if 'Content-Security-Policy' not in response.headers:
-            response.headers['Content-Security-Policy'] = "default-src 'self' https: data:; script-src 'self' https: 'unsafe-inline'; style-src 'self' https: 'unsafe-inline'; img-src 'self' https: data:; font-src 'self' https: data:; connect-src 'self' https:; upgrade-insecure-requests"
-    return response
-
-@app.route('/health')
-def health_check():
+@click.command('sessions-purge')
+@with_appcontext
+def sessions_purge_command():
+    """Delete expired server-side sessions."""
+    interface = current_app.extensions.get('session_store')
+    if interface is None:
+        raise click.ClickException('Server-side sessions are not enabled (SESSION_STORE=cookie)')
+    click.echo(f'Purged {interface.backend.purge_expired()} expired sessions.')
+
+@click.command('tombstones-purge')
+@with_appcontext
+def tombstones_purge_command():
+    """Delete ticket tombstones older than TICKET_TOMBSTONE_RETENTION_DAYS."""
+    retention = timedelta(days=current_app.config.get('TICKET_TOMBSTONE_RETENTION_DAYS', 7))
     try:
-        # Test database connection
-        db.session.execute('SELECT 1')
-        return {"status": "healthy", "database": "connected"}, 200
+        count = purge_ticket_tombstones(datetime.utcnow() - retention)
+        db.session.commit()
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return {"status": "unhealthy", "error": str(e)}, 500
-
-@app.route('/')
-def home():
-    return render_template('index.html')
-
-@app.route('/about')
-def about():
-    return render_template('about.html')
-
-@app.route('/dashboard')
-def dashboard():
-    user = get_current_user()
-    if not user:
-        return redirect(url_for('auth.login'))
-    return render_template('dashboard.html', user=user)
-
-@app.route('/admin')
-@admin_required
-def admin_dashboard():
-    user = get_current_user()
-    return render_template('admin_dashboard.html', user=user)
+        db.session.rollback()
+        logger.error(f"Tombstone purge failed: {str(e)}")
+        raise click.ClickException(str(e))
+    click.echo(f'Purged {count} ticket tombstones.')
+
+@click.command('ticket-events-maintain')
+@with_appcontext
+def ticket_events_maintain_command():
+    """Apply TICKET_EVENTS_RETENTION_DAYS to ticket history and create upcoming partitions."""
+    config = current_app.config
+    try:
+        removed = maintain_ticket_events(
+            _ticket_events_cutoff(config),
+            months_ahead=config.get('TICKET_EVENTS_PARTITIONS_AHEAD', 2),
+            batch_size=config.get('TICKET_EVENTS_PURGE_BATCH', 5000),
+        )
+    except Exception as e:
+        logger.error(f"Ticket events maintenance failed: {str(e)}")
+        raise click.ClickException(str(e))
+    click.echo(f'Removed {removed} expired ticket events.')
+
+def create_app(config_class=Config):
+    """Build the Flask app. Does not touch the database."""
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    init_json(app)
+    init_sessions(app)
+
+    # Force HTTPS in production
+    is_production = (app.config.get('FLASK_ENV') == 'production' or
+                    os.environ.get('WEBSITE_SITE_NAME') or  # Azure App Service
+                    app.config.get('FORCE_HTTPS'))
+
+    if is_production:
+        @app.before_request
+        def force_https():
+            # Redirect GET requests to HTTPS unless already secure or a health probe path
+            if (request.method == 'GET'
+                and request.path not in ('/health', '/ready')
+                and not request.is_secure
+                and request.headers.get('X-Forwarded-Proto', '').lower() != 'https'):
+                return redirect(request.url.replace('http://', 'https://'), code=301)
+
+            # Normalize scheme for url_for when behind a proxy sending X-Forwarded-Proto
+            if request.headers.get('X-Forwarded-Proto', '').lower() == 'https':
+                request.environ['wsgi.url_scheme'] = 'https'
+
+    # Initialize database (the engine connects lazily on first use)
+    db.init_app(app)
+    with app.app_context():
+        instrument_engine(app, db.engine)
+
+    # Register API routes
+    register_routes(app)
+    app.cli.add_command(db_init_command)
+    app.cli.add_command(counters_rebuild_command)
+    app.cli.add_command(sessions_purge_command)
+    app.cli.add_command(tombstones_purge_command)
+    app.cli.add_command(ticket_events_maintain_command)
+
+    @app.context_processor
+    def inject_user():
+        return dict(current_user=get_current_user())
+
+    @app.after_request
+    def add_security_headers(response):
+        # Add HSTS only when using HTTPS / production conditions
+        if is_production:
+            response.headers.setdefault('Strict-Transport-Security', 'max-age=63072000; includeSubDomains; preload')
+            # Content Security Policy to enforce HTTPS for subresources and requests
+            if 'Content-Security-Policy' not in response.headers:
+                response.headers['Content-Security-Policy'] = "default-src 'self' https: data:; script-src 'self' https: 'unsafe-inline'; style-src 'self' https: 'unsafe-inline'; img-src 'self' https: data:; font-src 'self' https: data:; connect-src 'self' https:; upgrade-insecure-requests"
+        return response
+
+    # gzip/brotli for JSON, CSV and HTML bodies (COMPRESS_* settings)
+    app.after_request(compress_response)
+
+    @app.route('/')
+    def home():
+        return render_template('index.html')
+
+    @app.route('/about')
+    def about():
+        return render_template('about.html')
+
+    @app.route('/dashboard')
+    def dashboard():
+        user = get_current_user()
+        if not user:
+            return redirect(url_for('auth.login'))
+        return render_template('dashboard.html', user=user)
+
+    @app.route('/admin')
+    @admin_required
+    def admin_dashboard():
+        user = get_current_user()
+        return render_template('admin_dashboard.html', user=user)
+
+    return app
+
+app = create_app()
 
 if __name__ == '__main__':
-    import os
+    # Local development: create tables on start, as `flask db-init` does on deploy
+    with app.app_context():
+        try:
+            init_db()
+        except Exception as e:
+            logger.error(f"Database setup failed: {str(e)}")
+            logger.error("App will continue without database connection")
     port = int(os.environ.get('PORT', 5000))
-    app.run(debug=False, host='0.0.0.0', port=port)
\ No newline at end of file
+    app.run(debug=False, host='0.0.0.0', port=port)
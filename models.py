@@ -1,9 +1,21 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import DDL, PrimaryKeyConstraint, event, func, literal_column, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import aliased
+import dataclasses
+from dto import TicketDTO, UserDTO
+import passwords
 from datetime import datetime
+import hashlib
 
 db = SQLAlchemy()
 
+def security_stamp(password_hash, is_active, is_admin):
+    """Short fingerprint of the fields that invalidate a login when they change."""
+    raw = f"{password_hash}|{bool(is_active)}|{bool(is_admin)}".encode()
+    return hashlib.sha256(raw).hexdigest()[:16]
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -16,16 +28,22 @@ class User(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Ticket list ETags fold in the latest change to any user (names appear in the lists)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     tickets = db.relationship('Ticket', foreign_keys='Ticket.user_id', backref='user', lazy=True, cascade='all, delete-orphan')
     assigned_tickets = db.relationship('Ticket', foreign_keys='Ticket.assigned_to', backref='assignee', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return passwords.check_password(self.password_hash, password)
+    
+    @property
+    def security_stamp(self):
+        return security_stamp(self.password_hash, self.is_active, self.is_admin)
     
     def to_dict(self):
         return {
@@ -36,7 +54,7 @@ class User(db.Model):
             'last_name': self.last_name,
             'is_active': self.is_active,
             'is_admin': self.is_admin,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class Ticket(db.Model):
@@ -52,6 +70,18 @@ class Ticket(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Keyset pages run newest first on (created_at, id): across all tickets,
+    # and per requester and per assignee (the two sides of a user's own
+    # list). The admin list filters on status and priority;
+    # /api/tickets/changes reads tickets by updated_at.
+    __table_args__ = (
+        db.Index('idx_tickets_created_id', created_at.desc(), id.desc()),
+        db.Index('idx_tickets_user_created', user_id, created_at.desc(), id.desc()),
+        db.Index('idx_tickets_assigned_created', assigned_to, created_at.desc(), id.desc()),
+        db.Index('idx_tickets_status_priority', status, priority),
+        db.Index('idx_tickets_updated_at', 'updated_at'),
+    )
+    
     # The relationships are defined in the User model with proper foreign_keys specified
     
     def to_dict(self):
@@ -65,6 +95,392 @@ class Ticket(db.Model):
             'assigned_to': self.assigned_to,
             'assignee_name': f"{self.assignee.first_name} {self.assignee.last_name}" if self.assignee else None,
             'user_name': f"{self.user.first_name} {self.user.last_name}",
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+
+
+# Full-text search index, kept up to date by the database itself.
+# PostgreSQL: a generated, GIN-indexed tsvector column (title weighted above
+# description). SQLite (tests, local runs): an FTS5 table synced by triggers.
+TICKET_SEARCH_VECTOR = literal_column('tickets.search_vector', type_=TSVECTOR)
+
+_postgresql_search_ddl = (
+    """ALTER TABLE tickets ADD COLUMN IF NOT EXISTS search_vector tsvector
+       GENERATED ALWAYS AS (
+           setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+           setweight(to_tsvector('english', coalesce(description, '')), 'B')
+       ) STORED""",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_search ON tickets USING GIN (search_vector)",
+)
+
+_sqlite_search_ddl = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(
+           title, description, content='tickets', content_rowid='id',
+           tokenize='porter unicode61'
+       )""",
+    """CREATE TRIGGER IF NOT EXISTS tickets_fts_insert AFTER INSERT ON tickets BEGIN
+           INSERT INTO tickets_fts(rowid, title, description)
+           VALUES (new.id, new.title, new.description);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS tickets_fts_delete AFTER DELETE ON tickets BEGIN
+           INSERT INTO tickets_fts(tickets_fts, rowid, title, description)
+           VALUES ('delete', old.id, old.title, old.description);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS tickets_fts_update AFTER UPDATE OF title, description ON tickets BEGIN
+           INSERT INTO tickets_fts(tickets_fts, rowid, title, description)
+           VALUES ('delete', old.id, old.title, old.description);
+           INSERT INTO tickets_fts(rowid, title, description)
+           VALUES (new.id, new.title, new.description);
+       END""",
+)
+
+for _statement in _postgresql_search_ddl:
+    event.listen(Ticket.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+for _statement in _sqlite_search_ddl:
+    event.listen(Ticket.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Ticket.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS tickets_fts').execute_if(dialect='sqlite'))
+
+
+def create_ticket_search():
+    """Add the search index to an existing tickets table and fill it, in the current transaction.
+
+    The listeners above only fire when create_all makes the tickets table;
+    ``db-init`` calls this on every deploy. The statements are idempotent.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        # Adding the generated column computes it for the existing rows
+        for statement in _postgresql_search_ddl:
+            db.session.execute(text(statement))
+    elif dialect == 'sqlite':
+        for statement in _sqlite_search_ddl:
+            db.session.execute(text(statement))
+        db.session.execute(text("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')"))
+
+
+class UserSession(db.Model):
+    """Server-side session data (SESSION_STORE = 'sql', see sessions.py)."""
+    __tablename__ = 'user_sessions'
+    
+    # Hex SHA-256 of the session id; only the cookie holds the id itself
+    sid = db.Column(db.String(64), primary_key=True)
+    # NULL for anonymous sessions (e.g. flash messages before login)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), index=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class TicketCounter(db.Model):
+    """Ticket counts per (requester, assignee, status, priority), kept exact by triggers.
+
+    Global, per-user and per-assignee counts are sums over these rows, whose
+    number grows with user pairs rather than tickets. ``assigned_to`` is 0
+    for unassigned tickets and a missing status or priority is stored as ''.
+    """
+    __tablename__ = 'ticket_counters'
+    
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    assigned_to = db.Column(db.Integer, primary_key=True, autoincrement=False, index=True)
+    status = db.Column(db.String(20), primary_key=True)
+    priority = db.Column(db.String(20), primary_key=True)
+    ticket_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+# The triggers reference tickets, so create ticket_counters after it
+TicketCounter.__table__.add_is_dependent_on(Ticket.__table__)
+
+_COUNTER_KEY = "{row}.user_id, COALESCE({row}.assigned_to, 0), COALESCE({row}.status, ''), COALESCE({row}.priority, '')"
+_COUNTER_MATCH = (
+    "user_id = {row}.user_id AND assigned_to = COALESCE({row}.assigned_to, 0) "
+    "AND status = COALESCE({row}.status, '') AND priority = COALESCE({row}.priority, '')"
+)
+_COUNTER_INCREMENT = (
+    "INSERT INTO ticket_counters (user_id, assigned_to, status, priority, ticket_count) "
+    "VALUES (" + _COUNTER_KEY.format(row='NEW') + ", 1) "
+    "ON CONFLICT (user_id, assigned_to, status, priority) "
+    "DO UPDATE SET ticket_count = ticket_counters.ticket_count + 1"
+)
+_COUNTER_DECREMENT = (
+    "UPDATE ticket_counters SET ticket_count = ticket_count - 1 WHERE " + _COUNTER_MATCH.format(row='OLD')
+)
+
+_postgresql_counter_ddl = (
+    f"""CREATE OR REPLACE FUNCTION update_ticket_counters()
+       RETURNS TRIGGER AS $$
+       BEGIN
+           IF TG_OP IN ('UPDATE', 'DELETE') THEN
+               {_COUNTER_DECREMENT};
+           END IF;
+           IF TG_OP IN ('INSERT', 'UPDATE') THEN
+               {_COUNTER_INCREMENT};
+           END IF;
+           RETURN NULL;
+       END;
+       $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER maintain_ticket_counters
+       AFTER INSERT OR DELETE OR UPDATE OF user_id, assigned_to, status, priority ON tickets
+       FOR EACH ROW EXECUTE FUNCTION update_ticket_counters()""",
+)
+
+_sqlite_counter_ddl = (
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_counters_insert AFTER INSERT ON tickets BEGIN
+           {_COUNTER_INCREMENT};
+       END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_counters_delete AFTER DELETE ON tickets BEGIN
+           {_COUNTER_DECREMENT};
+       END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_counters_update
+       AFTER UPDATE OF user_id, assigned_to, status, priority ON tickets BEGIN
+           {_COUNTER_DECREMENT};
+           {_COUNTER_INCREMENT};
+       END""",
+)
+
+_REBUILD_COUNTERS = (
+    "DELETE FROM ticket_counters",
+    "INSERT INTO ticket_counters (user_id, assigned_to, status, priority, ticket_count) "
+    "SELECT " + _COUNTER_KEY.format(row='tickets') + ", COUNT(*) FROM tickets "
+    "GROUP BY " + _COUNTER_KEY.format(row='tickets'),
+)
+
+for _statement in _postgresql_counter_ddl:
+    event.listen(TicketCounter.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+for _statement in _sqlite_counter_ddl:
+    event.listen(TicketCounter.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+# Count the tickets that already exist (new table on an existing database)
+for _statement in _REBUILD_COUNTERS:
+    event.listen(TicketCounter.__table__, 'after_create', DDL(_statement))
+event.listen(TicketCounter.__table__, 'before_drop', DDL(
+    'DROP TRIGGER IF EXISTS maintain_ticket_counters ON tickets'
+).execute_if(dialect='postgresql'))
+for _name in ('insert', 'delete', 'update'):
+    event.listen(TicketCounter.__table__, 'before_drop', DDL(
+        f'DROP TRIGGER IF EXISTS ticket_counters_{_name}'
+    ).execute_if(dialect='sqlite'))
+
+
+def rebuild_ticket_counters():
+    """Recount ticket_counters from the tickets table, in the current transaction."""
+    if db.engine.dialect.name == 'postgresql':
+        # Hold off ticket writes until the recount commits
+        db.session.execute(text('LOCK TABLE tickets IN SHARE MODE'))
+    for statement in _REBUILD_COUNTERS:
+        db.session.execute(text(statement))
+
+
+
+class TicketTombstone(db.Model):
+    """A ticket that was deleted, or taken from its assignee, written by triggers.
+
+    /api/tickets/changes turns these into removals. ``kind`` is 'deleted'
+    (seen by admins and by the requester and assignee) or 'unassigned' (seen
+    by the former assignee only, whose id is in ``assigned_to``). Rows older
+    than TICKET_TOMBSTONE_RETENTION_DAYS are purged by ``tombstones-purge``.
+    """
+    __tablename__ = 'ticket_tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Not foreign keys: the ticket is gone and its users may follow
+    ticket_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    assigned_to = db.Column(db.Integer, nullable=True)
+    kind = db.Column(db.String(20), nullable=False)
+    removed_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+TicketTombstone.__table__.add_is_dependent_on(Ticket.__table__)
+
+_TOMBSTONE_INSERT = (
+    "INSERT INTO ticket_tombstones (ticket_id, user_id, assigned_to, kind, removed_at) VALUES ({values}, {now})"
+)
+_TOMBSTONE_DELETED = _TOMBSTONE_INSERT.replace('{values}', "OLD.id, OLD.user_id, OLD.assigned_to, 'deleted'")
+_TOMBSTONE_UNASSIGNED = _TOMBSTONE_INSERT.replace('{values}', "OLD.id, NULL, OLD.assigned_to, 'unassigned'")
+# The former assignee loses sight of the ticket unless they also requested it
+_TOMBSTONE_UNASSIGNED_WHEN = (
+    "OLD.assigned_to IS NOT NULL AND OLD.assigned_to {distinct} NEW.assigned_to AND OLD.assigned_to <> NEW.user_id"
+)
+# Naive UTC, like the application's datetime.utcnow(). SQLite's %f has
+# milliseconds only; DDL() statements need their percent signs doubled.
+_POSTGRESQL_NOW = "(now() AT TIME ZONE 'utc')"
+_SQLITE_NOW = "strftime('%%Y-%%m-%%d %%H:%%M:%%f000', 'now')"
+
+_postgresql_tombstone_ddl = (
+    f"""CREATE OR REPLACE FUNCTION record_ticket_tombstone()
+       RETURNS TRIGGER AS $$
+       BEGIN
+           IF TG_OP = 'DELETE' THEN
+               {_TOMBSTONE_DELETED.format(now=_POSTGRESQL_NOW)};
+           ELSIF {_TOMBSTONE_UNASSIGNED_WHEN.format(distinct='IS DISTINCT FROM')} THEN
+               {_TOMBSTONE_UNASSIGNED.format(now=_POSTGRESQL_NOW)};
+           END IF;
+           RETURN NULL;
+       END;
+       $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER record_ticket_tombstones
+       AFTER DELETE OR UPDATE OF assigned_to ON tickets
+       FOR EACH ROW EXECUTE FUNCTION record_ticket_tombstone()""",
+)
+
+_sqlite_tombstone_ddl = (
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_tombstones_delete AFTER DELETE ON tickets BEGIN
+           {_TOMBSTONE_DELETED.format(now=_SQLITE_NOW)};
+       END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_tombstones_unassign AFTER UPDATE OF assigned_to ON tickets
+       WHEN {_TOMBSTONE_UNASSIGNED_WHEN.format(distinct='IS NOT')} BEGIN
+           {_TOMBSTONE_UNASSIGNED.format(now=_SQLITE_NOW)};
+       END""",
+)
+
+for _statement in _postgresql_tombstone_ddl:
+    event.listen(TicketTombstone.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+for _statement in _sqlite_tombstone_ddl:
+    event.listen(TicketTombstone.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(TicketTombstone.__table__, 'before_drop', DDL(
+    'DROP TRIGGER IF EXISTS record_ticket_tombstones ON tickets'
+).execute_if(dialect='postgresql'))
+for _name in ('delete', 'unassign'):
+    event.listen(TicketTombstone.__table__, 'before_drop', DDL(
+        f'DROP TRIGGER IF EXISTS ticket_tombstones_{_name}'
+    ).execute_if(dialect='sqlite'))
+
+
+def purge_ticket_tombstones(before):
+    """Delete tombstones recorded before ``before``, in the current transaction; return how many."""
+    return TicketTombstone.query.filter(TicketTombstone.removed_at < before).delete(synchronize_session=False)
+
+
+class PartitionedPrimaryKey(PrimaryKeyConstraint):
+    """A primary key that PostgreSQL extends with the table's partition key.
+
+    Unique constraints on a partitioned table must include the partition
+    key; other databases get the key as declared.
+    """
+    inherit_cache = True
+
+    def __init__(self, *columns, partition_key, **kw):
+        super().__init__(*columns, **kw)
+        self.partition_key = partition_key
+
+
+@compiles(PartitionedPrimaryKey, 'postgresql')
+def _compile_partitioned_primary_key(constraint, compiler, **kw):
+    columns = [column.name for column in constraint.columns] + [constraint.partition_key]
+    return f"PRIMARY KEY ({', '.join(compiler.preparer.quote(name) for name in columns)})"
+
+
+class TicketAuditEvent(db.Model):
+    """One change to a ticket: who made it and each changed field's old and new value.
+
+    Rows are only inserted, in the transaction of the change they record
+    (see ticket_history.py). On PostgreSQL the table is partitioned by month
+    of ``created_at``, so expired months are dropped whole.
+    """
+    __tablename__ = 'ticket_events'
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), nullable=False)
+    # Not foreign keys: history outlives the ticket and the actor
+    ticket_id = db.Column(db.Integer, nullable=False)
+    actor_id = db.Column(db.Integer, nullable=True)
+    action = db.Column(db.String(20), nullable=False)
+    # {field: [old, new]}
+    changes = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        PartitionedPrimaryKey('id', partition_key='created_at'),
+        # /api/tickets/<id>/history, newest first
+        db.Index('ix_ticket_events_ticket_created', 'ticket_id', 'created_at', 'id'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+
+
+def ticket_event_partitions(start, months):
+    """(name, first day, first day of next month) for ``months`` monthly partitions from ``start``'s month."""
+    year, month = start.year, start.month
+    partitions = []
+    for _ in range(months):
+        lower = datetime(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        partitions.append((f'ticket_events_{lower:%Y%m}', lower, datetime(year, month, 1)))
+    return partitions
+
+
+def create_ticket_event_partitions(connection, start, months):
+    """Create the monthly ticket_events partitions that do not exist yet (PostgreSQL).
+
+    There is no default partition (it would rule out DETACH PARTITION
+    CONCURRENTLY), so a change made in a month without a partition fails:
+    maintenance keeps TICKET_EVENTS_PARTITIONS_AHEAD months ready.
+    """
+    for name, lower, upper in ticket_event_partitions(start, months):
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF ticket_events "
+            f"FOR VALUES FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        ))
+
+
+@event.listens_for(TicketAuditEvent.__table__, 'after_create')
+def _create_initial_partitions(target, connection, **kw):
+    if connection.dialect.name != 'postgresql':
+        return
+    create_ticket_event_partitions(connection, datetime.utcnow(), 3)
+
+# Keys of Ticket.to_dict and TicketDTO, in order; the fields a list request may select
+TICKET_FIELDS = tuple(field.name for field in dataclasses.fields(TicketDTO))
+USER_FIELDS = tuple(field.name for field in dataclasses.fields(UserDTO))
+
+
+def ticket_projection(query, fields=TICKET_FIELDS, description_length=None, extra=()):
+    """Narrow a ticket query to the columns behind ``fields``, then ``extra``.
+
+    The requester and assignee are joined only when their names are
+    requested. With ``description_length`` the description is cut short in
+    SQL, one character past the limit so truncation can be detected.
+    Apply before LIMIT: the name joins cannot follow it.
+    """
+    requester = aliased(User)
+    assignee = aliased(User)
+    columns = []
+    for field in fields:
+        if field == 'user_name':
+            column = requester.first_name + ' ' + requester.last_name
+        elif field == 'assignee_name':
+            column = assignee.first_name + ' ' + assignee.last_name
+        elif field == 'description' and description_length:
+            column = func.substr(Ticket.description, 1, description_length + 1)
+        else:
+            column = getattr(Ticket, field)
+        columns.append(column.label(field))
+    
+    query = query.with_entities(*columns, *extra)
+    if 'user_name' in fields:
+        query = query.join(requester, Ticket.user_id == requester.id)
+    if 'assignee_name' in fields:
+        query = query.outerjoin(assignee, Ticket.assigned_to == assignee.id)
+    return query
+
+
+def serialize_projection(query, description_length=None):
+    """Serialize the rows of a ``ticket_projection`` query."""
+    items = []
+    for row in query:
+        item = dict(row._mapping)
+        if description_length and 'description' in item:
+            description = item['description']
+            item['description_truncated'] = bool(description) and len(description) > description_length
+            if item['description_truncated']:
+                item['description'] = description[:description_length]
+        items.append(item)
+    return items
+
+
+def ticket_dtos(query):
+    """TicketDTOs for a ``ticket_projection`` query over every field."""
+    return [TicketDTO(*row) for row in query]
+
+
+def user_dtos(query):
+    """UserDTOs for a User query, selecting only the DTO columns."""
+    columns = [getattr(User, name) for name in USER_FIELDS]
+    return [UserDTO(*row) for row in query.with_entities(*columns)]
@@ -0,0 +1,122 @@
+"""Password hashing with a configurable algorithm and cost.
+
+``PASSWORD_HASH_METHOD`` takes werkzeug's method strings
+(``pbkdf2:sha256:600000``, ``scrypt:32768:8:1``) plus
+``argon2[:time_cost:memory_cost_kib:parallelism]`` when ``argon2-cffi`` is
+installed. Hashes made with other settings still verify; ``needs_rehash``
+tells the login route to store a fresh one.
+
+Verification runs in a small thread pool (hashlib and argon2 release the
+GIL), so at most ``PASSWORD_VERIFY_WORKERS`` hashes are computed at once per
+process and a login storm cannot tie up every request thread on CPU.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+try:
+    import argon2
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:
+    argon2 = None
+
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+
+# Werkzeug's defaults, used to normalize short method strings ('scrypt', 'pbkdf2')
+_WERKZEUG_DEFAULTS = {
+    'pbkdf2': ('sha256', '600000'),
+    'scrypt': ('32768', '8', '1'),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = None
+
+
+class PasswordHashingBusy(RuntimeError):
+    """Raised when every verification slot stays taken for PASSWORD_VERIFY_TIMEOUT seconds."""
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def _normalize(method):
+    """Spell out a method with werkzeug's defaults, e.g. 'scrypt' -> 'scrypt:32768:8:1'."""
+    name, *params = method.split(':')
+    defaults = _WERKZEUG_DEFAULTS.get(name)
+    if defaults is None:
+        return method
+    return ':'.join([name, *params, *defaults[len(params):]])
+
+
+def _argon2_hasher(method):
+    if argon2 is None:
+        raise RuntimeError("PASSWORD_HASH_METHOD is argon2 but argon2-cffi is not installed")
+    params = [int(value) for value in method.split(':')[1:]]
+    names = ('time_cost', 'memory_cost', 'parallelism')
+    return argon2.PasswordHasher(**dict(zip(names, params)))
+
+
+def hash_method():
+    return _config('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+
+
+def hash_password(password):
+    """Hash ``password`` with the configured method."""
+    method = hash_method()
+    if method.startswith('argon2'):
+        return _argon2_hasher(method).hash(password)
+    return generate_password_hash(password, method=method)
+
+
+def check_password(password_hash, password):
+    """Check ``password`` against a hash made by any supported method."""
+    if password_hash.startswith('$argon2'):
+        if argon2 is None:
+            return False
+        try:
+            return argon2.PasswordHasher().verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """True when ``password_hash`` was made with other settings than the configured ones."""
+    method = hash_method()
+    if method.startswith('argon2'):
+        if not password_hash.startswith('$argon2'):
+            return True
+        return _argon2_hasher(method).check_needs_rehash(password_hash)
+    if password_hash.startswith('$argon2'):
+        return True
+    return _normalize(password_hash.split('$', 1)[0]) != _normalize(method)
+
+
+def _get_executor():
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            workers = _config('PASSWORD_VERIFY_WORKERS', 2)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-verify')
+            # Running plus queued verifications; beyond that callers wait for a slot
+            _slots = threading.BoundedSemaphore(workers * 2)
+        return _executor, _slots
+
+
+def verify_password(password_hash, password):
+    """``check_password`` on the verification pool; blocks until the result is ready.
+
+    Raises PasswordHashingBusy if no slot frees up within PASSWORD_VERIFY_TIMEOUT seconds.
+    """
+    executor, slots = _get_executor()
+    if not slots.acquire(timeout=_config('PASSWORD_VERIFY_TIMEOUT', 5)):
+        raise PasswordHashingBusy("Too many password checks in progress")
+    try:
+        return executor.submit(check_password, password_hash, password).result()
+    finally:
+        slots.release()
@@ -0,0 +1,104 @@
+"""Connection pool instrumentation for the SQLAlchemy engine."""
+import functools
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+class PoolMetrics:
+    """Counters fed by pool events; one instance per engine."""
+
+    def __init__(self, max_overflow=0):
+        self.max_overflow = max_overflow
+        self.connects = 0
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.checkout_timeouts = 0
+        self.invalidations = 0
+        self.peak_checked_out = 0
+        self._lock = threading.Lock()
+
+    def attach(self, engine):
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+        # The pool has no "checkout started" event: time every checkout at the
+        # engine, through which each Connection gets its DBAPI connection
+        engine.raw_connection = self._timed_checkout(engine.raw_connection)
+        # Read engine.pool on demand: dispose() (e.g. after a fork) replaces it
+        self.engine = engine
+        return self
+
+    @property
+    def pool(self):
+        return self.engine.pool
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _timed_checkout(self, raw_connection):
+        @functools.wraps(raw_connection)
+        def timed():
+            started = time.perf_counter()
+            try:
+                return raw_connection()
+            except PoolTimeoutError:
+                # Waited pool_timeout seconds for a checkin that never came
+                with self._lock:
+                    self.checkout_timeouts += 1
+                raise
+            finally:
+                self._record_wait(time.perf_counter() - started)
+        return timed
+
+    def _record_wait(self, seconds):
+        # Includes opening a new connection and the pre-ping, when those happen
+        with self._lock:
+            self.checkout_wait_total += seconds
+            self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        checked_out = self._checked_out()
+        with self._lock:
+            self.checkouts += 1
+            if checked_out is not None:
+                self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def _checked_out(self):
+        checkedout = getattr(self.pool, 'checkedout', None)
+        return checkedout() if checkedout else None
+
+    def snapshot(self):
+        """Live pool state plus counters since the worker started."""
+        stats = {'pool_class': type(self.pool).__name__}
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            method = getattr(self.pool, name, None)
+            if method:
+                stats[name] = method()
+        with self._lock:
+            stats.update({
+                'max_overflow': self.max_overflow,
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkout_wait_ms_total': round(self.checkout_wait_total * 1000, 1),
+                'checkout_wait_ms_max': round(self.checkout_wait_max * 1000, 1),
+                'checkout_timeouts': self.checkout_timeouts,
+                'invalidations': self.invalidations,
+                'peak_checked_out': self.peak_checked_out,
+            })
+        return stats
+
+
+def instrument_engine(app, engine):
+    """Attach PoolMetrics to ``engine`` and keep it on the app for the metrics endpoint."""
+    max_overflow = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}).get('max_overflow', 0)
+    metrics = PoolMetrics(max_overflow).attach(engine)
+    app.extensions['pool_metrics'] = metrics
+    return metrics
@@ -0,0 +1,25 @@
+from flask import Blueprint, jsonify, current_app
+from auth.auth_utils import admin_required
+from models import db, User
+from sessions import revoke_user_sessions
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/metrics/pool', methods=['GET'])
+@admin_required
+def get_pool_metrics():
+    """Admin endpoint exposing live database connection pool statistics"""
+    metrics = current_app.extensions.get('pool_metrics')
+    if metrics is None:
+        return jsonify({'error': 'Pool metrics are not enabled'}), 404
+    return jsonify(metrics.snapshot())
+
+@admin_bp.route('/users/<int:user_id>/sessions', methods=['DELETE'])
+@admin_required
+def revoke_sessions(user_id):
+    """Admin endpoint ending every session of a user (server-side sessions only)"""
+    db.get_or_404(User, user_id)
+    revoked = revoke_user_sessions(user_id)
+    if revoked is None:
+        return jsonify({'error': 'Server-side sessions are not enabled'}), 404
+    return jsonify({'user_id': user_id, 'revoked': revoked})
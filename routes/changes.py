@@ -0,0 +1,62 @@
+"""Delta sync for ticket lists (/api/tickets/changes).
+
+A client that holds a ticket list asks for what changed since its last
+sync token: the tickets whose ``updated_at`` is newer (read through
+``idx_tickets_updated_at``) and the ids of tickets to drop, from the
+trigger-written ``ticket_tombstones``. The token is an opaque timestamp.
+Each sync looks TICKET_CHANGES_OVERLAP seconds further back, to catch
+writes stamped before the previous sync but committed after it, so a
+change may be returned twice; clients apply them idempotently.
+"""
+import base64
+import json
+from datetime import datetime
+from models import db, Ticket, TicketTombstone, ticket_projection, ticket_dtos
+
+DEFAULT_CHANGES_LIMIT = 500
+
+
+class SyncTokenError(ValueError):
+    """Raised when the since token is invalid."""
+
+
+def encode_token(timestamp):
+    raw = json.dumps([timestamp.isoformat()], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_token(token):
+    try:
+        (timestamp,) = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return datetime.fromisoformat(timestamp)
+    except (ValueError, TypeError):
+        raise SyncTokenError('Invalid since token')
+
+
+def ticket_changes(since, user_id=None, limit=DEFAULT_CHANGES_LIMIT):
+    """Return (TicketDTOs updated after ``since``, ids removed after it), or None past ``limit``.
+
+    With ``user_id`` only tickets that user created or is assigned to are
+    returned, and removals include tickets taken from them as assignee.
+    Without it, every ticket is returned and only deletions are removals.
+    """
+    ticket_criteria = [Ticket.updated_at > since]
+    tombstone_criteria = [TicketTombstone.removed_at > since]
+    if user_id is None:
+        tombstone_criteria.append(TicketTombstone.kind == 'deleted')
+    else:
+        ticket_criteria.append((Ticket.user_id == user_id) | (Ticket.assigned_to == user_id))
+        tombstone_criteria.append((TicketTombstone.user_id == user_id) | (TicketTombstone.assigned_to == user_id))
+
+    query = Ticket.query.filter(*ticket_criteria).order_by(Ticket.updated_at, Ticket.id)
+    tickets = ticket_dtos(ticket_projection(query).limit(limit + 1))
+    if len(tickets) > limit:
+        return None
+
+    removed = db.session.query(TicketTombstone.ticket_id).filter(*tombstone_criteria).distinct().limit(limit + 1)
+    removed = [ticket_id for (ticket_id,) in removed]
+    if len(removed) > limit:
+        return None
+    # A ticket taken away and given back since ``since`` is simply updated
+    upserted = {ticket.id for ticket in tickets}
+    return tickets, [ticket_id for ticket_id in removed if ticket_id not in upserted]
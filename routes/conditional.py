@@ -0,0 +1,60 @@
+"""ETags and conditional GET (If-None-Match / 304) for ticket read endpoints.
+
+ETags are computed from cheap row metadata rather than the response body, so
+an unchanged resource is answered with a 304 before anything is serialized.
+"""
+import hashlib
+from flask import current_app, request
+from sqlalchemy import func, select
+from models import db, Ticket, User
+from auth.auth_utils import get_current_identity
+
+
+def _etag(*parts):
+    return hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+# Tickets carry their requester's and assignee's names: any user change
+# (rare, and one index lookup) counts as a change to every ticket
+_USERS_UPDATED = select(func.max(User.updated_at)).scalar_subquery()
+
+
+def ticket_list_etag(query):
+    """ETag for a ticket list from one aggregate over the unpaginated ``query``.
+
+    Any insert, delete or update within the list changes the row count or
+    the latest ``updated_at``, and renaming a user changes the latest
+    ``users.updated_at``. The request path (filters, cursor, limit) and
+    the user are part of the tag, as they shape the response too.
+    """
+    count, last_updated, users_updated = query.with_entities(
+        func.count(Ticket.id), func.max(Ticket.updated_at), _USERS_UPDATED
+    ).order_by(None).one()
+    identity = get_current_identity()
+    return _etag('tickets', identity.id if identity else None, request.full_path,
+                 count, _isoformat(last_updated), _isoformat(users_updated))
+
+
+def ticket_etag(ticket):
+    """ETag for a single ticket, from its id, ``updated_at`` and the latest user change."""
+    return _etag('ticket', ticket.id, _isoformat(ticket.updated_at),
+                 _isoformat(db.session.execute(_USERS_UPDATED.element).scalar()))
+
+
+def not_modified(etag):
+    """Return a 304 response when the client already holds ``etag``, else None."""
+    # Weak comparison: compression turns the tag weak (W/"...") on the way out
+    if request.if_none_match.contains_weak(etag):
+        return tag_response(current_app.response_class(status=304), etag)
+    return None
+
+
+def tag_response(response, etag):
+    """Attach ``etag`` and ask browsers to revalidate before reusing their copy."""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
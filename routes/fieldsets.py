@@ -0,0 +1,56 @@
+"""Sparse fieldsets (``?fields=``) and the summary view for ticket lists.
+
+``fields=id,title,status`` returns only those keys and selects only their
+columns; ``view=summary`` returns every key but cuts ``description`` short
+in SQL. ``id`` and ``created_at`` are always included: they form the page
+cursor. Without either parameter every field is returned, as TicketDTOs.
+"""
+from flask import request
+from models import Ticket, TICKET_FIELDS, ticket_projection, ticket_dtos, serialize_projection
+from .pagination import paginate_query, page_response
+
+TICKET_VIEWS = ('full', 'summary')
+SUMMARY_DESCRIPTION_LENGTH = 50
+
+CURSOR_FIELDS = ('id', 'created_at')
+
+
+class FieldsetError(ValueError):
+    """Raised when the fields or view query parameters are invalid."""
+
+
+def requested_fields():
+    """Return (fields, description_length) for the request, or (None, None) for full rows."""
+    view = request.args.get('view', 'full')
+    if view not in TICKET_VIEWS:
+        raise FieldsetError(f"view must be one of: {', '.join(TICKET_VIEWS)}")
+
+    fields = request.args.get('fields')
+    if fields:
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in TICKET_FIELDS]
+        if unknown:
+            raise FieldsetError(f"Unknown fields: {', '.join(unknown)}")
+    elif view == 'summary':
+        fields = list(TICKET_FIELDS)
+    else:
+        return None, None
+
+    fields = [field for field in CURSOR_FIELDS if field not in fields] + fields
+    description_length = SUMMARY_DESCRIPTION_LENGTH if view == 'summary' else None
+    return list(dict.fromkeys(fields)), description_length
+
+
+def ticket_list_response(query, union_of=()):
+    """Paginate and serialize a ticket list query, honouring fields and view.
+
+    ``union_of`` is passed on to paginate_query. Raises PaginationError or
+    FieldsetError for invalid query parameters.
+    """
+    fields, description_length = requested_fields()
+    if fields is None:
+        query, limit = paginate_query(ticket_projection(query), Ticket, union_of)
+        return page_response(ticket_dtos(query), limit)
+
+    query, limit = paginate_query(ticket_projection(query, fields, description_length), Ticket, union_of)
+    return page_response(serialize_projection(query, description_length), limit)
@@ -0,0 +1,78 @@
+from flask import Blueprint, current_app, jsonify
+from datetime import datetime
+from sqlalchemy import text
+from models import db
+import logging
+import threading
+import time
+
+health_bp = Blueprint('health', __name__)
+logger = logging.getLogger(__name__)
+
+_check_lock = threading.Lock()
+
+def _check_database():
+    """Run SELECT 1 on a pooled connection that is returned straight away."""
+    started = time.perf_counter()
+    try:
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+        ok, error = True, None
+    except Exception as e:
+        # The driver's message can name hosts and users: keep it in the log
+        logger.error(f"Readiness check failed: {str(e)}")
+        ok, error = False, 'database unavailable'
+    return {
+        'ok': ok,
+        'error': error,
+        'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+        'checked_at': datetime.utcnow().isoformat(),
+        'expires': time.monotonic() + current_app.config.get('READINESS_CACHE_SECONDS', 10)
+    }
+
+def _cached_database_check():
+    """Return the last database check, re-running it once the cache interval has passed."""
+    cache = current_app.extensions.setdefault('readiness', {})
+    result = cache.get('database')
+    if result and result['expires'] > time.monotonic():
+        return result, True
+
+    # One thread refreshes; concurrent probes wait for its result
+    with _check_lock:
+        result = cache.get('database')
+        if result and result['expires'] > time.monotonic():
+            return result, True
+        result = cache['database'] = _check_database()
+    return result, False
+
+def _pool_status():
+    metrics = current_app.extensions.get('pool_metrics')
+    if metrics is None:
+        return None
+    stats = metrics.snapshot()
+    status = {key: stats[key] for key in ('checkedout', 'size', 'overflow') if key in stats}
+    if stats.get('size'):
+        capacity = stats['size'] + stats['max_overflow']
+        status['saturation'] = round(stats['checkedout'] / capacity, 2)
+    return status
+
+@health_bp.route('/health')
+def health_check():
+    """Liveness probe: the process is up and serving requests. Never touches the database."""
+    return {"status": "healthy"}, 200
+
+@health_bp.route('/ready')
+def readiness_check():
+    """Readiness probe: database reachable, with the result cached for READINESS_CACHE_SECONDS."""
+    result, cached = _cached_database_check()
+    database = {key: result[key] for key in ('ok', 'latency_ms', 'checked_at')}
+    database['cached'] = cached
+    if result['error']:
+        database['error'] = result['error']
+
+    body = {
+        'status': 'ready' if result['ok'] else 'unavailable',
+        'database': database,
+        'pool': _pool_status()
+    }
+    return jsonify(body), 200 if result['ok'] else 503
@@ -0,0 +1,135 @@
+"""Keyset (cursor) pagination for ticket list endpoints.
+
+Pages are ordered newest first on ``(created_at, id)`` and the cursor is an
+opaque, URL-safe token holding the sort key of the last row on the page.
+Ranked results (search) have no stable sort key and page by offset instead,
+behind the same opaque cursor.
+"""
+import base64
+import json
+from datetime import datetime
+from flask import current_app, jsonify, request
+from sqlalchemy import and_, or_, select, union
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PaginationError(ValueError):
+    """Raised when the cursor or limit query parameters are invalid."""
+
+
+def _encode(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def encode_cursor(created_at, ticket_id):
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    return _encode([created_at, ticket_id])
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, ticket_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), int(ticket_id)
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+
+
+def encode_offset(offset):
+    return _encode([offset])
+
+
+def decode_offset(cursor):
+    try:
+        (offset,) = _decode(cursor)
+        offset = int(offset)
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+    if offset < 0:
+        raise PaginationError('Invalid cursor')
+    return offset
+
+
+def page_size():
+    """Return the requested page size, capped at the configured maximum."""
+    default = current_app.config.get('TICKETS_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    maximum = current_app.config.get('TICKETS_MAX_PAGE_SIZE', MAX_PAGE_SIZE)
+    try:
+        limit = int(request.args.get('limit', default))
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    return max(1, min(limit, maximum))
+
+
+def paginate_query(query, model, union_of=()):
+    """Apply the request cursor and keyset ordering to ``query``.
+
+    With ``union_of``, the list is the union of those criteria (say, created
+    by OR assigned to a user). Each criterion is paged on its own, reading
+    its index in page order, and ``query`` keeps only the ids they return:
+    no more than a page per criterion is fetched and sorted, where an OR
+    would sort every matching row to find the first page.
+
+    Returns the query (limited to one row more than the page size, so the
+    caller can tell whether another page exists) and the page size.
+    """
+    limit = page_size()
+    cursor = request.args.get('cursor')
+    criteria = []
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        criteria.append(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < last_id)
+        ))
+    order = (model.created_at.desc(), model.id.desc())
+    if union_of:
+        pages = [
+            select(model.id).where(criterion, *criteria).order_by(*order).limit(limit + 1).subquery()
+            for criterion in union_of
+        ]
+        criteria.append(model.id.in_(union(*(select(page.c.id) for page in pages))))
+    query = query.filter(*criteria).order_by(*order).limit(limit + 1)
+    return query, limit
+
+
+def paginate_offset(query):
+    """Apply the request cursor as an offset, for orders without a keyset.
+
+    Returns the query (limited to one row more than the page size), the page
+    size and the offset of this page.
+    """
+    limit = page_size()
+    cursor = request.args.get('cursor')
+    offset = decode_offset(cursor) if cursor else 0
+    return query.offset(offset).limit(limit + 1), limit, offset
+
+
+def page_response(items, limit, next_cursor=None):
+    """Build the JSON list response, exposing the next cursor as a header.
+
+    ``items`` are dicts or DTOs. ``next_cursor`` is used when another page
+    exists; it defaults to the keyset cursor of the last item.
+    """
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        if isinstance(last, dict):
+            next_cursor = next_cursor or encode_cursor(last['created_at'], last['id'])
+        else:
+            next_cursor = next_cursor or encode_cursor(last.created_at, last.id)
+    else:
+        next_cursor = None
+
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
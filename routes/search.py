@@ -0,0 +1,76 @@
+"""Full-text ticket search.
+
+PostgreSQL matches against the GIN-indexed ``tickets.search_vector`` column;
+SQLite (tests, local runs) against the ``tickets_fts`` FTS5 table. Both
+backends return rows of every ticket field followed by ``rank``
+(higher-is-better) and the title and description with highlight markers.
+"""
+import re
+from markupsafe import escape
+from sqlalchemy import column, func, literal_column, table
+from models import db, Ticket, TICKET_SEARCH_VECTOR, ticket_projection
+
+MAX_QUERY_LENGTH = 200
+
+# Markers turned into <mark> tags after the text has been HTML-escaped. JSON
+# can carry any control character, so ticket writes reject these two
+# (has_highlight_markers) and PostgreSQL strips them from older rows before
+# highlighting; a stray marker would otherwise become a stray tag
+_START, _STOP = '\x02', '\x03'
+
+_tickets_fts = table('tickets_fts', column('rowid'))
+
+
+def has_highlight_markers(*texts):
+    """Whether any of ``texts`` contains a highlight marker character."""
+    return any(isinstance(text, str) and (_START in text or _STOP in text) for text in texts)
+
+
+def _without_markers(text):
+    return func.translate(text, _START + _STOP, '')
+
+
+def _postgresql_search(query_text):
+    ts_query = func.websearch_to_tsquery('english', query_text)
+    rank = func.ts_rank_cd(TICKET_SEARCH_VECTOR, ts_query)
+    options = f'StartSel="{_START}", StopSel="{_STOP}"'
+    title = func.ts_headline('english', _without_markers(Ticket.title), ts_query, options + ', HighlightAll=true')
+    description = func.ts_headline(
+        'english', _without_markers(func.coalesce(Ticket.description, '')), ts_query,
+        options + ', MaxFragments=2, MaxWords=20, MinWords=5'
+    )
+    query = Ticket.query.filter(
+        TICKET_SEARCH_VECTOR.op('@@')(ts_query)
+    ).order_by(rank.desc(), Ticket.id.desc())
+    return query, (rank, title, description)
+
+
+def _sqlite_search(query_text):
+    # Quote every word so FTS5 query syntax in user input is matched literally
+    terms = re.findall(r'\w+', query_text)
+    match = ' '.join(f'"{term}"' for term in terms) or '""'
+    fts = literal_column('tickets_fts')
+    # bm25 is lower-is-better; weight title matches above description
+    bm25 = func.bm25(fts, 10.0, 1.0)
+    title = func.highlight(fts, 0, _START, _STOP)
+    description = func.snippet(fts, 1, _START, _STOP, '...', 20)
+    query = Ticket.query.join(
+        _tickets_fts, _tickets_fts.c.rowid == Ticket.id
+    ).filter(fts.op('MATCH')(match)).order_by(bm25, Ticket.id.desc())
+    return query, (-bm25, title, description)
+
+
+def search_tickets(query_text, *criteria):
+    """Ranked tickets matching ``query_text``, optionally narrowed by ``criteria``."""
+    if db.engine.dialect.name == 'sqlite':
+        query, extra = _sqlite_search(query_text)
+    else:
+        query, extra = _postgresql_search(query_text)
+    return ticket_projection(query.filter(*criteria), extra=extra)
+
+
+def highlight(text):
+    """HTML-escape ``text`` and wrap the matched terms in <mark> tags."""
+    if not text:
+        return text
+    return str(escape(text)).replace(_START, '<mark>').replace(_STOP, '</mark>')
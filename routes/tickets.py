@@ -1,51 +1,260 @@
-from flask import Blueprint, request, jsonify
-from models import db, Ticket, User
-from auth.auth_utils import login_required, get_current_user, admin_required
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_
+from models import db, Ticket, TicketAuditEvent, TicketCounter, User
+from dto import AdminUserDTO, TicketEventDTO, TicketSearchResultDTO
+from auth.auth_utils import login_required, get_current_identity, admin_required
+from .pagination import PaginationError, paginate_offset, paginate_query, page_response, encode_offset
+from .conditional import ticket_list_etag, ticket_etag, not_modified, tag_response
+from .fieldsets import FieldsetError, ticket_list_response
+from .export import EXPORT_FORMATS, EXPORT_GENERATORS, export_statement
+from .search import MAX_QUERY_LENGTH, search_tickets, highlight, has_highlight_markers
+from .changes import SyncTokenError, encode_token, decode_token, ticket_changes
+from ticket_bus import StreamCapacityError, ticket_audience, publish_ticket_changes, ticket_bus, event_stream
+from ticket_history import AUDITED_FIELDS, ticket_values, field_changes, record_ticket_events, history_query
 import logging
 
 tickets_bp = Blueprint('tickets', __name__)
 logger = logging.getLogger(__name__)
 
+TICKET_STATUSES = ('open', 'in_progress', 'closed', 'cancelled')
+TICKET_PRIORITIES = ('low', 'medium', 'high', 'urgent')
+BULK_OPERATIONS = ('assign', 'status', 'priority', 'delete')
+MAX_BULK_TICKETS = 500
+INVALID_TEXT_ERROR = 'title and description cannot contain the control characters U+0002 or U+0003'
+# Stream and history event recorded for each bulk operation
+BULK_EVENTS = {'assign': 'assigned', 'status': 'updated', 'priority': 'updated', 'delete': 'deleted'}
+
+def _ticket_stats(*criteria):
+    """Count tickets by status and assignment from the trigger-maintained ticket_counters."""
+    unassigned = TicketCounter.assigned_to == 0
+    rows = db.session.query(TicketCounter.status, unassigned, func.sum(TicketCounter.ticket_count)).filter(
+        *criteria
+    ).group_by(TicketCounter.status, unassigned).all()
+    
+    stats = dict.fromkeys(('total', 'unassigned') + TICKET_STATUSES, 0)
+    for status, is_unassigned, count in rows:
+        stats['total'] += count
+        if status in TICKET_STATUSES:
+            stats[status] += count
+        if is_unassigned:
+            stats['unassigned'] += count
+    return stats
+
 @tickets_bp.route('/', methods=['GET'])
 @login_required
 def get_tickets():
     try:
-        current_user = get_current_user()
+        current_user = get_current_identity()
         
         if not current_user:
             return jsonify({"error": "User not authenticated"}), 401
         
         # This endpoint always shows only personal tickets (created by user OR assigned to user)
         # Even for admins when they're using the regular dashboard
-        tickets = Ticket.query.filter(
-            (Ticket.user_id == current_user.id) | 
-            (Ticket.assigned_to == current_user.id)
-        ).all()
-        
-        return jsonify([ticket.to_dict() for ticket in tickets])
+        mine = (Ticket.user_id == current_user.id, Ticket.assigned_to == current_user.id)
+        # The ETag counts every match, combining both indexes; the page is
+        # read as a UNION of the two sides, each paged on its own index
+        etag = ticket_list_etag(Ticket.query.filter(or_(*mine)))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        return tag_response(ticket_list_response(Ticket.query, union_of=mine), etag)
+    except (PaginationError, FieldsetError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error in get_tickets: {str(e)}")
         return jsonify({"error": "Failed to fetch tickets", "details": str(e)}), 500
 
-@tickets_bp.route('/admin/all', methods=['GET'])
+@tickets_bp.route('/stats', methods=['GET'])
+@login_required
+def get_ticket_stats():
+    """Counts for the tickets the current user created or is assigned to"""
+    current_user = get_current_identity()
+    if not current_user:
+        return jsonify({"error": "User not authenticated"}), 401
+    
+    return jsonify(_ticket_stats(
+        (TicketCounter.user_id == current_user.id) | 
+        (TicketCounter.assigned_to == current_user.id)
+    ))
+
+@tickets_bp.route('/stream', methods=['GET'])
+@login_required
+def stream():
+    """Server-sent events for ticket changes the current user may see.
+    
+    Events are ``created``, ``updated``, ``assigned`` and ``deleted`` with the
+    ticket (just its id when deleted), ``removed`` when a ticket leaves a
+    user's own/assigned list, and ``reset`` when the client missed events and
+    should reload. Reconnects resume from ``Last-Event-ID`` (header or query
+    parameter). Each connection holds a worker thread for up to
+    TICKET_STREAM_MAX_DURATION seconds, then the browser reconnects. Past
+    TICKET_STREAM_MAX_CONNECTIONS streams per worker the answer is a 503,
+    keeping threads free for the API, and clients poll /changes instead.
+    """
+    current_user = get_current_identity()
+    if not current_user:
+        return jsonify({"error": "User not authenticated"}), 401
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    bus = ticket_bus()
+    config = current_app.config
+    try:
+        subscription, missed = bus.subscribe(current_user.id, current_user.is_admin, last_event_id)
+    except StreamCapacityError as e:
+        response = jsonify({'error': str(e)})
+        response.status_code = 503
+        # A slot frees up at the latest when the oldest stream ends
+        response.headers['Retry-After'] = str(max(1, int(config.get('TICKET_STREAM_MAX_DURATION', 300))))
+        return response
+    response = Response(
+        event_stream(bus, subscription, missed,
+                     heartbeat=config.get('TICKET_STREAM_HEARTBEAT', 15),
+                     max_duration=config.get('TICKET_STREAM_MAX_DURATION', 300)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # The generator's finally only runs once iteration starts; a response the
+    # server closes before sending (client gone, error) must free the slot too
+    response.call_on_close(lambda: bus.unsubscribe(subscription))
+    return response
+
+@tickets_bp.route('/changes', methods=['GET'])
+@login_required
+def get_ticket_changes():
+    """Tickets changed and removed since the ``since`` token, for incremental refresh.
+    
+    Returns ``tickets`` (full rows), ``removed`` (ids to drop) and ``next``,
+    the token for the following call. Without ``since`` only ``next`` is
+    meaningful: take it before loading the list. Admins sync every ticket
+    unless ``scope=mine``; other users the tickets they created or are
+    assigned to. ``reset`` means the gap is too old or too large to send:
+    reload the list.
+    """
+    current_user = get_current_identity()
+    if not current_user:
+        return jsonify({"error": "User not authenticated"}), 401
+    
+    config = current_app.config
+    now = datetime.utcnow()
+    next_token = encode_token(now)
+    if not request.args.get('since'):
+        return jsonify({'tickets': [], 'removed': [], 'next': next_token})
+    try:
+        since = decode_token(request.args['since'])
+    except SyncTokenError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Tombstones are only kept for the retention period
+    if since < now - timedelta(days=config.get('TICKET_TOMBSTONE_RETENTION_DAYS', 7)):
+        return jsonify({'reset': True, 'next': next_token})
+    
+    user_id = None if current_user.is_admin and request.args.get('scope') != 'mine' else current_user.id
+    changes = ticket_changes(
+        since - timedelta(seconds=config.get('TICKET_CHANGES_OVERLAP', 5)), user_id,
+        limit=config.get('TICKET_CHANGES_LIMIT', 500)
+    )
+    if changes is None:
+        return jsonify({'reset': True, 'next': next_token})
+    tickets, removed = changes
+    return jsonify({'tickets': tickets, 'removed': removed, 'next': next_token})
+
+@tickets_bp.route('/search', methods=['GET'])
+@login_required
+def search():
+    """Full-text search over ticket titles and descriptions, best matches first.
+    
+    Admins search every ticket (unless ``scope=mine``); other users the
+    tickets they created or are assigned to. Each result carries HTML-escaped ``highlights`` with the
+    matched terms wrapped in <mark> tags.
+    """
+    current_user = get_current_identity()
+    if not current_user:
+        return jsonify({"error": "User not authenticated"}), 401
+    
+    query_text = request.args.get('q', '').strip()
+    if not query_text:
+        return jsonify({'error': 'q is required'}), 400
+    if len(query_text) > MAX_QUERY_LENGTH:
+        return jsonify({'error': f'q must be at most {MAX_QUERY_LENGTH} characters'}), 400
+    
+    criteria = []
+    if not current_user.is_admin or request.args.get('scope') == 'mine':
+        criteria.append(
+            (Ticket.user_id == current_user.id) | 
+            (Ticket.assigned_to == current_user.id)
+        )
+    
+    try:
+        query, limit, offset = paginate_offset(search_tickets(query_text, *criteria))
+        results = []
+        for row in query:
+            *ticket, rank, title, description = row
+            results.append(TicketSearchResultDTO(*ticket, round(float(rank), 6), {
+                'title': highlight(title), 'description': highlight(description)
+            }))
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in search: {str(e)}")
+        return jsonify({"error": "Search failed"}), 500
+    
+    return page_response(results, limit, next_cursor=encode_offset(offset + limit))
+
+@tickets_bp.route('/admin/stats', methods=['GET'])
 @admin_required
-def get_all_tickets():
-    """Admin endpoint to get all tickets with filtering options"""
+def get_admin_ticket_stats():
+    """Admin endpoint with counts across all tickets"""
+    return jsonify(_ticket_stats())
+
+def _admin_filter_criteria():
+    """Status, priority and assignee filters from the query string"""
     status_filter = request.args.get('status')
     priority_filter = request.args.get('priority')
     assigned_to_filter = request.args.get('assigned_to')
     
-    query = Ticket.query
-    
+    criteria = []
     if status_filter:
-        query = query.filter_by(status=status_filter)
+        criteria.append(Ticket.status == status_filter)
     if priority_filter:
-        query = query.filter_by(priority=priority_filter)
-    if assigned_to_filter:
-        query = query.filter_by(assigned_to=assigned_to_filter)
+        criteria.append(Ticket.priority == priority_filter)
+    if assigned_to_filter == 'unassigned':
+        criteria.append(Ticket.assigned_to.is_(None))
+    elif assigned_to_filter:
+        criteria.append(Ticket.assigned_to == assigned_to_filter)
+    return criteria
+
+@tickets_bp.route('/admin/all', methods=['GET'])
+@admin_required
+def get_all_tickets():
+    """Admin endpoint to get all tickets with filtering options"""
+    query = Ticket.query.filter(*_admin_filter_criteria())
+    etag = ticket_list_etag(query)
+    cached = not_modified(etag)
+    if cached:
+        return cached
     
-    tickets = query.all()
-    return jsonify([ticket.to_dict() for ticket in tickets])
+    try:
+        return tag_response(ticket_list_response(query), etag)
+    except (PaginationError, FieldsetError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@tickets_bp.route('/admin/export', methods=['GET'])
+@admin_required
+def export_tickets():
+    """Admin endpoint streaming every matching ticket as CSV or NDJSON"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    statement = export_statement(*_admin_filter_criteria())
+    filename = f"tickets-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}"
+    return Response(
+        stream_with_context(EXPORT_GENERATORS[export_format](statement)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
 
 @tickets_bp.route('/admin/assign/<int:ticket_id>', methods=['PUT'])
 @admin_required
@@ -53,6 +262,8 @@ def assign_ticket(ticket_id):
     """Admin endpoint to assign tickets to users"""
     ticket = Ticket.query.get_or_404(ticket_id)
     data = request.get_json()
+    previous = ticket_audience(ticket.user_id, ticket.assigned_to)
+    before = ticket_values(ticket)
     
     assigned_to = data.get('assigned_to')
     if assigned_to:
@@ -66,17 +277,107 @@ def assign_ticket(ticket_id):
         ticket.assigned_to = None
     
     try:
+        record_ticket_events(get_current_identity().id, 'assigned', {
+            ticket.id: field_changes(before, ticket_values(ticket))
+        })
         db.session.commit()
+        publish_ticket_changes('assigned', {ticket.id: previous})
         return jsonify(ticket.to_dict())
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+def _validate_bulk_request(data):
+    """Validate a bulk request once for all tickets; returns (ids, values, error)."""
+    if not isinstance(data, dict):
+        return None, None, 'Request body must be a JSON object'
+    ticket_ids = data.get('ticket_ids')
+    if not isinstance(ticket_ids, list) or not ticket_ids:
+        return None, None, 'ticket_ids must be a non-empty list'
+    if len(ticket_ids) > MAX_BULK_TICKETS:
+        return None, None, f'At most {MAX_BULK_TICKETS} tickets can be changed at once'
+    if not all(isinstance(ticket_id, int) and not isinstance(ticket_id, bool) for ticket_id in ticket_ids):
+        return None, None, 'ticket_ids must be integers'
+    
+    operation = data.get('operation')
+    if operation not in BULK_OPERATIONS:
+        return None, None, f"operation must be one of: {', '.join(BULK_OPERATIONS)}"
+    
+    values = {}
+    if operation == 'assign':
+        assigned_to = data.get('assigned_to')
+        if assigned_to is not None and (not isinstance(assigned_to, int) or isinstance(assigned_to, bool)):
+            return None, None, 'assigned_to must be an integer or null'
+        values['assigned_to'] = None
+        if assigned_to:
+            assignee = User.query.get(assigned_to)
+            if not assignee or not assignee.is_admin:
+                return None, None, 'Can only assign tickets to admin users'
+            values['assigned_to'] = assignee.id
+    elif operation == 'status':
+        if data.get('status') not in TICKET_STATUSES:
+            return None, None, f"status must be one of: {', '.join(TICKET_STATUSES)}"
+        values['status'] = data['status']
+    elif operation == 'priority':
+        if data.get('priority') not in TICKET_PRIORITIES:
+            return None, None, f"priority must be one of: {', '.join(TICKET_PRIORITIES)}"
+        values['priority'] = data['priority']
+    
+    # Preserve request order, drop duplicates
+    return list(dict.fromkeys(ticket_ids)), values, None
+
+@tickets_bp.route('/admin/bulk', methods=['POST'])
+@admin_required
+def bulk_update_tickets():
+    """Admin endpoint to assign, re-status, re-prioritize or delete many tickets at once"""
+    data = request.get_json(silent=True)
+    ticket_ids, values, error = _validate_bulk_request(data)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    operation = data['operation']
+    try:
+        # Lock the matched rows so the per-id results stay accurate until commit
+        rows = db.session.query(
+            Ticket.id, Ticket.user_id, *(getattr(Ticket, field) for field in AUDITED_FIELDS)
+        ).filter(Ticket.id.in_(ticket_ids)).with_for_update().all()
+        found = {row.id: ticket_audience(row.user_id, row.assigned_to) for row in rows}
+        if found:
+            before = {row.id: ticket_values(row) for row in rows}
+            matched = Ticket.query.filter(Ticket.id.in_(list(found)))
+            if operation == 'delete':
+                changes = {ticket_id: field_changes(fields, {}) for ticket_id, fields in before.items()}
+                matched.delete(synchronize_session=False)
+            else:
+                changes = {ticket_id: field_changes(fields, {**fields, **values}) for ticket_id, fields in before.items()}
+                values['updated_at'] = datetime.utcnow()
+                matched.update(values, synchronize_session=False)
+            # One multi-row insert for the whole batch, in the same transaction
+            record_ticket_events(get_current_identity().id, BULK_EVENTS[operation], changes)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in bulk_update_tickets: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+    
+    publish_ticket_changes(BULK_EVENTS[operation], found)
+    done = 'deleted' if operation == 'delete' else 'updated'
+    return jsonify({
+        'operation': operation,
+        'affected': len(found),
+        'results': [
+            {'id': ticket_id, 'result': done if ticket_id in found else 'not_found'}
+            for ticket_id in ticket_ids
+        ]
+    })
+
 @tickets_bp.route('/', methods=['POST'])
 @login_required
 def create_ticket():
-    current_user = get_current_user()
+    current_user = get_current_identity()
     data = request.get_json()
+    if has_highlight_markers(data.get('title'), data.get('description')):
+        return jsonify({'error': INVALID_TEXT_ERROR}), 400
     try:
         ticket = Ticket(
             title=data['title'],
@@ -86,7 +387,10 @@ def create_ticket():
             user_id=current_user.id  # Always use current user's ID
         )
         db.session.add(ticket)
+        db.session.flush()
+        record_ticket_events(current_user.id, 'created', {ticket.id: field_changes({}, ticket_values(ticket))})
         db.session.commit()
+        publish_ticket_changes('created', {ticket.id: frozenset()})
         return jsonify(ticket.to_dict()), 201
     except Exception as e:
         db.session.rollback()
@@ -95,19 +399,44 @@ def create_ticket():
 @tickets_bp.route('/<int:ticket_id>', methods=['GET'])
 @login_required
 def get_ticket(ticket_id):
-    current_user = get_current_user()
+    current_user = get_current_identity()
     ticket = Ticket.query.get_or_404(ticket_id)
     
     # Admins can view any ticket, users can view tickets they created or are assigned to
     if not current_user.is_admin and ticket.user_id != current_user.id and ticket.assigned_to != current_user.id:
         return jsonify({'error': 'Access denied'}), 403
     
-    return jsonify(ticket.to_dict())
+    etag = ticket_etag(ticket)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    return tag_response(jsonify(ticket.to_dict()), etag)
+
+@tickets_bp.route('/<int:ticket_id>/history', methods=['GET'])
+@login_required
+def get_ticket_history(ticket_id):
+    """Who changed what on a ticket, newest first, cursor-paginated.
+    
+    Each event has the ``action`` and ``changes`` as ``{field: [old, new]}``.
+    Admins can also read the history of deleted tickets.
+    """
+    current_user = get_current_identity()
+    ticket = db.session.get(Ticket, ticket_id)
+    if ticket is None and not current_user.is_admin:
+        return jsonify({'error': 'Ticket not found'}), 404
+    if ticket is not None and not current_user.is_admin and current_user.id not in (ticket.user_id, ticket.assigned_to):
+        return jsonify({'error': 'Access denied'}), 403
+    
+    try:
+        query, limit = paginate_query(history_query(ticket_id), TicketAuditEvent)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    return page_response([TicketEventDTO(*row) for row in query], limit)
 
 @tickets_bp.route('/<int:ticket_id>', methods=['PUT'])
 @login_required
 def update_ticket(ticket_id):
-    current_user = get_current_user()
+    current_user = get_current_identity()
     ticket = Ticket.query.get_or_404(ticket_id)
     
     # Admins can update any ticket, users can update tickets they created or are assigned to
@@ -115,6 +444,10 @@ def update_ticket(ticket_id):
         return jsonify({'error': 'Access denied'}), 403
     
     data = request.get_json()
+    if has_highlight_markers(data.get('title'), data.get('description')):
+        return jsonify({'error': INVALID_TEXT_ERROR}), 400
+    previous = ticket_audience(ticket.user_id, ticket.assigned_to)
+    before = ticket_values(ticket)
     try:
         ticket.title = data.get('title', ticket.title)
         ticket.description = data.get('description', ticket.description)
@@ -134,7 +467,9 @@ def update_ticket(ticket_id):
                     return jsonify({'error': 'Can only assign tickets to admin users'}), 400
             ticket.assigned_to = assigned_to
         
+        record_ticket_events(current_user.id, 'updated', {ticket.id: field_changes(before, ticket_values(ticket))})
         db.session.commit()
+        publish_ticket_changes('updated', {ticket.id: previous})
         return jsonify(ticket.to_dict())
     except Exception as e:
         db.session.rollback()
@@ -143,16 +478,19 @@ def update_ticket(ticket_id):
 @tickets_bp.route('/<int:ticket_id>', methods=['DELETE'])
 @login_required
 def delete_ticket(ticket_id):
-    current_user = get_current_user()
+    current_user = get_current_identity()
     ticket = Ticket.query.get_or_404(ticket_id)
     
     # Only admins can delete tickets
     if not current_user.is_admin:
         return jsonify({'error': 'Admin privileges required to delete tickets'}), 403
     
+    changes = {ticket.id: ticket_audience(ticket.user_id, ticket.assigned_to)}
     try:
+        record_ticket_events(current_user.id, 'deleted', {ticket.id: field_changes(ticket_values(ticket), {})})
         db.session.delete(ticket)
         db.session.commit()
+        publish_ticket_changes('deleted', changes)
         return jsonify({'message': 'Ticket deleted successfully'})
     except Exception as e:
         db.session.rollback()
@@ -162,9 +500,7 @@ def delete_ticket(ticket_id):
 @admin_required
 def get_admin_users():
     """Get all admin users for ticket assignment"""
-    admin_users = User.query.filter_by(is_admin=True, is_active=True).all()
-    return jsonify([{
-        'id': user.id,
-        'username': user.username,
-        'full_name': f"{user.first_name} {user.last_name}"
-    } for user in admin_users])
\ No newline at end of file
+    rows = db.session.query(
+        User.id, User.username, User.first_name + ' ' + User.last_name
+    ).filter_by(is_admin=True, is_active=True)
+    return jsonify([AdminUserDTO(*row) for row in rows])
\ No newline at end of file
@@ -1,14 +1,18 @@
 from flask import Blueprint, request, jsonify
-from models import db, User
-from auth.auth_utils import login_required, get_current_user
+from models import db, Ticket, User, user_dtos
+from auth.auth_utils import login_required, get_current_identity, invalidate_current_user, store_identity
+from .conditional import ticket_list_etag, not_modified, tag_response
+from .fieldsets import FieldsetError, ticket_list_response
+from .pagination import PaginationError
+from ticket_bus import ticket_audience, publish_ticket_changes
+from ticket_history import AUDITED_FIELDS, ticket_values, field_changes, record_ticket_events
 
 users_bp = Blueprint('users', __name__)
 
 @users_bp.route('/', methods=['GET'])
 @login_required
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    return jsonify(user_dtos(User.query))
 
 @users_bp.route('/', methods=['POST'])
 def create_user():
@@ -43,7 +47,7 @@ def create_user():
 @users_bp.route('/<int:user_id>', methods=['GET'])
 @login_required
 def get_user(user_id):
-    current_user = get_current_user()
+    current_user = get_current_identity()
     # Users can only view their own profile or all users if admin (simplified check)
     if current_user.id != user_id:
         return jsonify({'error': 'Access denied'}), 403
@@ -54,7 +58,7 @@ def get_user(user_id):
 @users_bp.route('/<int:user_id>', methods=['PUT'])
 @login_required
 def update_user(user_id):
-    current_user = get_current_user()
+    current_user = get_current_identity()
     if current_user.id != user_id:
         return jsonify({'error': 'Access denied'}), 403
     
@@ -70,6 +74,9 @@ def update_user(user_id):
             user.set_password(data['password'])
         
         db.session.commit()
+        invalidate_current_user()
+        # Re-stamp this session so a password change only revokes other sessions
+        store_identity(user)
         return jsonify(user.to_dict())
     except Exception as e:
         db.session.rollback()
@@ -78,14 +85,33 @@ def update_user(user_id):
 @users_bp.route('/<int:user_id>', methods=['DELETE'])
 @login_required
 def delete_user(user_id):
-    current_user = get_current_user()
+    current_user = get_current_identity()
     if current_user.id != user_id:
         return jsonify({'error': 'Access denied'}), 403
     
     user = User.query.get_or_404(user_id)
+    # The user's tickets are deleted with them; tickets assigned to them become unassigned
+    deleted, unassigned = {}, {}
+    history = {'deleted': {}, 'assigned': {}}
+    rows = db.session.query(
+        Ticket.id, Ticket.user_id, *(getattr(Ticket, field) for field in AUDITED_FIELDS)
+    ).filter((Ticket.user_id == user_id) | (Ticket.assigned_to == user_id))
+    for row in rows:
+        before = ticket_values(row)
+        if row.user_id == user_id:
+            deleted[row.id] = ticket_audience(row.user_id, row.assigned_to)
+            history['deleted'][row.id] = field_changes(before, {})
+        else:
+            unassigned[row.id] = ticket_audience(row.user_id, row.assigned_to)
+            history['assigned'][row.id] = field_changes(before, dict(before, assigned_to=None))
     try:
+        for action, changes in history.items():
+            record_ticket_events(user_id, action, changes)
         db.session.delete(user)
         db.session.commit()
+        publish_ticket_changes('deleted', deleted)
+        publish_ticket_changes('assigned', unassigned)
+        invalidate_current_user()
         return jsonify({'message': 'User deleted successfully'})
     except Exception as e:
         db.session.rollback()
@@ -94,11 +120,17 @@ def delete_user(user_id):
 @users_bp.route('/<int:user_id>/tickets', methods=['GET'])
 @login_required
 def get_user_tickets(user_id):
-    current_user = get_current_user()
+    current_user = get_current_identity()
     if current_user.id != user_id:
         return jsonify({'error': 'Access denied'}), 403
     
-    from models import Ticket
     user = User.query.get_or_404(user_id)
-    tickets = Ticket.query.filter_by(user_id=user_id).all()
-    return jsonify([ticket.to_dict() for ticket in tickets])
\ No newline at end of file
+    query = Ticket.query.filter_by(user_id=user_id)
+    etag = ticket_list_etag(query)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    try:
+        return tag_response(ticket_list_response(query), etag)
+    except (PaginationError, FieldsetError) as e:
+        return jsonify({'error': str(e)}), 400
\ No newline at end of file
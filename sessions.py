@@ -0,0 +1,354 @@
+"""Server-side sessions, enabled with SESSION_STORE = 'sql' or 'local-kv'.
+
+The cookie carries only a random session id. Session data lives in a
+``SessionBackend`` (the ``user_sessions`` table, or a ``kvstore.KVStore``
+shared by the workers) behind a small per-process LRU, so most requests
+neither hit the backend nor verify a signature over the whole session.
+
+Sessions expire PERMANENT_SESSION_LIFETIME after their last use. A request
+writes back only when it changed the session, or at most once per
+SESSION_TOUCH_INTERVAL seconds to slide the expiry. The id is replaced
+whenever the session changes hands (login), and ``revoke_user_sessions``
+ends every session of a user at once. Revoked sessions may still be served
+from another worker's LRU for up to SESSION_CACHE_TTL seconds.
+"""
+import hashlib
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from werkzeug.datastructures import CallbackDict
+from models import db, UserSession
+from kvstore import LocalKVStore
+
+EXTENSION_KEY = 'session_store'
+SESSION_STORES = ('cookie', 'sql', 'local-kv')
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict that records its id, owner and expiry as loaded from the store."""
+
+    def __init__(self, initial=None, sid=None, user_id=None, expires_at=None):
+        def on_update(session):
+            session.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.loaded_user_id = user_id
+        self.expires_at = expires_at
+        self.modified = False
+
+
+class SessionBackend(ABC):
+    """Shared session storage. ``payload`` is the serialized session; times are epoch seconds."""
+
+    @abstractmethod
+    def load(self, sid):
+        """Return ``(payload, user_id, expires_at)``, or None if missing or expired."""
+
+    @abstractmethod
+    def save(self, sid, payload, user_id, expires_at):
+        """Store a session, replacing any with the same id."""
+
+    @abstractmethod
+    def touch(self, sid, expires_at):
+        """Extend a session without rewriting it."""
+
+    @abstractmethod
+    def delete(self, sid):
+        """Delete a session if it exists."""
+
+    @abstractmethod
+    def delete_user_sessions(self, user_id):
+        """Delete every session of ``user_id``; return how many there were."""
+
+    def purge_expired(self):
+        """Delete expired sessions; return how many were removed."""
+        return 0
+
+
+class SQLSessionBackend(SessionBackend):
+    """Sessions in the user_sessions table, written outside the request's transaction.
+
+    Rows are keyed by the SHA-256 of the session id, so the table alone
+    (a backup, a read-only SQL account) cannot be used to hijack a session.
+    """
+
+    table = UserSession.__table__
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+
+    def load(self, sid):
+        with db.engine.connect() as connection:
+            row = connection.execute(self.table.select().where(
+                self.table.c.sid == _sid_digest(sid), self.table.c.expires_at > _datetime(self._clock())
+            )).first()
+        if row is None:
+            return None
+        return row.data, row.user_id, _timestamp(row.expires_at)
+
+    def save(self, sid, payload, user_id, expires_at):
+        values = {'data': payload, 'user_id': user_id, 'expires_at': _datetime(expires_at)}
+        with db.engine.begin() as connection:
+            updated = connection.execute(
+                self.table.update().where(self.table.c.sid == _sid_digest(sid)).values(values)
+            )
+            if not updated.rowcount:
+                connection.execute(self.table.insert().values(sid=_sid_digest(sid), **values))
+
+    def touch(self, sid, expires_at):
+        with db.engine.begin() as connection:
+            connection.execute(
+                self.table.update().where(self.table.c.sid == _sid_digest(sid)).values(
+                    expires_at=_datetime(expires_at)
+                )
+            )
+
+    def delete(self, sid):
+        with db.engine.begin() as connection:
+            connection.execute(self.table.delete().where(self.table.c.sid == _sid_digest(sid)))
+
+    def delete_user_sessions(self, user_id):
+        with db.engine.begin() as connection:
+            return connection.execute(self.table.delete().where(self.table.c.user_id == user_id)).rowcount
+
+    def purge_expired(self):
+        with db.engine.begin() as connection:
+            return connection.execute(
+                self.table.delete().where(self.table.c.expires_at <= _datetime(self._clock()))
+            ).rowcount
+
+
+class KVSessionBackend(SessionBackend):
+    """Sessions in a shared KVStore, with a per-user index of session ids for revocation."""
+
+    def __init__(self, store, prefix='session:', clock=time.time, max_retries=10):
+        self._store = store
+        self._prefix = prefix
+        self._clock = clock
+        self._max_retries = max_retries
+
+    def _user_key(self, user_id):
+        return f'{self._prefix}user:{user_id}'
+
+    def load(self, sid):
+        record, _ = self._store.get(self._prefix + sid)
+        if record is None or record[2] <= self._clock():
+            return None
+        return record
+
+    def save(self, sid, payload, user_id, expires_at):
+        ttl = expires_at - self._clock()
+        self._store.set(self._prefix + sid, (payload, user_id, expires_at), ttl)
+        if user_id is not None:
+            self._update_index(user_id, lambda sids: sids | {sid}, ttl)
+
+    def touch(self, sid, expires_at):
+        key = self._prefix + sid
+        for _ in range(self._max_retries):
+            record, version = self._store.get(key)
+            if record is None:
+                return
+            payload, user_id, _ = record
+            ttl = expires_at - self._clock()
+            if self._store.compare_and_set(key, (payload, user_id, expires_at), version, ttl):
+                if user_id is not None:
+                    self._update_index(user_id, lambda sids: sids, ttl)
+                return
+
+    def delete(self, sid):
+        self._store.delete(self._prefix + sid)
+
+    def delete_user_sessions(self, user_id):
+        sids, _ = self._store.get(self._user_key(user_id))
+        self._store.delete(self._user_key(user_id))
+        count = 0
+        for sid in sids or ():
+            if self.load(sid) is not None:
+                count += 1
+            self.delete(sid)
+        return count
+
+    def _update_index(self, user_id, change, ttl):
+        # The index lives as long as the user's longest-lived session
+        key = self._user_key(user_id)
+        for _ in range(self._max_retries):
+            sids, version = self._store.get(key)
+            sids = frozenset(sid for sid in (sids or ()) if self.load(sid) is not None)
+            if self._store.compare_and_set(key, frozenset(change(sids)), version, ttl):
+                return
+
+
+class _LocalCache:
+    """Per-process LRU of recently used sessions; entries are re-checked after ``ttl`` seconds."""
+
+    def __init__(self, max_entries, ttl, clock=time.monotonic):
+        self._entries = OrderedDict()  # sid -> (record, cached_at)
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._clock = clock
+
+    def get(self, sid):
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            if entry[1] + self._ttl <= self._clock():
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return entry[0]
+
+    def put(self, sid, record):
+        if not self._max_entries:
+            return
+        with self._lock:
+            self._entries[sid] = (record, self._clock())
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def pop_user(self, user_id):
+        with self._lock:
+            for sid in [sid for sid, (record, _) in self._entries.items() if record[1] == user_id]:
+                del self._entries[sid]
+
+
+class ServerSideSessionInterface(SessionInterface):
+    serializer = session_json_serializer
+    session_class = ServerSideSession
+
+    def __init__(self, backend, cache_size=10000, cache_ttl=5, touch_interval=60, clock=time.time):
+        self.backend = backend
+        self.cache = _LocalCache(cache_size, cache_ttl)
+        self.touch_interval = touch_interval
+        self._clock = clock
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return self.session_class()
+        record = self.cache.get(sid)
+        if record is None or record[2] <= self._clock():
+            record = self.backend.load(sid)
+            if record is None:
+                return self.session_class()
+            self.cache.put(sid, record)
+        payload, user_id, expires_at = record
+        return self.session_class(self.serializer.loads(payload), sid, user_id, expires_at)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.sid is not None:
+                self._delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+                response.vary.add('Cookie')
+            return
+
+        now = self._clock()
+        expires_at = now + app.permanent_session_lifetime.total_seconds()
+        user_id = session.get('user_id')
+        new_sid = session.sid is None or user_id != session.loaded_user_id
+        if new_sid:
+            # New session, or it changed hands: never carry an id across a login
+            if session.sid is not None:
+                self._delete(session.sid)
+            session.sid = secrets.token_urlsafe(32)
+            session.modified = True
+
+        if session.modified:
+            payload = self.serializer.dumps(dict(session))
+            self.backend.save(session.sid, payload, user_id, expires_at)
+            self.cache.put(session.sid, (payload, user_id, expires_at))
+        elif expires_at - session.expires_at >= self.touch_interval:
+            self.backend.touch(session.sid, expires_at)
+            self.cache.pop(session.sid)
+        else:
+            return
+
+        if new_sid or session.permanent:
+            response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                                httponly=httponly, domain=domain, path=path, secure=secure, samesite=samesite)
+            response.vary.add('Cookie')
+
+    def _delete(self, sid):
+        self.backend.delete(sid)
+        self.cache.pop(sid)
+
+    def revoke_user_sessions(self, user_id):
+        count = self.backend.delete_user_sessions(user_id)
+        self.cache.pop_user(user_id)
+        return count
+
+
+def _sid_digest(sid):
+    return hashlib.sha256(sid.encode()).hexdigest()
+
+
+# The table stores naive UTC datetimes, like the rest of the schema
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _timestamp(value):
+    return (value - _EPOCH).total_seconds()
+
+
+def _datetime(timestamp):
+    return _EPOCH + timedelta(seconds=timestamp)
+
+
+def _backend_from_config(config):
+    store = config.get('SESSION_STORE', 'cookie')
+    if store == 'sql':
+        return SQLSessionBackend()
+    if store == 'local-kv':
+        return KVSessionBackend(LocalKVStore())
+    raise ValueError(f"SESSION_STORE must be one of: {', '.join(SESSION_STORES)}")
+
+
+def init_sessions(app, backend=None):
+    """Switch ``app`` to server-side sessions on ``backend`` or the SESSION_STORE one.
+
+    Leaves Flask's signed cookie sessions in place when SESSION_STORE is 'cookie'.
+    """
+    if backend is None:
+        if app.config.get('SESSION_STORE', 'cookie') == 'cookie':
+            return None
+        backend = _backend_from_config(app.config)
+    interface = ServerSideSessionInterface(
+        backend,
+        cache_size=app.config.get('SESSION_CACHE_SIZE', 10000),
+        cache_ttl=app.config.get('SESSION_CACHE_TTL', 5),
+        touch_interval=app.config.get('SESSION_TOUCH_INTERVAL', 60),
+    )
+    app.session_interface = interface
+    app.extensions[EXTENSION_KEY] = interface
+    return interface
+
+
+def revoke_user_sessions(user_id):
+    """End every server-side session of ``user_id``; None when sessions are cookies."""
+    interface = current_app.extensions.get(EXTENSION_KEY)
+    if interface is None:
+        return None
+    return interface.revoke_user_sessions(user_id)
@@ -7,6 +7,10 @@
 -- \c igdsupport;
 
 -- Drop tables if they exist (for clean setup)
+DROP TABLE IF EXISTS user_sessions CASCADE;
+DROP TABLE IF EXISTS ticket_counters CASCADE;
+DROP TABLE IF EXISTS ticket_tombstones CASCADE;
+DROP TABLE IF EXISTS ticket_events CASCADE;
 DROP TABLE IF EXISTS tickets CASCADE;
 DROP TABLE IF EXISTS users CASCADE;
 
@@ -17,6 +21,8 @@ DROP VIEW IF EXISTS admin_ticket_stats CASCADE;
 
 -- Drop functions if they exist
 DROP FUNCTION IF EXISTS update_updated_at_column() CASCADE;
+DROP FUNCTION IF EXISTS update_ticket_counters() CASCADE;
+DROP FUNCTION IF EXISTS record_ticket_tombstone() CASCADE;
 DROP FUNCTION IF EXISTS get_user_ticket_count(INTEGER) CASCADE;
 DROP FUNCTION IF EXISTS get_admin_tickets(INTEGER) CASCADE;
 DROP FUNCTION IF EXISTS get_unassigned_tickets() CASCADE;
@@ -36,6 +42,7 @@ CREATE TABLE users (
     is_admin BOOLEAN DEFAULT FALSE,
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
     -- Add constraints
     CONSTRAINT chk_username_length CHECK (LENGTH(username) >= 3),
@@ -55,6 +62,12 @@ CREATE TABLE tickets (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
+    -- Full-text search document (title weighted above description)
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED,
+    
     -- Foreign key constraints
     CONSTRAINT fk_tickets_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     CONSTRAINT fk_tickets_assigned_to FOREIGN KEY (assigned_to) REFERENCES users(id) ON DELETE SET NULL,
@@ -65,31 +78,113 @@ CREATE TABLE tickets (
     CONSTRAINT chk_title_length CHECK (LENGTH(title) >= 1)
 );
 
+-- Server-side sessions (SESSION_STORE=sql); purge expired rows with `flask --app main sessions-purge`
+CREATE TABLE user_sessions (
+    sid VARCHAR(64) PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    data TEXT NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- Ticket counts per (requester, assignee, status, priority), kept exact by the
+-- maintain_ticket_counters trigger. assigned_to is 0 for unassigned tickets.
+-- Recount with `flask --app main counters-rebuild`.
+CREATE TABLE ticket_counters (
+    user_id INTEGER NOT NULL,
+    assigned_to INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    priority VARCHAR(20) NOT NULL,
+    ticket_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, assigned_to, status, priority)
+);
+
+-- Tickets deleted ('deleted') or taken from their assignee ('unassigned'), written
+-- by the record_ticket_tombstones trigger for /api/tickets/changes.
+-- Purge old rows with `flask --app main tombstones-purge`.
+CREATE TABLE ticket_tombstones (
+    id SERIAL PRIMARY KEY,
+    ticket_id INTEGER NOT NULL,
+    user_id INTEGER,
+    assigned_to INTEGER,
+    kind VARCHAR(20) NOT NULL,
+    removed_at TIMESTAMP NOT NULL
+);
+
+-- Append-only ticket history, one row per change with {field: [old, new]}.
+-- Partitioned by month so expired months are detached concurrently and
+-- dropped whole. Run `flask --app main ticket-events-maintain` after setup
+-- and then monthly: it creates the coming months' partitions and applies
+-- retention. There is no default partition (DETACH PARTITION CONCURRENTLY
+-- is refused when one exists), so ticket changes fail in a month that has
+-- no partition yet; `flask --app main db-init` also creates them on every deploy.
+CREATE TABLE ticket_events (
+    id BIGSERIAL NOT NULL,
+    ticket_id INTEGER NOT NULL,
+    actor_id INTEGER,
+    action VARCHAR(20) NOT NULL,
+    changes JSON NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- This month's partition and the next two (TICKET_EVENTS_PARTITIONS_AHEAD)
+DO $$
+DECLARE
+    lower_bound DATE;
+BEGIN
+    FOR i IN 0..2 LOOP
+        lower_bound := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE;
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF ticket_events FOR VALUES FROM (%L) TO (%L)',
+            'ticket_events_' || to_char(lower_bound, 'YYYYMM'),
+            lower_bound,
+            (lower_bound + INTERVAL '1 month')::DATE
+        );
+    END LOOP;
+END $$;
+
 -- ============================================================================
 -- INDEXES FOR PERFORMANCE
 -- ============================================================================
 
--- User table indexes
-CREATE INDEX idx_users_username ON users(username);
-CREATE INDEX idx_users_email ON users(email);
-CREATE INDEX idx_users_created_at ON users(created_at);
-CREATE INDEX idx_users_active ON users(is_active);
+-- User table indexes (username and email are indexed by their UNIQUE constraints)
 CREATE INDEX idx_users_is_admin ON users(is_admin);
 
--- Ticket table indexes
-CREATE INDEX idx_tickets_user_id ON tickets(user_id);
-CREATE INDEX idx_tickets_assigned_to ON tickets(assigned_to);
-CREATE INDEX idx_tickets_status ON tickets(status);
-CREATE INDEX idx_tickets_priority ON tickets(priority);
-CREATE INDEX idx_tickets_created_at ON tickets(created_at);
-CREATE INDEX idx_tickets_updated_at ON tickets(updated_at);
+-- Ticket ETags read the latest users.updated_at (names appear in ticket responses)
+CREATE INDEX ix_users_updated_at ON users(updated_at);
+
+-- Ticket table indexes. Each one is read by a route query; run
+-- benchmarks/query_plans.py --setup-indexes to list any that no plan uses.
+-- Keyset pagination: list endpoints page newest first on (created_at, id)
+CREATE INDEX idx_tickets_created_id ON tickets(created_at DESC, id DESC);
 
--- Composite indexes for common queries
-CREATE INDEX idx_tickets_user_status ON tickets(user_id, status);
-CREATE INDEX idx_tickets_user_priority ON tickets(user_id, priority);
+-- Personal lists: one index per side of the user_id / assigned_to UNION,
+-- in page order. They also serve the foreign key lookups on both columns.
+CREATE INDEX idx_tickets_user_created ON tickets(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_tickets_assigned_created ON tickets(assigned_to, created_at DESC, id DESC);
+
+-- Admin list filters
 CREATE INDEX idx_tickets_status_priority ON tickets(status, priority);
-CREATE INDEX idx_tickets_user_created ON tickets(user_id, created_at DESC);
-CREATE INDEX idx_tickets_assigned_status ON tickets(assigned_to, status);
+
+-- Delta sync (/api/tickets/changes)
+CREATE INDEX idx_tickets_updated_at ON tickets(updated_at);
+
+-- Full-text search (/api/tickets/search)
+CREATE INDEX idx_tickets_search ON tickets USING GIN (search_vector);
+
+-- Per-assignee stats (the primary key covers per-requester lookups)
+CREATE INDEX ix_ticket_counters_assigned_to ON ticket_counters(assigned_to);
+
+-- Session revocation per user and expiry purges
+CREATE INDEX ix_user_sessions_user_id ON user_sessions(user_id);
+CREATE INDEX ix_user_sessions_expires_at ON user_sessions(expires_at);
+
+-- Delta sync reads (/api/tickets/changes) and tombstone purges
+CREATE INDEX ix_ticket_tombstones_removed_at ON ticket_tombstones(removed_at);
+
+-- Ticket history per ticket, newest first, and retention (created on every partition)
+CREATE INDEX ix_ticket_events_ticket_created ON ticket_events(ticket_id, created_at, id);
+CREATE INDEX ix_ticket_events_created_at ON ticket_events(created_at);
 
 -- ============================================================================
 -- TRIGGERS AND FUNCTIONS
@@ -110,6 +205,56 @@ CREATE TRIGGER update_tickets_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_users_updated_at 
+    BEFORE UPDATE ON users
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- Keep ticket_counters in step with every insert, delete and counted-column update
+CREATE OR REPLACE FUNCTION update_ticket_counters()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE ticket_counters SET ticket_count = ticket_count - 1
+        WHERE user_id = OLD.user_id AND assigned_to = COALESCE(OLD.assigned_to, 0)
+          AND status = COALESCE(OLD.status, '') AND priority = COALESCE(OLD.priority, '');
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO ticket_counters (user_id, assigned_to, status, priority, ticket_count)
+        VALUES (NEW.user_id, COALESCE(NEW.assigned_to, 0), COALESCE(NEW.status, ''), COALESCE(NEW.priority, ''), 1)
+        ON CONFLICT (user_id, assigned_to, status, priority)
+        DO UPDATE SET ticket_count = ticket_counters.ticket_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER maintain_ticket_counters
+    AFTER INSERT OR DELETE OR UPDATE OF user_id, assigned_to, status, priority ON tickets
+    FOR EACH ROW
+    EXECUTE FUNCTION update_ticket_counters();
+
+-- Record deletions, and assignees losing a ticket they did not request
+CREATE OR REPLACE FUNCTION record_ticket_tombstone()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO ticket_tombstones (ticket_id, user_id, assigned_to, kind, removed_at)
+        VALUES (OLD.id, OLD.user_id, OLD.assigned_to, 'deleted', (now() AT TIME ZONE 'utc'));
+    ELSIF OLD.assigned_to IS NOT NULL AND OLD.assigned_to IS DISTINCT FROM NEW.assigned_to
+          AND OLD.assigned_to <> NEW.user_id THEN
+        INSERT INTO ticket_tombstones (ticket_id, user_id, assigned_to, kind, removed_at)
+        VALUES (OLD.id, NULL, OLD.assigned_to, 'unassigned', (now() AT TIME ZONE 'utc'));
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER record_ticket_tombstones
+    AFTER DELETE OR UPDATE OF assigned_to ON tickets
+    FOR EACH ROW
+    EXECUTE FUNCTION record_ticket_tombstone();
+
 -- ============================================================================
 -- UTILITY FUNCTIONS
 -- ============================================================================
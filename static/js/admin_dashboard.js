@@ -2,20 +2,32 @@
 let tickets = [];
 let adminUsers = [];
 let filteredTickets = [];
+let nextCursor = null;
+let selectedTicketIds = new Set();
+let ticketStream = null;
+let statsTimer = null;
+let syncToken = null;
+let pollTimer = null;
+
+// Without a live stream, poll for changes this often (ms)
+const SYNC_INTERVAL = 30000;
+
+// Must match SUMMARY_DESCRIPTION_LENGTH in routes/fieldsets.py
+const SUMMARY_DESCRIPTION_LENGTH = 50;
 
 document.addEventListener('DOMContentLoaded', function() {
     loadAdminUsers();
     loadTickets();
     setupEventListeners();
+    ticketStream = subscribeToTicketChanges();
+    if (!ticketStream) startPolling();
     
     // Initialize create ticket modal with admin dashboard-specific options
     initCreateTicketModal({
         redirectAfterCreate: false,
         onTicketCreated: (newTicket) => {
-            // Add the new ticket to the admin dashboard
-            tickets.unshift(newTicket);
-            updateStats();
-            filterTickets();
+            // Add the new ticket to the admin dashboard (the stream may have already)
+            mergeTicket(newTicket);
         }
     });
 });
@@ -24,8 +36,7 @@ function setupEventListeners() {
     // Initialize edit ticket modal
     initEditTicketModal({
         onTicketUpdated: (updatedTicket) => {
-            // Reload tickets to refresh the display
-            loadTickets();
+            mergeTicket(updatedTicket);
         },
         allTickets: tickets
     });
@@ -72,35 +83,181 @@ function populateAssigneeDropdowns() {
             dropdown.appendChild(option);
         });
     });
+
+    const bulkAssign = document.getElementById('bulkAssignOptions');
+    if (bulkAssign) {
+        bulkAssign.innerHTML = '<option value="assign:">Unassign</option>';
+        adminUsers.forEach(user => {
+            const option = document.createElement('option');
+            option.value = `assign:${user.id}`;
+            option.textContent = `Assign to ${user.full_name}`;
+            bulkAssign.appendChild(option);
+        });
+    }
+}
+
+function subscribeToTicketChanges() {
+    return subscribeTicketStream({
+        upsert: (ticket) => mergeTicket(ticket),
+        remove: (ticketId) => {
+            dropTicket(ticketId);
+            refreshAfterChange();
+        },
+        reset: () => syncTicketChanges(),
+        fallback: () => {
+            ticketStream = null;
+            startPolling();
+        }
+    });
+}
+
+function startPolling() {
+    if (pollTimer) return;
+    pollTimer = setInterval(syncTicketChanges, SYNC_INTERVAL);
+}
+
+function matchesFilters(ticket) {
+    const value = id => (document.getElementById(id) || {}).value;
+    const status = value('statusFilter');
+    const priority = value('priorityFilter');
+    const assignee = value('assigneeFilter');
+    if (status && ticket.status !== status) return false;
+    if (priority && ticket.priority !== priority) return false;
+    if (assignee === 'unassigned') return ticket.assigned_to === null;
+    return !assignee || String(ticket.assigned_to) === assignee;
+}
+
+// Shape a full ticket like the rows of the summary list
+function toSummary(ticket) {
+    const description = ticket.description;
+    const truncated = Boolean(description) && description.length > SUMMARY_DESCRIPTION_LENGTH;
+    return {
+        ...ticket,
+        description: truncated ? description.substring(0, SUMMARY_DESCRIPTION_LENGTH) : description,
+        description_truncated: truncated
+    };
+}
+
+// Apply a created or changed ticket to the loaded list, honouring the filters
+function mergeTicket(ticket) {
+    applyTicket(ticket);
+    refreshAfterChange();
+}
+
+function applyTicket(ticket) {
+    if (matchesFilters(ticket)) {
+        upsertTicket(tickets, toSummary(ticket), Boolean(nextCursor));
+    } else {
+        dropTicket(ticket.id);
+    }
+}
+
+function dropTicket(ticketId) {
+    removeTicket(tickets, ticketId);
+    selectedTicketIds.delete(ticketId);
+}
+
+// Catch up from the last sync token instead of reloading every ticket
+async function syncTicketChanges() {
+    if (!syncToken) return loadTickets();
+    try {
+        const changes = await fetchTicketChanges(syncToken);
+        if (changes.reset) return loadTickets();
+        syncToken = changes.next;
+        changes.removed.forEach(dropTicket);
+        changes.tickets.forEach(applyTicket);
+        refreshAfterChange();
+    } catch (error) {
+        console.error('Error syncing tickets:', error);
+    }
+}
+
+function refreshAfterChange() {
+    filteredTickets = [...tickets];
+    displayTickets();
+    // Bursts of changes (bulk updates) refresh the counts once
+    clearTimeout(statsTimer);
+    statsTimer = setTimeout(updateStats, 500);
+}
+
+// Without a live stream, sync to show the result of an action
+function syncUnlessLive() {
+    if (!ticketStream) syncTicketChanges();
+}
+
+function ticketsUrl(cursor = null) {
+    // Filters are applied server-side so paging stays consistent
+    // The table only shows the start of each description
+    const params = new URLSearchParams({ view: 'summary' });
+    const filters = { status: 'statusFilter', priority: 'priorityFilter', assigned_to: 'assigneeFilter' };
+    Object.entries(filters).forEach(([param, elementId]) => {
+        const element = document.getElementById(elementId);
+        if (element && element.value) params.set(param, element.value);
+    });
+    if (cursor) params.set('cursor', cursor);
+    return `/api/tickets/admin/all?${params}`;
+}
+
+async function fetchTicketsPage(cursor = null) {
+    const response = await fetch(ticketsUrl(cursor));
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+    }
+    return {
+        items: await response.json(),
+        nextCursor: response.headers.get('X-Next-Cursor')
+    };
 }
 
 async function loadTickets() {
     try {
-        const response = await fetch('/api/tickets/admin/all');
-        if (response.ok) {
-            tickets = await response.json();
-            filteredTickets = [...tickets];
-            
-            // Update the edit modal's tickets array reference
-            if (editTicketModalInstance) {
-                editTicketModalInstance.updateTicketsArray(tickets);
-            }
-            
-            displayTickets();
-            updateStats();
-        } else {
-            showError('Failed to load tickets');
+        // Taken first, so changes made while the list loads are synced later
+        syncToken = (await fetchTicketChanges()).next;
+        const page = await fetchTicketsPage();
+        tickets = page.items;
+        nextCursor = page.nextCursor;
+        filteredTickets = [...tickets];
+        selectedTicketIds.clear();
+        
+        // Update the edit modal's tickets array reference
+        if (editTicketModalInstance) {
+            editTicketModalInstance.updateTicketsArray(tickets);
         }
+        
+        displayTickets();
+        updateStats();
     } catch (error) {
         console.error('Error loading tickets:', error);
         showError('Error loading tickets');
     }
 }
 
+async function loadMoreTickets() {
+    if (!nextCursor) return;
+    const button = document.getElementById('loadMoreButton');
+    if (button) button.disabled = true;
+    try {
+        const page = await fetchTicketsPage(nextCursor);
+        // Append in place so the edit modal keeps its reference to tickets
+        tickets.push(...page.items);
+        nextCursor = page.nextCursor;
+        filteredTickets = [...tickets];
+        displayTickets();
+    } catch (error) {
+        console.error('Error loading tickets:', error);
+        showError('Error loading tickets');
+    } finally {
+        if (button) button.disabled = false;
+    }
+}
+
 function displayTickets() {
     const tbody = document.getElementById('ticketsTableBody');
     const noTickets = document.getElementById('noTickets');
     const ticketsTable = document.getElementById('ticketsTable');
+    const loadMore = document.getElementById('loadMore');
+
+    loadMore.style.display = nextCursor ? 'block' : 'none';
 
     if (filteredTickets.length === 0) {
         ticketsTable.style.display = 'none';
@@ -113,10 +270,14 @@ function displayTickets() {
 
     tbody.innerHTML = filteredTickets.map(ticket => `
         <tr>
+            <td>
+                <input type="checkbox" class="form-check-input" ${selectedTicketIds.has(ticket.id) ? 'checked' : ''}
+                       onchange="toggleTicketSelection(${ticket.id}, this.checked)">
+            </td>
             <td><span class="badge bg-secondary">#${ticket.id}</span></td>
             <td>
                 <strong>${escapeHtml(ticket.title)}</strong>
-                ${ticket.description ? `<br><small class="text-muted">${escapeHtml(ticket.description.substring(0, 50))}${ticket.description.length > 50 ? '...' : ''}</small>` : ''}
+                ${ticket.description ? `<br><small class="text-muted">${escapeHtml(ticket.description)}${ticket.description_truncated ? '...' : ''}</small>` : ''}
             </td>
             <td>
                 <span class="text-primary">
@@ -155,50 +316,95 @@ function displayTickets() {
             </td>
         </tr>
     `).join('');
+    updateSelectionControls();
 }
 
-function updateStats() {
-    const total = tickets.length;
-    const unassigned = tickets.filter(t => !t.assigned_to).length;
-    const inProgress = tickets.filter(t => t.status === 'in_progress').length;
-    const closed = tickets.filter(t => t.status === 'closed').length;
+function toggleTicketSelection(ticketId, checked) {
+    if (checked) {
+        selectedTicketIds.add(ticketId);
+    } else {
+        selectedTicketIds.delete(ticketId);
+    }
+    updateSelectionControls();
+}
 
-    document.getElementById('totalTickets').textContent = total;
-    document.getElementById('unassignedTickets').textContent = unassigned;
-    document.getElementById('inProgressTickets').textContent = inProgress;
-    document.getElementById('closedTickets').textContent = closed;
+function toggleSelectAll(checked) {
+    filteredTickets.forEach(ticket => toggleTicketSelection(ticket.id, checked));
+    displayTickets();
 }
 
-function applyFilters() {
-    const statusFilter = document.getElementById('statusFilter').value;
-    const priorityFilter = document.getElementById('priorityFilter').value;
-    const assigneeFilter = document.getElementById('assigneeFilter').value;
+function updateSelectionControls() {
+    document.getElementById('selectedCount').textContent = selectedTicketIds.size;
+    document.getElementById('bulkApplyButton').disabled = selectedTicketIds.size === 0;
+    document.getElementById('selectAllTickets').checked =
+        filteredTickets.length > 0 && filteredTickets.every(ticket => selectedTicketIds.has(ticket.id));
+}
 
-    filteredTickets = tickets.filter(ticket => {
-        const statusMatch = !statusFilter || ticket.status === statusFilter;
-        const priorityMatch = !priorityFilter || ticket.priority === priorityFilter;
-        
-        let assigneeMatch = true;
-        if (assigneeFilter) {
-            if (assigneeFilter === 'unassigned') {
-                assigneeMatch = !ticket.assigned_to;
-            } else {
-                assigneeMatch = ticket.assigned_to && ticket.assigned_to.toString() === assigneeFilter;
-            }
+async function applyBulkAction() {
+    const action = document.getElementById('bulkAction').value;
+    if (!action || selectedTicketIds.size === 0) return;
+
+    // Values look like "status:closed", "assign:3" or "delete"
+    const [operation, value] = action.split(':');
+    const payload = { ticket_ids: [...selectedTicketIds], operation };
+    if (operation === 'status') payload.status = value;
+    if (operation === 'priority') payload.priority = value;
+    if (operation === 'assign') payload.assigned_to = value ? parseInt(value, 10) : null;
+
+    if (operation === 'delete' &&
+        !confirm(`Delete ${selectedTicketIds.size} ticket(s)? This action cannot be undone.`)) {
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/tickets/admin/bulk', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(payload)
+        });
+        const result = await response.json();
+        if (response.ok) {
+            document.getElementById('bulkAction').value = '';
+            selectedTicketIds.clear();
+            syncUnlessLive();
+            showSuccess(`${result.affected} ticket(s) updated`);
+        } else {
+            showError(result.error || 'Bulk update failed');
         }
+    } catch (error) {
+        console.error('Error applying bulk action:', error);
+        showError('Error applying bulk action');
+    }
+}
 
-        return statusMatch && priorityMatch && assigneeMatch;
-    });
+async function updateStats() {
+    // Counts come from the server so they cover every ticket, not just loaded pages
+    try {
+        const response = await fetch('/api/tickets/admin/stats');
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        const stats = await response.json();
+        document.getElementById('totalTickets').textContent = stats.total;
+        document.getElementById('unassignedTickets').textContent = stats.unassigned;
+        document.getElementById('inProgressTickets').textContent = stats.in_progress;
+        document.getElementById('closedTickets').textContent = stats.closed;
+    } catch (error) {
+        console.error('Error loading ticket stats:', error);
+    }
+}
 
-    displayTickets();
+function applyFilters() {
+    loadTickets();
 }
 
 function clearFilters() {
     document.getElementById('statusFilter').value = '';
     document.getElementById('priorityFilter').value = '';
     document.getElementById('assigneeFilter').value = '';
-    filteredTickets = [...tickets];
-    displayTickets();
+    loadTickets();
 }
 
 function showAssignModal(ticketId) {
@@ -227,7 +433,7 @@ async function assignTicket() {
         if (response.ok) {
             const modal = bootstrap.Modal.getInstance(document.getElementById('assignTicketModal'));
             modal.hide();
-            loadTickets();
+            syncUnlessLive();
             showSuccess('Ticket assigned successfully');
         } else {
             const error = await response.json();
@@ -250,7 +456,7 @@ async function deleteTicket(ticketId) {
         });
 
         if (response.ok) {
-            loadTickets();
+            syncUnlessLive();
             showSuccess('Ticket deleted successfully');
         } else {
             const error = await response.json();
@@ -1,7 +1,7 @@
 // Unified API helper
 (function(global){
   if (global.apiRequest) { return; }
-  async function apiRequest(url, options = {}) {
+  async function apiFetch(url, options = {}) {
     if (url.startsWith('http://') || url.startsWith('https://')) {
       if (window.location.protocol === 'https:' && url.startsWith('http://')) {
         url = url.replace('http://', 'https://');
@@ -35,7 +35,72 @@
     if (!response.ok) {
       throw new Error(data && data.error ? data.error : `HTTP ${response.status}`);
     }
+    return { data, response };
+  }
+  async function apiRequest(url, options = {}) {
+    const { data } = await apiFetch(url, options);
     return data;
   }
+  // Fetch one page of a cursor-paginated list endpoint
+  async function apiRequestPage(url, cursor = null, options = {}) {
+    if (cursor) {
+      url += (url.includes('?') ? '&' : '?') + 'cursor=' + encodeURIComponent(cursor);
+    }
+    const { data, response } = await apiFetch(url, options);
+    return { items: data, nextCursor: response.headers.get('X-Next-Cursor') };
+  }
+  // Live ticket changes from /api/tickets/stream (server-sent events).
+  // handlers.upsert(ticket) for created/updated/assigned, handlers.remove(id)
+  // for deleted/removed, handlers.reset() when missed changes need a reload.
+  // The browser reconnects on its own and resumes from the last event id.
+  function subscribeTicketStream(handlers) {
+    if (!global.EventSource) { return null; }
+    const source = new EventSource('/api/tickets/stream');
+    ['created', 'updated', 'assigned'].forEach(kind => {
+      source.addEventListener(kind, event => handlers.upsert(JSON.parse(event.data), kind));
+    });
+    ['deleted', 'removed'].forEach(kind => {
+      source.addEventListener(kind, event => handlers.remove(JSON.parse(event.data).id, kind));
+    });
+    source.addEventListener('reset', () => handlers.reset());
+    // The browser retries dropped streams itself; a refused one (503 when the
+    // server is at its stream limit) is closed for good, so poll instead
+    source.addEventListener('error', () => {
+      if (source.readyState === EventSource.CLOSED && handlers.fallback) { handlers.fallback(); }
+    });
+    return source;
+  }
+  // Insert or replace a ticket in a newest-first list, in place. With more
+  // pages to load, tickets older than the last loaded one arrive with them.
+  function upsertTicket(list, ticket, hasMore = false) {
+    const index = list.findIndex(t => t.id === ticket.id);
+    if (index !== -1) {
+      list[index] = ticket;
+      return;
+    }
+    const position = list.findIndex(t => t.created_at < ticket.created_at ||
+      (t.created_at === ticket.created_at && t.id < ticket.id));
+    if (position === -1 && hasMore) { return; }
+    list.splice(position === -1 ? list.length : position, 0, ticket);
+  }
+  // Changes since a sync token from /api/tickets/changes: { tickets, removed,
+  // next }, or { reset: true, next } when the list must be reloaded. Call
+  // without a token before loading a list to get the first one.
+  function fetchTicketChanges(since = null, scope = null) {
+    const params = new URLSearchParams();
+    if (since) { params.set('since', since); }
+    if (scope) { params.set('scope', scope); }
+    const query = params.toString();
+    return apiRequest('/api/tickets/changes' + (query ? '?' + query : ''));
+  }
+  function removeTicket(list, ticketId) {
+    const index = list.findIndex(t => t.id === ticketId);
+    if (index !== -1) { list.splice(index, 1); }
+  }
   global.apiRequest = apiRequest;
+  global.apiRequestPage = apiRequestPage;
+  global.subscribeTicketStream = subscribeTicketStream;
+  global.upsertTicket = upsertTicket;
+  global.removeTicket = removeTicket;
+  global.fetchTicketChanges = fetchTicketChanges;
 })(window);
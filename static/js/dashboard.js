@@ -3,20 +3,29 @@
 let allTickets = [];
 let filteredTickets = [];
 let currentUser = null;
+let nextCursor = null;
+let searchQuery = '';
+let searchTimer = null;
+let statsTimer = null;
+let syncToken = null;
+let pollTimer = null;
+
+// Without a live stream, poll for changes this often (ms)
+const SYNC_INTERVAL = 30000;
 
 document.addEventListener('DOMContentLoaded', function() {
     loadUserInfo();
     loadTickets();
     setupEventListeners();
+    subscribeToTicketChanges();
     
     // Initialize create ticket modal with dashboard-specific options
     initCreateTicketModal({
         redirectAfterCreate: false,
         onTicketCreated: (newTicket) => {
-            // Add the new ticket to the dashboard
-            allTickets.unshift(newTicket);
-            applyFilters();
-            updateStats();
+            // Add the new ticket to the dashboard (the stream may have already)
+            upsertTicket(allTickets, newTicket);
+            refreshAfterChange();
         }
     });
 });
@@ -37,6 +46,18 @@ function setupEventListeners() {
     if (statusFilter) statusFilter.addEventListener('change', applyFilters);
     if (priorityFilter) priorityFilter.addEventListener('change', applyFilters);
 
+    // Search runs on the server; wait for a pause in typing before querying
+    const searchInput = document.getElementById('searchInput');
+    if (searchInput) {
+        searchInput.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => {
+                searchQuery = searchInput.value.trim();
+                loadTickets();
+            }, 300);
+        });
+    }
+
     // Initialize edit ticket modal
     initEditTicketModal({
         onTicketUpdated: (updatedTicket) => {
@@ -54,15 +75,78 @@ function setupEventListeners() {
     });
 }
 
+function subscribeToTicketChanges() {
+    // The server only sends tickets this user created or is assigned to
+    const stream = subscribeTicketStream({
+        upsert: (ticket) => {
+            mergeTicket(ticket);
+            refreshAfterChange();
+        },
+        remove: (ticketId) => {
+            removeTicket(allTickets, ticketId);
+            refreshAfterChange();
+        },
+        reset: () => syncTicketChanges(),
+        fallback: startPolling
+    });
+    if (!stream) startPolling();
+}
+
+function startPolling() {
+    if (pollTimer) return;
+    pollTimer = setInterval(syncTicketChanges, SYNC_INTERVAL);
+}
+
+function mergeTicket(ticket) {
+    // Search results are ranked, not a newest-first list; leave them as they are
+    if (searchQuery) {
+        const index = allTickets.findIndex(t => t.id === ticket.id);
+        if (index !== -1) allTickets[index] = { ...ticket, highlights: allTickets[index].highlights };
+    } else {
+        upsertTicket(allTickets, ticket, Boolean(nextCursor));
+    }
+}
+
+// Catch up from the last sync token instead of reloading every ticket
+async function syncTicketChanges() {
+    if (!syncToken) return loadTickets();
+    try {
+        const changes = await fetchTicketChanges(syncToken, 'mine');
+        if (changes.reset) return loadTickets();
+        syncToken = changes.next;
+        changes.removed.forEach(ticketId => removeTicket(allTickets, ticketId));
+        changes.tickets.forEach(mergeTicket);
+        refreshAfterChange();
+    } catch (error) {
+        // Keep the current list; the next reset or poll tries again
+    }
+}
+
+function refreshAfterChange() {
+    applyFilters();
+    // Bursts of changes (bulk updates) refresh the counts once
+    clearTimeout(statsTimer);
+    statsTimer = setTimeout(updateStats, 500);
+}
+
+function ticketsUrl() {
+    return searchQuery
+        ? `/api/tickets/search?scope=mine&q=${encodeURIComponent(searchQuery)}`
+        : '/api/tickets/';
+}
+
 async function loadTickets() {
     try {
         showLoading(true);
-        const tickets = await apiRequest('/api/tickets');
+        // Taken first, so changes made while the list loads are synced later
+        syncToken = (await fetchTicketChanges(null, 'mine')).next;
+        const page = await apiRequestPage(ticketsUrl());
         
         // Regular dashboard always shows personal tickets only
         // No admin filtering needed here - backend handles it
-        allTickets = tickets;
-        filteredTickets = allTickets;
+        allTickets = page.items;
+        nextCursor = page.nextCursor;
+        applyFilters();
         
         // Update the edit modal's tickets array reference
         if (editTicketModalInstance) {
@@ -90,26 +174,51 @@ async function loadTickets() {
         // Show empty state
         allTickets = [];
         filteredTickets = [];
+        nextCursor = null;
         updateDashboard();
     }
 }
 
+async function loadMoreTickets() {
+    if (!nextCursor) return;
+    const button = document.getElementById('loadMoreButton');
+    if (button) button.disabled = true;
+    try {
+        const page = await apiRequestPage(ticketsUrl(), nextCursor);
+        // Append in place so the edit modal keeps its reference to allTickets
+        allTickets.push(...page.items);
+        nextCursor = page.nextCursor;
+        applyFilters();
+    } catch (error) {
+        showToast('Failed to load more tickets', 'error');
+    } finally {
+        if (button) button.disabled = false;
+    }
+}
+
+function updateLoadMore() {
+    const loadMore = document.getElementById('loadMore');
+    if (loadMore) {
+        loadMore.style.display = nextCursor ? 'block' : 'none';
+    }
+}
+
 function updateDashboard() {
     updateStats();
     updateTicketsTable();
 }
 
-function updateStats() {
-    // Use allTickets (which are already filtered for non-admin users)
-    const total = allTickets.length;
-    const open = allTickets.filter(t => t.status === 'open').length;
-    const inProgress = allTickets.filter(t => t.status === 'in_progress').length;
-    const closed = allTickets.filter(t => t.status === 'closed').length;
-
-    document.getElementById('totalTickets').textContent = total;
-    document.getElementById('openTickets').textContent = open;
-    document.getElementById('inProgressTickets').textContent = inProgress;
-    document.getElementById('closedTickets').textContent = closed;
+async function updateStats() {
+    // Counts come from the server so they cover every ticket, not just loaded pages
+    try {
+        const stats = await apiRequest('/api/tickets/stats');
+        document.getElementById('totalTickets').textContent = stats.total;
+        document.getElementById('openTickets').textContent = stats.open;
+        document.getElementById('inProgressTickets').textContent = stats.in_progress;
+        document.getElementById('closedTickets').textContent = stats.closed;
+    } catch (error) {
+        console.error('Error loading ticket stats:', error);
+    }
 }
 
 function updateTicketsTable() {
@@ -117,6 +226,8 @@ function updateTicketsTable() {
     const ticketsTable = document.getElementById('ticketsTable');
     const noTickets = document.getElementById('noTickets');
 
+    updateLoadMore();
+
     if (filteredTickets.length === 0) {
         ticketsTable.style.display = 'none';
         noTickets.style.display = 'block';
@@ -140,8 +251,13 @@ function updateTicketsTable() {
                     '<br><small class="badge bg-info">Assigned to me</small>' : ''}
             </td>
             <td>
-                <strong>${escapeHtml(ticket.title)}</strong>
-                ${ticket.description ? `<br><small class="text-muted">${escapeHtml(ticket.description.substring(0, 50))}${ticket.description.length > 50 ? '...' : ''}</small>` : ''}
+                ${ticket.highlights ? `
+                    <strong>${ticket.highlights.title}</strong>
+                    ${ticket.highlights.description ? `<br><small class="text-muted">${ticket.highlights.description}</small>` : ''}
+                ` : `
+                    <strong>${escapeHtml(ticket.title)}</strong>
+                    ${ticket.description ? `<br><small class="text-muted">${escapeHtml(ticket.description.substring(0, 50))}${ticket.description.length > 50 ? '...' : ''}</small>` : ''}
+                `}
             </td>
             <td>
                 <span class="badge badge-status status-${ticket.status}">
@@ -101,10 +101,20 @@ class EditTicketModal {
     }
 
     // Open the edit modal with ticket data
-    editTicket(ticketId, allTickets = null) {
+    async editTicket(ticketId, allTickets = null) {
         // Use provided tickets array or fallback to instance property
         const ticketsArray = allTickets || this.allTickets;
-        const ticket = ticketsArray.find(t => t.id === ticketId);
+        let ticket = ticketsArray.find(t => t.id === ticketId);
+        
+        // Summary lists carry a shortened description; edit the full text
+        if (ticket && ticket.description_truncated) {
+            try {
+                ticket = await apiRequest(`/api/tickets/${ticketId}`);
+            } catch (error) {
+                showToast('Failed to load ticket: ' + error.message, 'error');
+                return;
+            }
+        }
         
         if (!ticket) {
             showToast('Ticket not found', 'error');
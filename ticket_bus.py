@@ -0,0 +1,293 @@
+"""Publish/subscribe bus for ticket changes, feeding /api/tickets/stream.
+
+The write paths in routes/tickets.py call ``publish_ticket_changes`` after
+they commit. Each change becomes a ``TicketEvent`` carrying the encoded
+ticket (or just its id, for deletions) and the ids of the users who may see
+it: the requester and the assignee, before and after the change.
+
+With one process the bus delivers events itself. On PostgreSQL
+(TICKET_STREAM_FANOUT 'auto' or 'postgres') events go out with NOTIFY and
+every worker, the publisher included, delivers what its LISTEN connection
+receives, so all workers see the same events in commit order.
+
+Each worker keeps the last TICKET_STREAM_BUFFER_SIZE events so a client
+reconnecting with ``Last-Event-ID`` gets what it missed, or a ``reset``
+event telling it to reload when the gap is no longer buffered.
+"""
+import json
+import logging
+import os
+import queue
+import secrets
+import select
+import threading
+import time
+from collections import deque, namedtuple
+from flask import current_app
+from sqlalchemy import func, select as sql_select
+from models import db, Ticket, ticket_projection, ticket_dtos
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = 'ticket_bus'
+CHANNEL = 'ticket_events'
+# NOTIFY payloads must stay under 8000 bytes; bigger events carry no ticket
+MAX_NOTIFY_PAYLOAD = 7900
+
+class StreamCapacityError(RuntimeError):
+    """Raised when a worker already serves its maximum number of streams."""
+
+
+TicketEvent = namedtuple('TicketEvent', ['id', 'kind', 'ticket_id', 'data', 'audience', 'previous'])
+
+
+def ticket_audience(*users):
+    """The user ids, of a requester and assignee(s), that may see a ticket."""
+    return frozenset(user for user in users if user is not None)
+
+
+class Subscription:
+    """One stream's view of the bus: a bounded queue filtered to what its user may see."""
+
+    def __init__(self, user_id, is_admin, max_size):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.queue = queue.Queue(max_size)
+        # Set when the queue filled up; the stream then tells its client to reload
+        self.overflowed = False
+
+    def scoped(self, event):
+        """``event`` as this user sees it: itself, a 'removed' notice, or None."""
+        if self.is_admin or self.user_id in event.audience:
+            return event
+        if self.user_id in event.previous:
+            # No longer the requester or assignee: drop it from this user's list
+            return event._replace(kind='removed', data=json.dumps({'id': event.ticket_id}))
+        return None
+
+    def offer(self, event):
+        event = self.scoped(event)
+        if event is None or self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+
+class TicketBus:
+    """In-process fan-out of TicketEvents to subscriptions, with a resume buffer."""
+
+    def __init__(self, buffer_size=1000, queue_size=256, max_subscriptions=0):
+        self.origin = f'{os.getpid():x}{secrets.token_hex(2)}'
+        self._seq = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._queue_size = queue_size
+        # Each stream holds a worker thread; 0 means no limit (async workers)
+        self._max_subscriptions = max_subscriptions
+        self.relay = None
+
+    def next_id(self):
+        with self._lock:
+            self._seq += 1
+            return f'{int(time.time() * 1000)}-{self.origin}-{self._seq}'
+
+    def publish(self, events):
+        """Send events to every worker: through the relay if there is one, else deliver here."""
+        if self.relay is not None:
+            self.relay.publish(events)
+        else:
+            for event in events:
+                self.deliver(event)
+
+    def deliver(self, event):
+        with self._lock:
+            self._buffer.append(event)
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.offer(event)
+
+    def subscribe(self, user_id, is_admin, last_event_id=None):
+        """Register a stream; returns (subscription, missed events or None if a reload is needed).
+
+        Every worker receives the events in the same order, so ``last_event_id``
+        is found in any worker's buffer unless it has been evicted. Raises
+        StreamCapacityError when ``max_subscriptions`` streams are open.
+        """
+        subscription = Subscription(user_id, is_admin, self._queue_size)
+        with self._lock:
+            if self._max_subscriptions and len(self._subscriptions) >= self._max_subscriptions:
+                raise StreamCapacityError('Too many open ticket streams')
+            self._subscriptions.add(subscription)
+            if last_event_id is None:
+                return subscription, []
+            ids = [event.id for event in self._buffer]
+            if last_event_id not in ids:
+                return subscription, None
+            missed = list(self._buffer)[ids.index(last_event_id) + 1:]
+        return subscription, [event for event in map(subscription.scoped, missed) if event]
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+
+class PostgresNotifyRelay:
+    """Fans events out to every worker through PostgreSQL NOTIFY/LISTEN."""
+
+    def __init__(self, app, engine, bus):
+        self.app = app
+        self.engine = engine
+        self.bus = bus
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish(self, events):
+        self.start()
+        with self.engine.begin() as connection:
+            for event in events:
+                connection.execute(sql_select(func.pg_notify(CHANNEL, self.encode(event))))
+
+    @staticmethod
+    def encode(event):
+        payload = event._asdict()
+        payload['audience'] = sorted(event.audience)
+        payload['previous'] = sorted(event.previous)
+        encoded = json.dumps(payload)
+        if len(encoded.encode()) > MAX_NOTIFY_PAYLOAD:
+            # Receivers load the ticket themselves
+            encoded = json.dumps(dict(payload, data=None))
+        return encoded
+
+    def decode(self, payload):
+        payload = json.loads(payload)
+        event = TicketEvent(
+            payload['id'], payload['kind'], payload['ticket_id'], payload['data'],
+            frozenset(payload['audience']), frozenset(payload['previous'])
+        )
+        if event.data is None:
+            with self.app.app_context():
+                dtos = _load_tickets([event.ticket_id])
+                data = current_app.json.dumps(dtos[0]) if dtos else json.dumps({'id': event.ticket_id})
+            event = event._replace(data=data)
+        return event
+
+    def start(self):
+        """Start the LISTEN thread once per process (after any fork)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen_forever, name='ticket-bus-listen', daemon=True)
+                self._thread.start()
+
+    def _listen_forever(self):
+        delay = 1
+        while True:
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning(f"Ticket event listener lost its connection: {e}; retrying in {delay}s")
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    def _listen(self):
+        # A dedicated connection, so LISTEN does not hold one from the pool
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        connection = self.engine.dialect.connect(*cargs, **cparams)
+        try:
+            connection.autocommit = True
+            connection.cursor().execute(f'LISTEN {CHANNEL}')
+            while True:
+                if select.select([connection], [], [], 30) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    self.bus.deliver(self.decode(notify.payload))
+        finally:
+            connection.close()
+
+
+def ticket_bus(app=None):
+    """The app's bus, created on first use in each worker process."""
+    app = app or current_app._get_current_object()
+    bus = app.extensions.get(EXTENSION_KEY)
+    if bus is None:
+        bus = TicketBus(
+            buffer_size=app.config.get('TICKET_STREAM_BUFFER_SIZE', 1000),
+            queue_size=app.config.get('TICKET_STREAM_QUEUE_SIZE', 256),
+            max_subscriptions=app.config.get('TICKET_STREAM_MAX_CONNECTIONS', 2),
+        )
+        fanout = app.config.get('TICKET_STREAM_FANOUT', 'auto')
+        with app.app_context():
+            engine = db.engine
+        if fanout == 'postgres' or (fanout == 'auto' and engine.dialect.name == 'postgresql'):
+            bus.relay = PostgresNotifyRelay(app, engine, bus)
+        bus = app.extensions.setdefault(EXTENSION_KEY, bus)
+    if bus.relay is not None:
+        bus.relay.start()
+    return bus
+
+
+def _load_tickets(ticket_ids):
+    """TicketDTOs, as the list endpoints return them, in one query."""
+    return ticket_dtos(ticket_projection(Ticket.query.filter(Ticket.id.in_(ticket_ids))))
+
+
+def publish_ticket_changes(kind, changes):
+    """Publish committed changes: ``changes`` maps ticket id to its audience before the change.
+
+    ``kind`` is 'created', 'updated', 'assigned' or 'deleted'. Failures are
+    logged, never raised: the change itself is already committed.
+    """
+    if not changes:
+        return
+    try:
+        bus = ticket_bus()
+        if kind == 'deleted':
+            events = [
+                TicketEvent(bus.next_id(), kind, ticket_id, json.dumps({'id': ticket_id}), previous, previous)
+                for ticket_id, previous in changes.items()
+            ]
+        else:
+            events = [
+                TicketEvent(bus.next_id(), kind, dto.id, current_app.json.dumps(dto),
+                            ticket_audience(dto.user_id, dto.assigned_to), changes[dto.id])
+                for dto in _load_tickets(list(changes))
+            ]
+        bus.publish(events)
+    except Exception as e:
+        logger.error(f"Could not publish ticket {kind} events: {str(e)}")
+
+
+def format_event(event):
+    """Server-sent event frame for ``event``."""
+    return f'id: {event.id}\nevent: {event.kind}\ndata: {event.data}\n\n'
+
+
+def event_stream(bus, subscription, missed, heartbeat, max_duration):
+    """Yield SSE frames until ``max_duration`` passes; the client then reconnects with Last-Event-ID."""
+    deadline = time.monotonic() + max_duration
+    try:
+        yield 'retry: 3000\n\n'
+        if missed is None:
+            yield 'event: reset\ndata: {}\n\n'
+        else:
+            for event in missed:
+                yield format_event(event)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event = subscription.queue.get(timeout=min(heartbeat, remaining))
+            except queue.Empty:
+                if subscription.overflowed:
+                    yield 'event: reset\ndata: {}\n\n'
+                    return
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        bus.unsubscribe(subscription)
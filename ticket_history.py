@@ -0,0 +1,168 @@
+"""Ticket history: the append-only ``ticket_events`` log.
+
+The write paths call ``record_ticket_events`` before they commit, so an
+event exists exactly when its change does; bulk changes insert all their
+rows in one executemany. ``ticket-events-maintain`` keeps the table
+bounded. On PostgreSQL it creates the coming months' partitions and drops
+whole months past TICKET_EVENTS_RETENTION_DAYS, so writes only ever touch
+the current, small partition and expiry leaves no dead rows behind. A
+month must have its partition before changes are made in it: ``db-init``
+also creates the next TICKET_EVENTS_PARTITIONS_AHEAD months on every deploy.
+Elsewhere it deletes expired rows in short batches.
+"""
+import logging
+import re
+from datetime import datetime
+from sqlalchemy import insert, text
+from sqlalchemy.orm import aliased
+from models import db, TicketAuditEvent, User, create_ticket_event_partitions
+from dto import TicketEventDTO
+
+logger = logging.getLogger(__name__)
+
+AUDITED_FIELDS = ('title', 'description', 'status', 'priority', 'assigned_to')
+
+_PARTITION_NAME = re.compile(r'^ticket_events_(\d{4})(\d{2})$')
+
+
+def ticket_values(ticket):
+    """The audited fields of a Ticket, or of a row selecting them."""
+    return {field: getattr(ticket, field) for field in AUDITED_FIELDS}
+
+
+def field_changes(before, after):
+    """``{field: [old, new]}`` for the audited fields that differ; missing fields are None."""
+    return {
+        field: [before.get(field), after.get(field)]
+        for field in AUDITED_FIELDS if before.get(field) != after.get(field)
+    }
+
+
+def record_ticket_events(actor_id, action, changes):
+    """Add one event per ticket to the session's transaction.
+
+    ``changes`` maps ticket id to its ``field_changes``; tickets without
+    changes get no event. The caller commits.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {'ticket_id': ticket_id, 'actor_id': actor_id, 'action': action, 'changes': fields, 'created_at': now}
+        for ticket_id, fields in changes.items() if fields
+    ]
+    if rows:
+        db.session.execute(insert(TicketAuditEvent), rows)
+
+
+def history_query(ticket_id):
+    """Query for TicketEventDTO rows of one ticket, with the actor's name."""
+    actor = aliased(User)
+    return db.session.query(
+        TicketAuditEvent.id, TicketAuditEvent.ticket_id, TicketAuditEvent.actor_id,
+        actor.first_name + ' ' + actor.last_name, TicketAuditEvent.action,
+        TicketAuditEvent.changes, TicketAuditEvent.created_at
+    ).outerjoin(actor, TicketAuditEvent.actor_id == actor.id).filter(TicketAuditEvent.ticket_id == ticket_id)
+
+
+def _delete_expired(connection, table, cutoff, batch_size):
+    """Delete rows of ``table`` older than ``cutoff``, one committed batch at a time."""
+    deleted = 0
+    while True:
+        with connection.begin():
+            count = connection.execute(text(
+                f'DELETE FROM {table} WHERE id IN '
+                f'(SELECT id FROM {table} WHERE created_at < :cutoff LIMIT :batch_size)'
+            ), {'cutoff': cutoff, 'batch_size': batch_size}).rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def _retire_default_partition(connection, cutoff):
+    """Fold a ticket_events_default partition from an earlier version into monthly ones.
+
+    PostgreSQL refuses DETACH PARTITION CONCURRENTLY while the table has a
+    default partition. Its expired rows are deleted, the rest move to their
+    month's partition, and it is dropped; returns the number deleted. Runs
+    in the caller's transaction.
+    """
+    if connection.execute(text("SELECT to_regclass('ticket_events_default')")).scalar() is None:
+        return 0
+    removed = connection.execute(
+        text('DELETE FROM ticket_events_default WHERE created_at < :cutoff'), {'cutoff': cutoff}
+    ).rowcount
+    connection.execute(text('ALTER TABLE ticket_events DETACH PARTITION ticket_events_default'))
+    oldest, newest = connection.execute(
+        text('SELECT min(created_at), max(created_at) FROM ticket_events_default')
+    ).one()
+    if oldest is not None:
+        months = (newest.year - oldest.year) * 12 + newest.month - oldest.month + 1
+        create_ticket_event_partitions(connection, oldest, months)
+        connection.execute(text('INSERT INTO ticket_events SELECT * FROM ticket_events_default'))
+    connection.execute(text('DROP TABLE ticket_events_default'))
+    logger.info("Moved ticket_events_default into monthly partitions")
+    return removed
+
+
+def _prepare_partitions(connection, cutoff, months_ahead, now):
+    """Retire an old default partition and create this month's and the next ``months_ahead``."""
+    removed = _retire_default_partition(connection, cutoff)
+    create_ticket_event_partitions(connection, now, months_ahead + 1)
+    return removed
+
+
+def prepare_ticket_event_partitions(cutoff, months_ahead=2, now=None):
+    """Make sure ticket changes have a partition to land in (PostgreSQL; no-op elsewhere).
+
+    ``db-init`` runs this on every deploy; ``maintain_ticket_events`` does
+    the same before applying retention. Returns the number of expired
+    events dropped from an old default partition.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return 0
+    with db.engine.begin() as connection:
+        return _prepare_partitions(connection, cutoff, months_ahead, now or datetime.utcnow())
+
+
+def maintain_ticket_events(cutoff, months_ahead=2, batch_size=5000, now=None):
+    """Apply retention to ticket_events; return the number of events removed.
+
+    On PostgreSQL, partitions are created through ``months_ahead`` months
+    after this one, and partitions ending on or before ``cutoff`` are
+    detached concurrently, so reads and writes of the other months carry
+    on, then dropped. On other databases rows older than ``cutoff`` are
+    deleted in batches.
+    """
+    now = now or datetime.utcnow()
+    removed = 0
+    with db.engine.connect() as connection:
+        if connection.dialect.name != 'postgresql':
+            return _delete_expired(connection, 'ticket_events', cutoff, batch_size)
+
+        with connection.begin():
+            removed += _prepare_partitions(connection, cutoff, months_ahead, now)
+            partitions = connection.execute(text(
+                "SELECT child.relname, pg_inherits.inhdetachpending FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "WHERE parent.relname = 'ticket_events'"
+            )).all()
+
+        # DETACH ... CONCURRENTLY cannot run inside a transaction block
+        connection.execution_options(isolation_level='AUTOCOMMIT')
+        for name, detach_pending in partitions:
+            match = _PARTITION_NAME.match(name)
+            if not match:
+                continue
+            year, month = int(match.group(1)), int(match.group(2))
+            upper = datetime(year + month // 12, month % 12 + 1, 1)
+            if upper > cutoff:
+                continue
+            removed += connection.execute(text(f'SELECT count(*) FROM {name}')).scalar()
+            if detach_pending:
+                # An earlier run was interrupted between the two steps of the detach
+                connection.execute(text(f'ALTER TABLE ticket_events DETACH PARTITION {name} FINALIZE'))
+            else:
+                connection.execute(text(f'ALTER TABLE ticket_events DETACH PARTITION {name} CONCURRENTLY'))
+            connection.execute(text(f'DROP TABLE {name}'))
+            logger.info(f"Dropped ticket events partition {name}")
+    return removed